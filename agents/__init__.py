@@ -1,10 +1,11 @@
 """
 Agents package for AI Operations Assistant
-Contains Planner, Executor, and Verifier agents
+Contains Planner, Executor, and Verifier agents and the conversation sessions they share
 """
 
 from .planner import PlannerAgent
 from .executor import ExecutorAgent
 from .verifier import VerifierAgent
+from .session import Session
 
-__all__ = ["PlannerAgent", "ExecutorAgent", "VerifierAgent"]
\ No newline at end of file
+__all__ = ["PlannerAgent", "ExecutorAgent", "VerifierAgent", "Session"]
\ No newline at end of file
@@ -1,50 +1,162 @@
-from typing import Dict, Any, List
-from tools.github_tool import GitHubTool
-from tools.weather_tool import WeatherTool
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from config import Config
+from tools.registry import registry
+from observability.metrics import SPECULATIVE_STEPS, CACHE_HITS
+from observability import events
+from observability.tracing import tracer
 
 
 class ExecutorAgent:
-    def __init__(self):
-        self.tools = {
-            "github_search": GitHubTool(),
-            "weather": WeatherTool()
-        }
+    # Worker threads for speculative steps, shared by all executors
+    _speculation_pool = None
+    _speculation_lock = threading.Lock()
+
+    def __init__(self, tool_registry=None):
+        # Tools are loaded from the registry and constructed on first use
+        self.registry = tool_registry or registry
+        self.tools = {}
+
+    def get_tool(self, tool_name: str):
+        """Return the tool instance for a name, constructing it on first use"""
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            tool = self.tools.setdefault(tool_name, self.registry.create(tool_name))
+        return tool
 
     def execute_step(self, step: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a single step from the plan"""
+        """Execute a single step from the plan; `fetched_at` records when its result was produced"""
         tool_name = step.get("tool")
         parameters = step.get("parameters", {})
 
-        if tool_name not in self.tools:
-            raise ValueError(f"Unknown tool: {tool_name}")
-
-        try:
-            tool = self.tools[tool_name]
-            result = tool.execute(**parameters)
-
+        if tool_name not in self.registry:
+            # Fail this step only; the rest of the plan still runs
             return {
-                "step": step["step_number"],
-                "success": True,
-                "result": result,
-                "error": None
-            }
-        except Exception as e:
-            return {
-                "step": step["step_number"],
+                "step": step.get("step_number"),
                 "success": False,
                 "result": None,
-                "error": str(e)
+                "error": f"Unknown tool: {tool_name}",
+                "fetched_at": time.time()
             }
 
-    def execute_plan(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Execute all steps in the plan"""
-        results = []
+        with tracer.start_span("executor.execute_step", step=step["step_number"], tool=tool_name) as span:
+            try:
+                tool = self.get_tool(tool_name)
+                result = tool.execute(**parameters)
+                span.set_attribute("step.success", True)
+
+                return {
+                    "step": step["step_number"],
+                    "success": True,
+                    "result": result,
+                    "error": None,
+                    "fetched_at": time.time()
+                }
+            except Exception as e:
+                span.record_error(e)
+                return {
+                    "step": step["step_number"],
+                    "success": False,
+                    "result": None,
+                    "error": str(e),
+                    "fetched_at": time.time()
+                }
+
+    def step_key(self, step: Dict[str, Any]) -> Optional[str]:
+        """Identify a tool call by tool name and parameters, with schema defaults filled in"""
+        spec = self.registry.get_spec(step.get("tool"))
+        if spec is None or not isinstance(step.get("parameters", {}), dict):
+            return None
+        parameters = {
+            param: schema["default"]
+            for param, schema in spec.parameters.get("properties", {}).items()
+            if "default" in schema
+        }
+        for param, value in step.get("parameters", {}).items():
+            parameters[param] = value.strip().lower() if isinstance(value, str) else value
+        return json.dumps([spec.name, parameters], sort_keys=True, default=str)
+
+    def speculate(self, steps: List[Dict[str, Any]]) -> Dict[str, Future]:
+        """Start predicted steps in the background while the real plan is being made
+
+        Returns futures keyed by step_key; pass them to execute_plan, which
+        reuses the ones the plan asks for and cancels the rest.
+        """
+        with ExecutorAgent._speculation_lock:
+            if ExecutorAgent._speculation_pool is None:
+                ExecutorAgent._speculation_pool = ThreadPoolExecutor(
+                    max_workers=Config.HTTP_POOL_SIZE, thread_name_prefix="speculation")
 
+        futures = {}
         for step in steps:
-            step_result = self.execute_step(step)
+            key = self.step_key(step)
+            if key is None or key in futures:
+                continue
+            # Run in a copy of the caller's context so the step's spans join the task's trace
+            context = contextvars.copy_context()
+            futures[key] = ExecutorAgent._speculation_pool.submit(context.run, self.execute_step, step)
+        return futures
+
+    def execute_plan(self, steps: List[Dict[str, Any]],
+                     speculative: Dict[str, Future] = None,
+                     on_event=None,
+                     session=None) -> List[Dict[str, Any]]:
+        """Execute all steps in the plan, reusing matching speculative results
+
+        With a `session`, steps an earlier turn already ran are answered with
+        its result while that is fresh (marked with "reused_from"). `on_event`
+        receives the execution phase, step and retry events (see
+        observability.events).
+        """
+        with events.listen(on_event), events.phase("executor", "execution", steps=len(steps)) as summary:
+            results = self._execute_steps(steps, speculative, session)
+            summary["successful_steps"] = sum(1 for result in results if result["success"])
+            return results
+
+    def _execute_steps(self, steps: List[Dict[str, Any]], speculative: Dict[str, Future] = None,
+                       session=None) -> List[Dict[str, Any]]:
+        results = []
+        speculative = dict(speculative or {})
+
+        for index, step in enumerate(steps):
+            events.emit(events.STEP_START, "executor", step=step.get("step_number"), tool=step.get("tool"),
+                        index=index, total=len(steps), description=step.get("description"))
+            start = time.perf_counter()
+            step_result = None
+            reused = False
+            key = self.step_key(step)
+            earlier = session.reusable_result(key) if session is not None else None
+            if earlier is not None:
+                step_result = dict(earlier, step=step.get("step_number"))
+                CACHE_HITS.inc(cache="session")
+                events.emit(events.CACHE_HIT, "executor", cache="session", tool=step.get("tool"))
+            future = speculative.pop(key, None) if speculative and step_result is None else None
+            if future is not None:
+                speculated = future.result()
+                if speculated["success"]:
+                    step_result = dict(speculated, step=step["step_number"])
+                    reused = True
+                    SPECULATIVE_STEPS.inc(result="hit")
+                else:
+                    SPECULATIVE_STEPS.inc(result="wasted")
+
+            if step_result is None:
+                step_result = self.execute_step(step)
             results.append(step_result)
+            events.emit(events.STEP_END, "executor", step=step.get("step_number"), tool=step.get("tool"),
+                        index=index, total=len(steps), success=step_result["success"],
+                        error=step_result["error"], speculative=reused, duration=time.perf_counter() - start)
 
             # If step fails, we might want to handle it differently
             # For now, we continue with other steps
 
+        # Speculative work the plan did not ask for is cancelled, or discarded if already running
+        for future in speculative.values():
+            future.cancel()
+            SPECULATIVE_STEPS.inc(result="wasted")
+
         return results
\ No newline at end of file
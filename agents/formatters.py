@@ -0,0 +1,136 @@
+"""
+Deterministic result formatters
+
+Each formatter recognises one tool result schema by its keys and restates it
+as the verifier's output shape (summary, data, details) without an LLM call.
+Its "data" holds top-level entries of the answer's data under the keys the
+LLM verifier uses and the CLI and dashboard render ("weather",
+"repositories").
+Formatters for new tools are added with @register_formatter.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ResultFormatter:
+    def __init__(self, name: str, required_keys: Tuple[str, ...], format_fn: Callable[[Dict[str, Any]], Dict[str, Any]]):
+        self.name = name
+        self.required_keys = required_keys
+        self.format_fn = format_fn
+
+    def matches(self, result: Any) -> bool:
+        return isinstance(result, dict) and all(key in result for key in self.required_keys)
+
+
+FORMATTERS: List[ResultFormatter] = []
+
+
+def register_formatter(name: str, required_keys: Tuple[str, ...]):
+    """Register a function turning one result schema into {"summary", "details", "data": {key: entry}}"""
+    def decorator(format_fn):
+        FORMATTERS.append(ResultFormatter(name, tuple(required_keys), format_fn))
+        return format_fn
+    return decorator
+
+
+def find_formatter(result: Any) -> Optional[ResultFormatter]:
+    """Formatter for a successful tool result, or None if its schema is unknown or it carries an error"""
+    if not isinstance(result, dict) or result.get("error"):
+        return None
+    for formatter in FORMATTERS:
+        if formatter.matches(result):
+            return formatter
+    return None
+
+
+@register_formatter("weather", ("city", "temperature_c", "condition"))
+def format_weather(result: Dict[str, Any]) -> Dict[str, Any]:
+    place = ", ".join(part for part in (result.get("city"), result.get("country")) if part)
+    details = [f"Temperature: {result['temperature_c']}°C / {result.get('temperature_f')}°F",
+               f"Condition: {result['condition']}"]
+    if result.get("humidity") is not None:
+        details.append(f"Humidity: {result['humidity']}%")
+    if result.get("wind_kph") is not None:
+        details.append(f"Wind: {result['wind_kph']} km/h")
+    if result.get("last_updated"):
+        details.append(f"Last updated: {result['last_updated']}")
+    return {
+        "summary": f"Weather in {place}: {result['temperature_c']}°C, {str(result['condition']).lower()}.",
+        "details": [f"{place} - {detail}" for detail in details],
+        "data": {"weather": result}
+    }
+
+
+@register_formatter("github_search", ("query", "total_count", "repositories"))
+def format_github_search(result: Dict[str, Any]) -> Dict[str, Any]:
+    repositories = result["repositories"]
+    details = [
+        f"{repo.get('name')} (⭐ {repo.get('stars', 0):,}, {repo.get('language') or 'n/a'}): "
+        f"{repo.get('description')} - {repo.get('url')}"
+        for repo in repositories
+    ]
+    return {
+        "summary": f"Found {result['total_count']:,} GitHub repositories for '{result['query']}'"
+                   + (f"; top {len(repositories)} by stars listed." if repositories else "."),
+        "details": details,
+        "data": {"query": result["query"], "total_count": result["total_count"], "repositories": repositories}
+    }
+
+
+@register_formatter("github_repository", ("name", "stars", "forks", "url"))
+def format_github_repository(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "summary": f"{result['name']} has {result['stars']:,} stars and {result['forks']:,} forks.",
+        "details": [
+            f"Description: {result.get('description')}",
+            f"Language: {result.get('language') or 'n/a'}",
+            f"Open issues: {result.get('issues')}",
+            f"Topics: {', '.join(result.get('topics') or []) or 'none'}",
+            f"URL: {result['url']}"
+        ],
+        "data": {"repository": result}
+    }
+
+
+def _format_generic(result: Any) -> Dict[str, Any]:
+    """Fallback for unknown schemas when templates are forced"""
+    if isinstance(result, dict):
+        details = [f"{key}: {value}" for key, value in result.items() if not isinstance(value, (dict, list))]
+    else:
+        details = [str(result)]
+    return {"summary": "", "details": details, "data": result}
+
+
+def format_results(execution_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build the verifier's formatted_result from tool results without an LLM"""
+    summaries, details, data, notes = [], [], {}, []
+
+    for step_result in execution_results:
+        step = step_result["step"]
+        if not step_result["success"]:
+            notes.append(f"Step {step} failed: {step_result['error']}")
+            continue
+
+        result = step_result["result"]
+        formatter = find_formatter(result)
+        if formatter is not None:
+            formatted = formatter.format_fn(result)
+        else:
+            formatted = _format_generic(result)
+            formatted["data"] = {f"step_{step}": formatted["data"]}
+            if isinstance(result, dict) and result.get("error"):
+                notes.append(f"Step {step} returned an error: {result['error']}")
+
+        if formatted["summary"]:
+            summaries.append(formatted["summary"])
+        details.extend(formatted["details"])
+        for key, value in formatted["data"].items():
+            # A second result of the same kind keeps its step number
+            data[key if key not in data else f"{key}_step_{step}"] = value
+
+    return {
+        "summary": " ".join(summaries) or "No results were returned.",
+        "data": data,
+        "details": details,
+        "status": "partial" if notes else "success",
+        "notes": "; ".join(notes) or "Formatted directly from the tool results."
+    }
@@ -0,0 +1,263 @@
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from config import Config
+from observability import events
+from observability.metrics import REFRESH_STEPS, TASK_REFRESHES
+from observability.tracing import tracer
+from storage.journal import get_journal
+
+# Step errors are cut to this many characters in the journal
+JOURNAL_ERROR_CHARS = 200
+
+
+def start_speculation(planner, executor, task: str, session=None) -> Optional[Dict[str, Future]]:
+    """Start the tool calls the rule-based patterns predict, before planning
+
+    Steps whose results the `session` can still reuse are not started. Pass
+    the result to executor.execute_plan after planner.create_plan.
+    """
+    if not Config.SPECULATIVE_EXECUTION:
+        return None
+    steps = planner.predict_steps(task)
+    if session is not None:
+        steps = [step for step in steps if session.reusable_result(executor.step_key(step)) is None]
+    return executor.speculate(steps)
+
+
+class RunRecorder:
+    """Collects one task run's events into a journal record
+
+    Call finish() with the plan and final result once the run is done.
+    """
+
+    def __init__(self, task: str, source: str, run_id: str = None):
+        self.task = task
+        self.source = source
+        self.run_id = run_id
+        self.timestamp = time.time()
+        self.plan = None
+        self.final_result = None
+        self.plan_source = None
+        self.phases: Dict[str, float] = {}
+        self.steps = []
+        self.llm = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self.cache_hits: Dict[str, int] = {}
+        self.retries = 0
+        # Events also arrive from pool threads (map summaries, speculative steps)
+        self._lock = threading.Lock()
+
+    def finish(self, plan: Dict[str, Any], final_result: Dict[str, Any]):
+        self.plan = plan
+        self.final_result = final_result
+
+    def __call__(self, event):
+        data = event.data
+        with self._lock:
+            if event.type == events.PHASE_END:
+                self.phases[data["phase"]] = round(data["duration"] * 1000, 1)
+                if data["phase"] == "planning":
+                    self.plan_source = data.get("plan_source")
+            elif event.type == events.STEP_END:
+                step = {"step": data["step"], "tool": data["tool"], "ok": data["success"],
+                        "ms": round(data["duration"] * 1000, 1)}
+                if data.get("speculative"):
+                    step["speculative"] = True
+                if data.get("error"):
+                    step["error"] = str(data["error"])[:JOURNAL_ERROR_CHARS]
+                self.steps.append(step)
+            elif event.type == events.LLM_USAGE:
+                self.llm["calls"] += 1
+                for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                    self.llm[key] += data.get(key) or 0
+            elif event.type == events.CACHE_HIT:
+                self.cache_hits[data["cache"]] = self.cache_hits.get(data["cache"], 0) + 1
+            elif event.type == events.RETRY:
+                self.retries += 1
+
+    @property
+    def intent(self) -> str:
+        """The tools the run used, in plan order ("weather+github_search")"""
+        tools = [step.get("tool") for step in (self.plan or {}).get("steps", [])] or \
+                [step["tool"] for step in self.steps]
+        return "+".join(dict.fromkeys(str(tool) for tool in tools)) or "none"
+
+    def to_record(self, duration: float, error: str = None) -> Dict[str, Any]:
+        final_result = self.final_result or {}
+        record = {
+            "ts": round(self.timestamp, 3),
+            "source": self.source,
+            "task": self.task,
+            "intent": self.intent,
+            "status": "error" if error else final_result.get("status", "error"),
+            "ms": round(duration * 1000, 1),
+            "phases": self.phases,
+            "plan": {
+                "source": self.plan_source,
+                "steps": [{"tool": step.get("tool"), "parameters": step.get("parameters")}
+                          for step in (self.plan or {}).get("steps", [])]
+            },
+            "steps": self.steps,
+            "llm": self.llm,
+            "cache": self.cache_hits,
+            "retries": self.retries,
+            "formatted_by": final_result.get("formatted_by")
+        }
+        if self.run_id is not None:
+            record["id"] = self.run_id
+        if error:
+            record["error"] = error[:JOURNAL_ERROR_CHARS]
+        return record
+
+
+@contextmanager
+def record_run(task: str, source: str, run_id: str = None):
+    """Append the task run in this block to the run journal (see storage.journal)
+
+    Yields a RunRecorder; call its finish(plan, final_result) at the end of
+    the run. A run that raises is journaled with status "error".
+    """
+    recorder = RunRecorder(task, source, run_id)
+    journal = get_journal()
+    if journal is None:
+        yield recorder
+        return
+
+    start = time.perf_counter()
+    error = None
+    try:
+        # tokens=False: journaling must not switch the LLM calls to streaming
+        with events.listen(recorder, tokens=False):
+            yield recorder
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        try:
+            journal.append(recorder.to_record(time.perf_counter() - start, error))
+        except Exception as e:
+            print(f"⚠️  Failed to write the run journal: {e}")
+
+
+def run_task(planner, executor, verifier, task: str, source: str = "cli",
+             verifier_mode: str = None, session=None, run_id: str = None,
+             on_phase: Callable[[str, Any], None] = None) -> Dict[str, Any]:
+    """Plan, execute and verify a task, returning every intermediate result
+
+    With a `session` (agents.session.Session) the task is a follow-up to the
+    session's earlier turns, and is added to them when it finishes. `run_id`
+    identifies the run in its trace and journal record. `on_phase` is called
+    with ("planning", plan), ("execution", execution_results) and
+    ("verification", final_result) as each phase finishes.
+    """
+    on_phase = on_phase or (lambda phase, output: None)
+    span_attributes = {"task_id": run_id} if run_id is not None else {}
+    with tracer.start_span("task", task=task, source=source, **span_attributes) as span, \
+            record_run(task, source, run_id) as run:
+        speculative = start_speculation(planner, executor, task, session)
+        plan = planner.create_plan(task, session=session)
+        on_phase("planning", plan)
+        execution_results = executor.execute_plan(plan["steps"], speculative, session=session)
+        on_phase("execution", execution_results)
+        final_result = verifier.verify_and_format(task, execution_results, mode=verifier_mode, session=session)
+        on_phase("verification", final_result)
+        span.set_attribute("task.status", final_result["status"])
+        run.finish(plan, final_result)
+
+    if session is not None:
+        session.add_turn(task, plan, execution_results, final_result,
+                         [executor.step_key(step) for step in plan["steps"]])
+
+    return {
+        "task": task,
+        "plan": plan,
+        "execution_results": execution_results,
+        "final_result": final_result
+    }
+
+
+def _freshness(executor, step: Dict[str, Any], max_age: Optional[float]) -> float:
+    """Seconds the step's result stays fresh: `max_age`, else its tool's freshness window"""
+    if max_age is not None:
+        return max_age
+    spec = executor.registry.get_spec(step.get("tool"))
+    if spec is None or spec.freshness_s is None:
+        return Config.REFRESH_MAX_AGE
+    return spec.freshness_s
+
+
+def _material(executor, step: Dict[str, Any], result: Dict[str, Any]):
+    """The part of a step result that matters when diffing: its outcome, minus the tool's volatile fields"""
+    if not result["success"]:
+        return False, None
+    data = result["result"]
+    spec = executor.registry.get_spec(step.get("tool"))
+    if spec is not None and spec.volatile_fields and isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key not in spec.volatile_fields}
+    return True, data
+
+
+def refresh_task(executor, verifier, task: str, plan: Dict[str, Any], execution_results: List[Dict[str, Any]],
+                 final_result: Dict[str, Any], max_age: float = None, verifier_mode: str = None,
+                 source: str = "refresh", run_id: str = None) -> Dict[str, Any]:
+    """Bring a stored task run up to date without planning it again
+
+    Only steps whose results are older than their freshness window (or
+    `max_age` seconds, if given) are executed again. The verifier runs only
+    when one of their results changed; otherwise the stored final result is
+    kept. The returned "refresh" entry lists the re-executed and changed steps.
+    """
+    now = time.time()
+    steps = plan.get("steps", [])
+    if len(execution_results) != len(steps):
+        # Results that cannot be matched to their steps are all refreshed
+        execution_results = [None] * len(steps)
+
+    stale = [
+        index for index, (step, result) in enumerate(zip(steps, execution_results))
+        if result is None or not result["success"] or "fetched_at" not in result
+        or now - result["fetched_at"] > _freshness(executor, step, max_age)
+    ]
+    REFRESH_STEPS.inc(len(steps) - len(stale), result="fresh")
+
+    with tracer.start_span("task.refresh", task=task, source=source) as span, \
+            record_run(task, source, run_id) as run:
+        run.plan_source = "stored"
+        results = list(execution_results)
+        changed = []
+        if stale:
+            new_results = executor.execute_plan([steps[index] for index in stale])
+            for index, new_result in zip(stale, new_results):
+                old_result = results[index]
+                if old_result is None or \
+                        _material(executor, steps[index], old_result) != _material(executor, steps[index], new_result):
+                    changed.append(index)
+                    REFRESH_STEPS.inc(result="changed")
+                else:
+                    REFRESH_STEPS.inc(result="unchanged")
+                results[index] = new_result
+
+        if changed:
+            final_result = verifier.verify_and_format(task, results, mode=verifier_mode)
+            TASK_REFRESHES.inc(result="changed")
+        else:
+            TASK_REFRESHES.inc(result="unchanged")
+        span.set_attribute("refresh.stale_steps", len(stale))
+        span.set_attribute("refresh.changed_steps", len(changed))
+        span.set_attribute("task.status", final_result["status"])
+        run.finish(plan, final_result)
+
+    return {
+        "task": task,
+        "plan": plan,
+        "execution_results": results,
+        "final_result": final_result,
+        "refresh": {
+            "refreshed_at": now,
+            "refreshed_steps": [steps[index].get("step_number") for index in stale],
+            "changed_steps": [steps[index].get("step_number") for index in changed],
+            "verified": bool(changed)
+        }
+    }
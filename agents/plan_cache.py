@@ -0,0 +1,311 @@
+"""
+Semantic plan cache
+
+Validated plans from the planner are stored as templates: every string or
+number parameter that was copied out of the task ("Tokyo", "python", 10) becomes a slot,
+remembered together with the words around it in the task. Tasks are embedded
+with hashed word and character n-grams into a fixed-size vector, and the
+templates' vectors live in one preallocated NumPy matrix, so a lookup is a
+single matrix-vector product.
+
+A lookup takes the nearest templates, extracts fresh slot values from the new
+task using the remembered neighbouring words, masks those values out of the
+task and compares it again against the (equally masked) template. Only when
+that similarity clears the threshold is the plan reused; otherwise the
+planner calls the LLM as usual. Tasks that differ from the template in a
+qualifier ("not", "vs", "tomorrow"), repeat an anchor word ("weather in
+Paris vs weather in London") or mention a different number of numbers never
+reuse it, since their plan would need other steps or parameters. The index has a fixed capacity and evicts the
+least recently used template when full.
+"""
+import copy
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from observability.metrics import PLAN_CACHE_LOOKUPS
+
+SLOT_TOKEN = "<slot>"
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:[.'-][a-z0-9+#]+)*")
+
+# Words that end a slot value when it is read out of a new task
+_STOP_WORDS = {"a", "an", "and", "are", "at", "for", "from", "in", "is", "me", "now", "of", "on", "or",
+               "please", "right", "show", "the", "to", "today", "what", "with"}
+
+# Joiners, negations and time qualifiers: a task only reuses a template with exactly the same ones
+_QUALIFIERS = {"and", "between", "both", "but", "compare", "except", "no", "not", "or", "than",
+               "tomorrow", "tonight", "versus", "vs", "without", "yesterday"}
+
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """Return (lowercased token, original text) pairs"""
+    return [(match.group(0), text[match.start():match.end()]) for match in _TOKEN_RE.finditer(text.lower())]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _shape(words: List[str], anchors) -> Tuple[frozenset, Tuple[int, ...], int]:
+    """What a task must share with a template to reuse it: qualifiers, anchor counts and number count"""
+    return (frozenset(words) & _QUALIFIERS,
+            tuple(words.count(anchor) for anchor in anchors),
+            sum(1 for word in words if _NUMBER_RE.fullmatch(word)))
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Signed feature hashing of word uni/bigrams and character trigrams, L2-normalized"""
+    words = text.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    padded = f" {text} "
+    features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _match_case(value: str, like: str) -> str:
+    if like.isupper():
+        return value.upper()
+    if like.istitle():
+        return value.title()
+    if like.islower():
+        return value.lower()
+    return value
+
+
+class _Template:
+    __slots__ = ("steps", "slots", "bindings", "anchors", "shape")
+
+    def __init__(self, steps, slots, bindings, anchors, shape):
+        # steps: plan steps with slotted values left as recorded
+        # slots: [(left word, right word, token count, recorded value)] in task order
+        # bindings: [(step index, parameter, slot index)]
+        # anchors, shape: the slots' neighbouring words and the task's _shape() over them
+        self.steps = steps
+        self.slots = slots
+        self.bindings = bindings
+        self.anchors = anchors
+        self.shape = shape
+
+
+class PlanCache:
+    def __init__(self, capacity: int = 512, threshold: float = 0.85, dim: int = 1024, candidates: int = 4):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.dim = dim
+        self.candidates = candidates
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._templates: List[Optional[_Template]] = [None] * capacity
+        self._size = 0
+        self._clock = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    # -- building templates -------------------------------------------------
+
+    @staticmethod
+    def _find_slots(tokens: List[str], steps: List[Dict[str, Any]]):
+        """Locate string and number parameter values in the task tokens"""
+        slots, bindings, spans = [], [], {}
+        for step_index, step in enumerate(steps):
+            for param, value in (step.get("parameters") or {}).items():
+                if _is_number(value):
+                    value_tokens = [token for token, _ in _tokenize(str(value))]
+                elif isinstance(value, str):
+                    value_tokens = [token for token, _ in _tokenize(value)]
+                else:
+                    continue
+                if not value_tokens:
+                    continue
+                key = tuple(value_tokens)
+                if key not in spans:
+                    n = len(value_tokens)
+                    start = next((i for i in range(len(tokens) - n + 1) if tokens[i:i + n] == value_tokens), None)
+                    if start is None:
+                        continue
+                    spans[key] = (start, n, value)
+                bindings.append((step_index, param, key))
+
+        ordered = sorted(spans.items(), key=lambda item: item[1][0])
+        index_of = {}
+        for key, (start, n, value) in ordered:
+            left = tokens[start - 1] if start > 0 else None
+            right = tokens[start + n] if start + n < len(tokens) else None
+            if left is None and right is None:
+                return None  # the whole task is the value; nothing to anchor on
+            index_of[key] = len(slots)
+            slots.append((start, n, left, right, value))
+        return slots, [(step_index, param, index_of[key]) for step_index, param, key in bindings]
+
+    @staticmethod
+    def _masked(tokens: List[str], spans: List[Tuple[int, int]]) -> str:
+        masked = list(tokens)
+        for start, n in sorted(spans, reverse=True):
+            masked[start:start + n] = [SLOT_TOKEN]
+        return " ".join(masked)
+
+    def store(self, task: str, plan: Dict[str, Any]):
+        """Add a validated plan as a template for similar tasks"""
+        steps = plan.get("steps") or []
+        if not steps:
+            return
+        tokens = [token for token, _ in _tokenize(task)]
+        found = self._find_slots(tokens, steps)
+        if found is None:
+            return
+        slots, bindings = found
+        vector = embed(self._masked(tokens, [(start, n) for start, n, *_ in slots]), self.dim)
+        # A neighbouring slot's value is no anchor: it changes from task to task
+        slot_words = {word for start, n, *_ in slots for word in tokens[start:start + n]}
+        anchors = tuple(sorted({word for _, _, left, right, _ in slots for word in (left, right)
+                                if word and word not in slot_words}))
+        template = _Template(
+            copy.deepcopy(steps),
+            [(left, right, n, value) for _, n, left, right, value in slots],
+            bindings,
+            anchors,
+            _shape(tokens, anchors)
+        )
+
+        with self._lock:
+            self._clock += 1
+            if self._size:
+                scores = self._vectors[:self._size] @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= 0.99:
+                    # Same task shape already cached: keep the newest plan
+                    self._templates[best] = template
+                    self._last_used[best] = self._clock
+                    return
+            if self._size < self.capacity:
+                row = self._size
+                self._size += 1
+            else:
+                row = int(np.argmin(self._last_used))
+            self._vectors[row] = vector
+            self._templates[row] = template
+            self._last_used[row] = self._clock
+
+    # -- lookups ------------------------------------------------------------
+
+    @staticmethod
+    def _extract(tokens: List[Tuple[str, str]], template: _Template):
+        """Read this task's slot values using the words recorded around each slot
+
+        Returns None when the task does not have the template's shape (see _shape).
+        """
+        words = [token for token, _ in tokens]
+        if _shape(words, template.anchors) != template.shape:
+            return None
+        values, spans, position = [], [], 0
+        for left, right, n, recorded in template.slots:
+            # A value may be a little longer than the recorded one ("New York"
+            # for "Tokyo") but always ends at the next anchor or stop word;
+            # a number is always a single token
+            longest = 1 if _is_number(recorded) else max(n, 3)
+            start = None
+            if left is not None:
+                start = next((i + 1 for i in range(position, len(words) - 1) if words[i] == left), None)
+                if start is not None:
+                    end = start
+                    while (end < len(words) and end - start < longest and words[end] != right
+                           and (end == start or words[end] not in _STOP_WORDS)):
+                        end += 1
+            if start is None and right is not None:
+                right_at = next((i for i in range(max(position, 1), len(words)) if words[i] == right), None)
+                if right_at is not None:
+                    end = right_at
+                    start = end
+                    while start > position and end - start < longest and words[start - 1] not in _STOP_WORDS:
+                        start -= 1
+            if start is None or start >= end or words[start] in _STOP_WORDS:
+                return None
+            if any(word in _QUALIFIERS for word in words[start:end]):
+                return None
+            if _is_number(recorded):
+                if not _NUMBER_RE.fullmatch(words[start]):
+                    return None
+                values.append(type(recorded)(float(words[start])))
+            else:
+                values.append(_match_case(" ".join(raw for _, raw in tokens[start:end]), recorded))
+            spans.append((start, end - start))
+            position = end
+        return values, spans
+
+    def lookup(self, task: str) -> Optional[Dict[str, Any]]:
+        """Return a plan for `task` built from a similar cached plan, or None"""
+        tokens = _tokenize(task)
+        words = [token for token, _ in tokens]
+        query = embed(" ".join(words), self.dim)
+
+        with self._lock:
+            size = self._size
+            if size:
+                scores = self._vectors[:size] @ query
+                k = min(self.candidates, size)
+                rows = np.argpartition(-scores, k - 1)[:k]
+                candidates = [(int(row), self._vectors[row].copy(), self._templates[row])
+                              for row in rows[np.argsort(-scores[rows])]]
+            else:
+                candidates = []
+
+        for row, vector, template in candidates:
+            extracted = self._extract(tokens, template)
+            if extracted is None:
+                continue
+            values, spans = extracted
+            similarity = float(vector @ embed(self._masked(words, spans), self.dim))
+            if similarity < self.threshold:
+                continue
+
+            steps = copy.deepcopy(template.steps)
+            for step_index, param, slot_index in template.bindings:
+                recorded = template.slots[slot_index][3]
+                step = steps[step_index]
+                step["parameters"][param] = values[slot_index]
+                if isinstance(step.get("description"), str):
+                    step["description"] = re.sub(rf"\b{re.escape(str(recorded))}\b",
+                                                 str(values[slot_index]), step["description"])
+
+            with self._lock:
+                self._clock += 1
+                if self._templates[row] is template:
+                    self._last_used[row] = self._clock
+                self._hits += 1
+            PLAN_CACHE_LOOKUPS.inc(result="hit")
+            return {"task": task, "steps": steps}
+
+        with self._lock:
+            self._misses += 1
+        PLAN_CACHE_LOOKUPS.inc(result="miss")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": self._size,
+                "capacity": self.capacity,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._last_used[:] = 0
+            self._templates = [None] * self.capacity
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import sys
 import os
 
@@ -6,83 +6,143 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from llm.client import LLMClient
+from tools.registry import registry
 from config import Config
+from observability.metrics import PLANNER_LLM_LATENCY, PLANNER_FALLBACKS
+from observability import events
+from observability.tracing import tracer
 
 
 class PlannerAgent:
-    def __init__(self):
+    def __init__(self, tool_registry=None):
         self.llm_client = LLMClient()
-        self.available_tools = [
+        self.tool_registry = tool_registry or registry
+        self.plan_cache = None
+        self._prefix = None
+        if Config.PLAN_CACHE_ENABLED:
+            from agents.plan_cache import PlanCache
+            self.plan_cache = PlanCache(Config.PLAN_CACHE_SIZE, Config.PLAN_CACHE_THRESHOLD)
+
+    @property
+    def available_tools(self) -> List[Dict[str, Any]]:
+        """Tools the planner can choose from, as described by the registry"""
+        return [
             {
-                "name": "github_search",
-                "description": "Search GitHub repositories and fetch repository details",
+                "name": spec.name,
+                "description": spec.description,
                 "parameters": {
-                    "query": "Search query for repositories (e.g., 'python', 'machine learning')",
-                    "per_page": "Number of results to return (default: 5)"
-                }
-            },
-            {
-                "name": "weather",
-                "description": "Fetch current weather information for a city",
-                "parameters": {
-                    "city": "City name for weather information (e.g., 'London', 'Tokyo')"
+                    param: schema.get("description", "")
+                    for param, schema in spec.parameters.get("properties", {}).items()
                 }
             }
+            for spec in self.tool_registry.specs()
         ]
 
-    def create_plan(self, user_task: str) -> Dict[str, Any]:
-        """Convert user task into a step-by-step execution plan"""
-        prompt = f"""
-        TASK: Convert this user request into an execution plan.
-
-        USER REQUEST: {user_task}
-
-        AVAILABLE TOOLS:
-        1. github_search - Search GitHub repositories
-           Parameters: query (required), per_page (optional, default: 5)
-        2. weather - Get current weather by city
-           Parameters: city (required)
-
-        INSTRUCTIONS:
-        1. Break down the user request into logical steps
-        2. For each step, choose the right tool and parameters
-        3. Extract parameters from the user request
-        4. Create a JSON object with this exact structure:
+    def create_plan(self, user_task: str, on_event=None, session=None) -> Dict[str, Any]:
+        """Convert user task into a step-by-step execution plan
 
+        With a `session` the task is a follow-up: the planner sees the
+        session's earlier requests and plans, and plans only the steps the
+        follow-up adds. `on_event` receives the planning phase events and the
+        streamed LLM tokens (see observability.events); the phase_end event
+        says where the plan came from (plan_source: cache, llm or rules).
+        """
+        with events.listen(on_event), events.phase("planner", "planning", task=user_task) as result:
+            plan, result["plan_source"] = self._plan(user_task, session)
+            result["steps"] = len(plan["steps"])
+            return plan
+
+    def _plan(self, user_task: str, session=None) -> Tuple[Dict[str, Any], str]:
+        """The plan and its source"""
+        history = session.planner_messages() if session is not None else []
+        # A follow-up the rules can read on its own ("now find rust repositories") can use the
+        # plan cache; one that only makes sense after the earlier turns ("and in Paris?") cannot
+        context_free = not history or bool(self.predict_steps(user_task))
+        if self.plan_cache is not None and context_free:
+            with tracer.start_span("planner.plan_cache") as span:
+                plan = self.plan_cache.lookup(user_task)
+                span.set_attribute("cache.hit", plan is not None)
+            if plan is not None:
+                events.emit(events.CACHE_HIT, "planner", cache="plan")
+                return plan, "cache"
+
+        # The static prefix comes first and is identical on every call, then the
+        # session's earlier turns, which only grow; so the provider can reuse its
+        # cached prompt and only the request is new
+        messages = [*self._prompt_prefix(), *history, {"role": "user", "content": f"USER REQUEST: {user_task}"}]
+
+        with tracer.start_span("planner.create_plan") as span:
+            try:
+                # Tasks the rules can already read are easy enough for the small model
+                tier = self.llm_client.route(messages, steps=len(self.predict_steps(user_task)) or None)
+                span.set_attribute("llm.tier", tier)
+                with PLANNER_LLM_LATENCY.time():
+                    plan = self.llm_client.generate_json(messages, temperature=Config.PLANNER_TEMPERATURE,
+                                                         tier=tier, validate=self._validate_plan,
+                                                         schema=self.tool_registry.plan_schema(),
+                                                         repair_context=f"Plan for the user request: {user_task}")
+                span.set_attribute("planner.fallback", False)
+                # Plans made with earlier turns in view may depend on them, so they are not cached
+                if self.plan_cache is not None and not history and self._uses_known_tools(plan):
+                    self.plan_cache.store(user_task, plan)
+                source = "llm"
+            except Exception as e:
+                print(f"⚠️  Planner failed: {e}")
+                plan = self._create_fallback_plan(user_task)
+                span.set_attribute("planner.fallback", True)
+                source = "rules"
+            span.set_attribute("planner.steps", len(plan["steps"]))
+            return plan, source
+
+    def _prompt_prefix(self) -> tuple:
+        """System message with the tool catalog and planning rules, built once per catalog
+
+        The returned messages are shared by every call and must never be modified.
+        """
+        catalog = self.tool_registry.planner_catalog()
+        prefix = self._prefix
+        if prefix is None or prefix[0] is not catalog:
+            content = f"""You are a planning assistant that converts user requests into execution plans. Always respond with valid JSON only.
+
+AVAILABLE TOOLS:
+{catalog}
+
+INSTRUCTIONS:
+1. Break down the user request into logical steps
+2. For each step, choose the right tool and parameters
+3. Extract parameters from the user request
+4. Create a JSON object with this exact structure:
+
+{{
+    "task": "Original user task",
+    "steps": [
         {{
-            "task": "Original user task",
-            "steps": [
-                {{
-                    "step_number": 1,
-                    "description": "What to do in this step",
-                    "tool": "tool_name",
-                    "parameters": {{"param1": "value1"}}
-                }}
-            ]
+            "step_number": 1,
+            "description": "What to do in this step",
+            "tool": "tool_name",
+            "parameters": {{"param1": "value1"}}
         }}
-
-        RULES:
-        - Return ONLY the JSON object, no other text
-        - Make sure the JSON is valid
-        - Use the exact tool names from AVAILABLE TOOLS
-        - Include all necessary parameters for each tool
+    ]
+}}
+
+RULES:
+- Return ONLY the JSON object, no other text
+- Make sure the JSON is valid
+- Use the exact tool names from AVAILABLE TOOLS
+- Include all necessary parameters for each tool
+- Earlier requests of the conversation have already been executed and their results are still available:
+  plan only the steps a follow-up request adds, and return an empty steps list if the earlier results
+  already answer it"""
+            prefix = (catalog, ({"role": "system", "content": content},))
+            self._prefix = prefix
+        return prefix[1]
+
+    def predict_steps(self, user_task: str) -> List[Dict[str, Any]]:
+        """Steps the rule-based patterns can read directly from the task
+
+        Used for the fallback plan and to start likely tool calls before the
+        LLM plan arrives.
         """
-
-        messages = [
-            {"role": "system",
-             "content": "You are a planning assistant that creates execution plans. Always respond with valid JSON only."},
-            {"role": "user", "content": prompt}
-        ]
-
-        try:
-            plan = self.llm_client.generate_json(messages, temperature=Config.PLANNER_TEMPERATURE)
-            return self._validate_plan(plan)
-        except Exception as e:
-            print(f"⚠️  Planner failed: {e}")
-            return self._create_fallback_plan(user_task)
-
-    def _create_fallback_plan(self, user_task: str) -> Dict[str, Any]:
-        """Create a simple fallback plan if LLM fails"""
         import re
 
         steps = []
@@ -130,6 +190,14 @@ class PlannerAgent:
                 step_num += 1
                 break
 
+        return steps
+
+    def _create_fallback_plan(self, user_task: str) -> Dict[str, Any]:
+        """Create a simple fallback plan if LLM fails"""
+        PLANNER_FALLBACKS.inc()
+
+        steps = self.predict_steps(user_task)
+
         # Default if no patterns matched
         if not steps:
             if 'weather' in user_task.lower():
@@ -152,15 +220,18 @@ class PlannerAgent:
             "steps": steps
         }
 
-    def _validate_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate the plan structure"""
-        required_keys = ["task", "steps"]
-        if not all(key in plan for key in required_keys):
-            raise ValueError("Plan missing required fields")
-
-        if not isinstance(plan["steps"], list):
-            raise ValueError("Steps must be a list")
+    def _uses_known_tools(self, plan: Dict[str, Any]) -> bool:
+        """True if every step names a registered tool and passes its required parameters"""
+        for step in plan["steps"]:
+            spec = self.tool_registry.get_spec(step.get("tool"))
+            if spec is None or not isinstance(step.get("parameters"), dict):
+                return False
+            if any(param not in step["parameters"] for param in spec.required_parameters):
+                return False
+        return True
 
+    def _validate_plan(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean up a plan that matched the registry's plan schema"""
         # Clean up parameters - remove 'operation' if it exists
         for step in plan["steps"]:
             if "parameters" in step and "operation" in step["parameters"]:
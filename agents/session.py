@@ -0,0 +1,99 @@
+"""
+Conversation sessions
+
+A Session carries the earlier turns of one conversation (the interactive loop
+in main.py, a Streamlit browser session) so a follow-up request like "now
+also show me Rust repos" or "and what about Paris?" builds on them instead of
+starting over:
+
+- the planner gets the earlier requests and plans as prior chat turns and
+  plans only the steps the follow-up adds;
+- the executor reuses tool results of earlier turns that are younger than
+  SESSION_RESULT_TTL instead of calling the tool again;
+- the verifier gets the earlier answers, so it builds on them rather than
+  being sent the results behind them again.
+
+Sessions live in memory and keep the last SESSION_MAX_TURNS turns.
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+# Characters of an earlier answer's data passed to the verifier
+ANSWER_DATA_CHARS = 2000
+
+
+class Session:
+    def __init__(self, max_turns: int = None, result_ttl: float = None):
+        self.result_ttl = Config.SESSION_RESULT_TTL if result_ttl is None else result_ttl
+        self._turns = deque(maxlen=max_turns or Config.SESSION_MAX_TURNS)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def add_turn(self, task: str, plan: Dict[str, Any], execution_results: List[Dict[str, Any]],
+                 final_result: Dict[str, Any], step_keys: List[Optional[str]]):
+        """Remember a finished turn; `step_keys` identify the plan's steps (ExecutorAgent.step_key)"""
+        formatted_result = final_result.get("formatted_result") or {}
+        turn = {
+            "task": task,
+            # Built once, so every later planner call sends the identical prefix
+            "messages": (
+                {"role": "user", "content": f"USER REQUEST: {task}"},
+                {"role": "assistant", "content": json.dumps({"task": task, "steps": plan.get("steps", [])},
+                                                            ensure_ascii=False, default=str)}
+            ),
+            "answer": {
+                "task": task,
+                "status": final_result.get("status"),
+                "summary": formatted_result.get("summary"),
+                "data": json.dumps(formatted_result.get("data"), ensure_ascii=False, default=str)[:ANSWER_DATA_CHARS]
+            },
+            "final_result": final_result,
+            # New successful results only: a reused result keeps the age of the turn that fetched it
+            "results": {
+                key: result for key, result in zip(step_keys, execution_results)
+                if key is not None and result["success"] and "reused_from" not in result
+            },
+            "finished_at": time.time()
+        }
+        with self._lock:
+            self._turns.append(turn)
+
+    def planner_messages(self) -> List[Dict[str, str]]:
+        """Earlier requests and their plans as user/assistant chat messages (shared, never modify them)"""
+        with self._lock:
+            return [message for turn in self._turns for message in turn["messages"]]
+
+    def earlier_answers(self) -> List[Dict[str, Any]]:
+        """Task, status, summary and (truncated) data of each earlier answer, oldest first"""
+        with self._lock:
+            return [turn["answer"] for turn in self._turns]
+
+    def last_result(self) -> Optional[Dict[str, Any]]:
+        """Final result of the latest turn"""
+        with self._lock:
+            return self._turns[-1]["final_result"] if self._turns else None
+
+    def reusable_result(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """The newest result of an earlier step with this key that is still fresh, marked with its turn's task"""
+        if key is None:
+            return None
+        horizon = time.time() - self.result_ttl
+        with self._lock:
+            for turn in reversed(self._turns):
+                if turn["finished_at"] < horizon:
+                    break
+                result = turn["results"].get(key)
+                if result is not None and result.get("fetched_at", turn["finished_at"]) >= horizon:
+                    return dict(result, reused_from=turn["task"])
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
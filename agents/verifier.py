@@ -1,16 +1,139 @@
+import contextvars
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
+from agents.formatters import find_formatter, format_results
 from llm.client import LLMClient
 from config import Config
+from observability.metrics import VERIFIER_LLM_LATENCY, VERIFIER_PATHS, CACHE_HITS
+from observability import events
+from observability.tracing import tracer
+from storage.cache import create_cache
+
+# auto: templates for known, fully successful results, LLM otherwise
+# template: never call the LLM; llm: always call the LLM
+# mapreduce: summarize each step (or chunk) concurrently, then merge
+VERIFIER_MODES = ("auto", "template", "llm", "mapreduce")
+
+# Characters of a step's raw result the reduce call gets when its map summary failed
+MAP_FALLBACK_CHARS = 1000
+
+# Shapes the LLM must return: the formatted result and a map step's summary
+FORMATTED_RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string", "minLength": 1},
+        "data": {"type": "object"},
+        "details": {"type": "array"},
+        "status": {"type": "string"},
+        "notes": {"type": ["string", "null"]}
+    },
+    "required": ["summary", "data", "details"]
+}
+STEP_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string", "minLength": 1},
+        "key_results": {"type": "object"},
+        "details": {"type": "array"}
+    },
+    "required": ["summary"]
+}
+
+# System messages shared by every call, so providers can cache the prompt
+# prefix; the per-task content always follows in the user message. Never
+# modify these.
+_VERIFY_PREFIX = {"role": "system", "content": """You are a Verification Agent that formats execution results. Format the execution results you are given into a clear, structured answer for the original user task.
+
+Format the final answer as a JSON with this structure:
+{
+    "summary": "Brief summary of what was accomplished",
+    "data": { "key_results": "from the execution" },
+    "details": ["Detailed", "information", "in", "list", "format"],
+    "status": "success/partial",
+    "notes": "Any important notes or limitations"
+}
+
+Rules:
+1. Include all relevant information from the results
+2. Structure the data logically
+3. Handle partial failures gracefully
+4. Be concise but complete
+5. Return ONLY valid JSON, no other text
+6. When earlier answers of the conversation are given, the task is a follow-up: answer it from the earlier answers and the new results together"""}
+
+_REDUCE_PREFIX = {"role": "system", "content": """You are a Verification Agent that formats execution results. Merge the per-step summaries you are given into one clear, structured answer for the original user task.
+
+Format the final answer as a JSON with this structure:
+{
+    "summary": "Brief summary of what was accomplished",
+    "data": { "key_results": "from the summaries" },
+    "details": ["Detailed", "information", "in", "list", "format"],
+    "status": "success/partial",
+    "notes": "Any important notes or limitations"
+}
+
+When earlier answers of the conversation are given, the task is a follow-up: answer it from the earlier answers and the new summaries together.
+Return ONLY valid JSON, no other text."""}
+
+_MAP_PREFIX = {"role": "system", "content": """You summarize tool results concisely for a task.
+
+Respond with JSON: {"summary": "one or two sentences", "key_results": {}, "details": ["short facts"]}
+Keep only information relevant to the task. Return ONLY valid JSON."""}
 
 
 class VerifierAgent:
+    # Worker threads for map-reduce summaries, shared by all verifiers
+    _map_pool = None
+    _map_lock = threading.Lock()
+
     def __init__(self):
         self.llm_client = LLMClient()
+        # Step summaries keyed by task and result, so unchanged steps are not re-summarized
+        self.summary_cache = create_cache("verifier_summaries")
 
     def verify_and_format(self,
                           original_task: str,
-                          execution_results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Verify results and format final output"""
+                          execution_results: List[Dict[str, Any]],
+                          mode: str = None,
+                          on_event=None,
+                          session=None) -> Dict[str, Any]:
+        """Verify results and format final output
+
+        `mode` (auto, template, llm or mapreduce; default Config.VERIFIER_MODE)
+        chooses between the deterministic formatters and the LLM. Large result
+        sets going to the LLM are verified map-reduce style. With a `session`
+        the LLM gets the earlier answers of the conversation, and results
+        reused from earlier turns are referred to instead of sent again.
+        `on_event` receives the verification phase events and the streamed
+        LLM tokens (see observability.events).
+        """
+        with events.listen(on_event), events.phase("verifier", "verification", steps=len(execution_results)) as summary:
+            final_result = self._verify(original_task, execution_results, mode, session)
+            summary["status"] = final_result["status"]
+            summary["formatted_by"] = final_result.get("formatted_by")
+            return final_result
+
+    def _verify(self, original_task: str, execution_results: List[Dict[str, Any]], mode: str = None,
+                session=None) -> Dict[str, Any]:
+        mode = mode or Config.VERIFIER_MODE
+        if mode not in VERIFIER_MODES:
+            raise ValueError(f"Unknown verifier mode: {mode}")
+        earlier = session.earlier_answers() if session is not None else []
+
+        if not execution_results and earlier and mode == "template":
+            # A follow-up the earlier results already answer: without the LLM, repeat the latest answer
+            last_result = session.last_result()
+            VERIFIER_PATHS.inc(path="session")
+            return {
+                "status": last_result.get("status", "failed"),
+                "task": original_task,
+                "failed_steps": [],
+                "formatted_result": last_result.get("formatted_result"),
+                "formatted_by": "session"
+            }
 
         # Check for failures
         failed_steps = [r for r in execution_results if not r["success"]]
@@ -25,54 +148,186 @@ class VerifierAgent:
                 "formatted_result": None
             }
 
-        # Format the final answer
-        prompt = f"""
-        You are a Verification Agent. Format the following execution results into a clear, 
-        structured answer for the original user task.
-
-        Original Task: {original_task}
-
-        Execution Results:
-        {self._format_results(execution_results)}
-
-        Format the final answer as a JSON with this structure:
-        {{
-            "summary": "Brief summary of what was accomplished",
-            "data": {{ "key_results": "from the execution" }},
-            "details": ["Detailed", "information", "in", "list", "format"],
-            "status": "success/partial",
-            "notes": "Any important notes or limitations"
-        }}
-
-        Rules:
-        1. Include all relevant information from the results
-        2. Structure the data logically
-        3. Handle partial failures gracefully
-        4. Be concise but complete
-        5. Return ONLY valid JSON, no other text
-        """
+        # Determine final status
+        status = "partial" if failed_steps else "success"
+
+        if mode == "template" or (mode == "auto" and self._can_use_templates(execution_results)):
+            with tracer.start_span("verifier.verify_and_format", steps=len(execution_results), path="template"):
+                formatted_result = format_results(execution_results)
+            VERIFIER_PATHS.inc(path="template")
+            return {
+                "status": status,
+                "task": original_task,
+                "failed_steps": failed_steps,
+                "formatted_result": formatted_result,
+                "formatted_by": "template"
+            }
 
+        formatted_results = self._format_results(execution_results, earlier)
+        if mode == "mapreduce" or (len(execution_results) > Config.VERIFIER_MAP_REDUCE_STEPS
+                                   or len(formatted_results) > Config.VERIFIER_MAP_REDUCE_CHARS):
+            with tracer.start_span("verifier.verify_and_format", steps=len(execution_results), path="mapreduce"), \
+                    VERIFIER_LLM_LATENCY.time():
+                formatted_result = self._map_reduce(original_task, execution_results, earlier)
+            VERIFIER_PATHS.inc(path="mapreduce")
+            return {
+                "status": status,
+                "task": original_task,
+                "failed_steps": failed_steps,
+                "formatted_result": formatted_result,
+                "formatted_by": "mapreduce"
+            }
+
+        # Format the final answer: static instructions first, then this task's results
         messages = [
-            {"role": "system", "content": "You are a helpful verification assistant that formats execution results."},
-            {"role": "user", "content": prompt}
+            _VERIFY_PREFIX,
+            {"role": "user", "content": f"Original Task: {original_task}\n\n{self._earlier_section(earlier)}"
+                                        f"Execution Results:\n{formatted_results or 'No new results'}"}
         ]
 
-        formatted_result = self.llm_client.generate_json(messages, temperature=Config.VERIFIER_TEMPERATURE)
-
-        # Determine final status
-        status = "partial" if failed_steps else "success"
+        tier = self.llm_client.route(messages, steps=len(execution_results), failures=len(failed_steps))
+        with tracer.start_span("verifier.verify_and_format", steps=len(execution_results), path="llm", tier=tier), \
+                VERIFIER_LLM_LATENCY.time():
+            formatted_result = self.llm_client.generate_json(messages, temperature=Config.VERIFIER_TEMPERATURE,
+                                                             tier=tier, schema=FORMATTED_RESULT_SCHEMA,
+                                                             repair_context=f"Answer to the task: {original_task}")
+        VERIFIER_PATHS.inc(path="llm")
 
         return {
             "status": status,
             "task": original_task,
             "failed_steps": failed_steps if failed_steps else [],
-            "formatted_result": formatted_result
+            "formatted_result": formatted_result,
+            "formatted_by": "llm"
         }
 
-    def _format_results(self, results: List[Dict[str, Any]]) -> str:
-        """Format execution results for the LLM prompt"""
+    def _map_reduce(self, original_task: str, execution_results: List[Dict[str, Any]],
+                    earlier: List[Dict[str, Any]] = ()) -> Dict[str, Any]:
+        """Summarize every step (or chunk of a large step) concurrently, then merge the summaries"""
+        chunks = []
+        covered = []
+        for result in execution_results:
+            if self._covered_by(result, earlier):
+                covered.append(result)
+            elif result["success"]:
+                chunks.extend((result["step"], chunk) for chunk in self._chunk_result(result["result"]))
+
+        with VerifierAgent._map_lock:
+            if VerifierAgent._map_pool is None:
+                VerifierAgent._map_pool = ThreadPoolExecutor(
+                    max_workers=Config.HTTP_POOL_SIZE, thread_name_prefix="verifier-map")
+
+        futures = [
+            VerifierAgent._map_pool.submit(contextvars.copy_context().run, self._summarize_chunk, original_task, step, chunk)
+            for step, chunk in chunks
+        ]
+
+        lines = []
+        for (step, chunk), future in zip(chunks, futures):
+            try:
+                summary = json.dumps(future.result(), ensure_ascii=False)
+            except Exception as e:
+                # One failed summary must not fail the answer: merge the raw (truncated) result instead
+                print(f"⚠️  Summary of step {step} failed, using its raw result: {e}")
+                summary = chunk[:MAP_FALLBACK_CHARS] + ("..." if len(chunk) > MAP_FALLBACK_CHARS else "")
+            lines.append(f"Step {step}: {summary}")
+        for result in covered:
+            lines.append(self._covered_line(result))
+        for result in execution_results:
+            if not result["success"]:
+                lines.append(f"Step {result['step']}: Failed - {result['error']}")
+
+        messages = [
+            _REDUCE_PREFIX,
+            {"role": "user", "content": f"Original Task: {original_task}\n\n{self._earlier_section(earlier)}"
+                                        f"Step Summaries:\n" + ("\n".join(lines) or "No new results")}
+        ]
+        failures = sum(1 for result in execution_results if not result["success"])
+        tier = self.llm_client.route(messages, steps=len(lines), failures=failures)
+        with tracer.start_span("verifier.reduce", summaries=len(lines), tier=tier):
+            return self.llm_client.generate_json(messages, temperature=Config.VERIFIER_TEMPERATURE,
+                                                 tier=tier, schema=FORMATTED_RESULT_SCHEMA,
+                                                 repair_context=f"Answer to the task: {original_task}")
+
+    def _summarize_chunk(self, original_task: str, step: int, chunk: str) -> Dict[str, Any]:
+        """Map step: summarize one step result (or chunk of it), cached by task and content"""
+        cache_key = hashlib.sha256(json.dumps([original_task, chunk]).encode("utf-8")).hexdigest()
+        cached = self.summary_cache.get(cache_key)
+        if cached is not None:
+            CACHE_HITS.inc(cache="verifier_summary")
+            events.emit(events.CACHE_HIT, "verifier", cache="verifier_summary", step=step)
+            return cached
+
+        messages = [
+            _MAP_PREFIX,
+            {"role": "user", "content": f"Task: {original_task}\n\nResult of step {step}:\n{chunk}"}
+        ]
+        tier = self.llm_client.route(messages, steps=1)
+        with tracer.start_span("verifier.map", step=step, chars=len(chunk), tier=tier):
+            summary = self.llm_client.generate_json(messages, temperature=Config.VERIFIER_TEMPERATURE,
+                                                    tier=tier, schema=STEP_SUMMARY_SCHEMA,
+                                                    repair_context=f"Summary of step {step} for the task: {original_task}")
+        self.summary_cache.set(cache_key, summary, ttl=Config.VERIFIER_SUMMARY_TTL)
+        return summary
+
+    @staticmethod
+    def _chunk_result(result: Any) -> List[str]:
+        """Serialize a step result, splitting its largest list across chunks when it is too long"""
+        limit = Config.VERIFIER_CHUNK_CHARS
+        text = json.dumps(result, ensure_ascii=False, default=str)
+        if len(text) <= limit or not isinstance(result, dict):
+            return [text]
+
+        lists = [key for key, value in result.items() if isinstance(value, list) and len(value) > 1]
+        if not lists:
+            return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+        key = max(lists, key=lambda k: len(json.dumps(result[k], default=str)))
+        chunks, items, size = [], [], 0
+        for item in result[key]:
+            item_size = len(json.dumps(item, ensure_ascii=False, default=str))
+            if items and size + item_size > limit:
+                chunks.append(json.dumps(dict(result, **{key: items}), ensure_ascii=False, default=str))
+                items, size = [], 0
+            items.append(item)
+            size += item_size
+        chunks.append(json.dumps(dict(result, **{key: items}), ensure_ascii=False, default=str))
+        return chunks
+
+    @staticmethod
+    def _can_use_templates(execution_results: List[Dict[str, Any]]) -> bool:
+        """True when every step succeeded with a result schema a formatter knows"""
+        return bool(execution_results) and all(
+            result["success"] and find_formatter(result["result"]) is not None
+            for result in execution_results
+        )
+
+    @staticmethod
+    def _covered_by(result: Dict[str, Any], earlier: List[Dict[str, Any]]) -> bool:
+        """True for a result reused from an earlier turn whose answer the LLM is given"""
+        source = result.get("reused_from")
+        return source is not None and any(answer["task"] == source for answer in earlier)
+
+    @staticmethod
+    def _covered_line(result: Dict[str, Any]) -> str:
+        return f"Step {result['step']}: Success - same result as for the earlier request \"{result['reused_from']}\""
+
+    @staticmethod
+    def _earlier_section(earlier: List[Dict[str, Any]]) -> str:
+        """Earlier answers of the conversation for a follow-up prompt ("" without any)"""
+        if not earlier:
+            return ""
+        lines = [f"- Request: {answer['task']}\n  Status: {answer['status']}\n"
+                 f"  Summary: {answer['summary']}\n  Data: {answer['data']}" for answer in earlier]
+        return "Earlier Answers:\n" + "\n".join(lines) + "\n\n"
+
+    def _format_results(self, results: List[Dict[str, Any]], earlier: List[Dict[str, Any]] = ()) -> str:
+        """Format execution results for the LLM prompt, referring to results earlier answers already cover"""
         formatted = []
         for result in results:
+            if self._covered_by(result, earlier):
+                formatted.append(self._covered_line(result))
+                continue
             step_info = f"Step {result['step']}: "
             if result["success"]:
                 step_info += f"Success - {result['result']}"
@@ -0,0 +1,9 @@
+"""
+API package for AI Operations Assistant
+Contains response serialization and HTTP middleware for the FastAPI app
+"""
+
+from .compression import CompressionMiddleware
+from .serialization import ORJSONResponse, build_task_response, VERBOSITY_LEVELS
+
+__all__ = ["CompressionMiddleware", "ORJSONResponse", "build_task_response", "VERBOSITY_LEVELS"]
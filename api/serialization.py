@@ -0,0 +1,60 @@
+"""
+Task response building and payload trimming
+
+Responses are built as plain dicts and encoded with orjson, skipping the
+Pydantic round-trip through Dict[str, Any] fields. Clients can ask for less
+data with `verbosity` or an explicit `fields` list.
+"""
+from typing import Any, Dict, List, Optional
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Top-level fields returned at each verbosity level
+VERBOSITY_LEVELS = {
+    "full": ["task_id", "status", "plan", "execution_results", "final_result", "error", "refresh"],
+    "compact": ["task_id", "status", "plan", "final_result", "error", "refresh"],
+    "minimal": ["task_id", "status", "final_result", "error", "refresh"]
+}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` query parameter"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def build_task_response(task_id: str,
+                        status: str,
+                        plan: Dict[str, Any] = None,
+                        execution_results: List[Dict[str, Any]] = None,
+                        final_result: Dict[str, Any] = None,
+                        error: str = None,
+                        refresh: Dict[str, Any] = None,
+                        verbosity: str = "full",
+                        fields: Optional[str] = None) -> Dict[str, Any]:
+    """Build a TaskResponse-shaped dict containing only the requested fields"""
+    response = {
+        "task_id": task_id,
+        "status": status,
+        "plan": plan,
+        "execution_results": {"steps": execution_results} if execution_results is not None else None,
+        "final_result": final_result,
+        "error": error
+    }
+    if refresh is not None:
+        # Only refresh responses say what was refreshed
+        response["refresh"] = refresh
+
+    selected = parse_fields(fields) or VERBOSITY_LEVELS.get(verbosity, VERBOSITY_LEVELS["full"])
+    # task_id and status are always returned so clients can correlate responses
+    return {key: value for key, value in response.items() if key in selected or key in ("task_id", "status")}
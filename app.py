@@ -7,9 +7,13 @@ import streamlit as st
 import sys
 import os
 import json
-import time
-import re  # ADDED THIS IMPORT
+import itertools
+import threading
+import re
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from html import escape
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -18,6 +22,11 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from agents.planner import PlannerAgent
 from agents.executor import ExecutorAgent
 from agents.verifier import VerifierAgent
+from agents.pipeline import run_task
+from agents.session import Session
+from config import Config
+from observability import events
+from storage.task_history import create_task_history
 
 # Page configuration
 st.set_page_config(
@@ -86,6 +95,12 @@ st.markdown("""
         margin: 3px;
         transition: all 0.3s ease;
     }
+    .github-link::before {
+        content: "";
+        width: 16px;
+        height: 16px;
+        background: url("data:image/svg+xml;utf8,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 16 16' fill='white'><path d='M8 0c4.42 0 8 3.58 8 8a8.013 8.013 0 0 1-5.45 7.59c-.4.08-.55-.17-.55-.38 0-.27.01-1.13.01-2.2 0-.75-.25-1.23-.54-1.48 1.78-.2 3.65-.88 3.65-3.95 0-.88-.31-1.59-.82-2.15.08-.2.36-1.02-.08-2.12 0 0-.67-.22-2.2.82-.64-.18-1.32-.27-2-.27-.68 0-1.36.09-2 .27-1.53-1.03-2.2-.82-2.2-.82-.44 1.1-.16 1.92-.08 2.12-.51.56-.82 1.28-.82 2.15 0 3.06 1.86 3.75 3.64 3.95-.23.2-.44.55-.51 1.07-.46.21-1.61.55-2.33-.66-.15-.24-.6-.83-1.23-.82-.67.01-.27.38.01.53.34.19.73.9.82 1.13.16.45.68 1.31 2.69.94 0 .67.01 1.3.01 1.49 0 .21-.15.45-.55.38A7.995 7.995 0 0 1 0 8c0-4.42 3.58-8 8-8Z'/></svg>") no-repeat center / contain;
+    }
     .github-link:hover {
         background: #2c333a;
         transform: translateY(-2px);
@@ -121,6 +136,57 @@ st.markdown("""
         border-radius: 12px;
         color: #0366d6;
     }
+    .repo-footer {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+    }
+    .repo-url {
+        margin-top: 10px;
+        font-size: 0.8rem;
+        color: #586069;
+    }
+    .result-link {
+        color: #0366d6 !important;
+        text-decoration: none;
+        font-weight: 600;
+    }
+    .summary-box {
+        background: #f0f7ff;
+        padding: 20px;
+        border-radius: 10px;
+        margin: 20px 0;
+        border-left: 5px solid #1E88E5;
+    }
+    .summary-box h4 {
+        color: #1E88E5;
+        margin-top: 0;
+    }
+    .summary-box p {
+        font-size: 1.1rem;
+        line-height: 1.6;
+        color: #333;
+    }
+    .detail-card {
+        background: white;
+        padding: 15px;
+        margin: 10px 0;
+        border-radius: 8px;
+        border-left: 4px solid #4CAF50;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+    }
+    .detail-card::before {
+        content: "•";
+        color: #4CAF50;
+        font-size: 1.2rem;
+        float: left;
+        margin-right: 10px;
+    }
+    .detail-card > div {
+        overflow: hidden;
+        font-size: 1rem;
+        line-height: 1.5;
+    }
     .weather-card {
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         color: white;
@@ -128,81 +194,336 @@ st.markdown("""
         padding: 20px;
         margin: 10px 0;
     }
+    .weather-card h3 {
+        margin: 0;
+        color: white;
+    }
+    .weather-card h2 {
+        margin: 0;
+        font-size: 2.5rem;
+        color: white;
+    }
+    .weather-label {
+        margin: 5px 0;
+        opacity: 0.9;
+    }
+    .weather-value {
+        margin: 0;
+        font-size: 1.2rem;
+    }
+    .weather-stats {
+        display: flex;
+        gap: 20px;
+        margin-top: 15px;
+    }
+    .note-box {
+        background: #fff3cd;
+        padding: 15px;
+        border-radius: 8px;
+        margin: 15px 0;
+        border-left: 4px solid #ffc107;
+    }
+    .note-box h4, .note-box p {
+        color: #856404;
+        margin-top: 0;
+    }
+    .note-box p {
+        margin: 0;
+    }
 </style>
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'tasks_history' not in st.session_state:
-    st.session_state.tasks_history = []
-if 'current_task_id' not in st.session_state:
-    st.session_state.current_task_id = 0
+if 'history_cursors' not in st.session_state:
+    # Keyset pagination of the history tab: the id each visited page starts below (None = newest)
+    st.session_state.history_cursors = [None]
 if 'agents_initialized' not in st.session_state:
     st.session_state.agents_initialized = False
+if 'task_runs' not in st.session_state:
+    st.session_state.task_runs = []
+if 'conversation' not in st.session_state:
+    # Earlier tasks of this browser session, so follow-ups build on them
+    st.session_state.conversation = Session()
+
+
+class TaskRun:
+    """State of one submitted task, updated from agent events on a worker thread"""
+
+    # Share of the progress bar for each phase (start %, end %)
+    PHASES = {"planning": (0, 30), "execution": (30, 70), "verification": (70, 100)}
+    # Streamed LLM output is counted against this many characters per phase
+    EXPECTED_CHARS = 600
+
+    def __init__(self, run_id: str, task: str, verifier_mode: str, session: Session = None):
+        self.id = run_id
+        self.task = task
+        self.verifier_mode = verifier_mode
+        self.session = session
+        self.submitted_at = datetime.now()
+        self.state = "queued"  # queued, running, done or failed
+        self.phase = None
+        self.progress = 0
+        self.status_text = "Waiting for a free worker..."
+        self.streamed = ""
+        self.plan = None
+        self.execution_results = None
+        self.final_result = None
+        self.error = None
+        self.history_id = None
+        # Set once this session has shown the finished run and refreshed the page for it
+        self.seen = False
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "phase": self.phase, "progress": self.progress,
+                    "status_text": self.status_text, "streamed": self.streamed}
+
+    def _set_progress(self, fraction: float):
+        start, end = self.PHASES.get(self.phase, (0, 100))
+        self.progress = int(start + (end - start) * min(max(fraction, 0.0), 1.0))
+
+    def handle_event(self, event):
+        data = event.data
+        with self._lock:
+            if event.type == events.PHASE_START:
+                self.phase = data["phase"]
+                self.streamed = ""
+                self._set_progress(0)
+                self.status_text = {
+                    "planning": "Analyzing task and creating execution plan...",
+                    "execution": f"Executing {data.get('steps', 0)} step(s) and calling APIs...",
+                    "verification": "Verifying results and formatting output..."
+                }.get(self.phase, f"{self.phase.title()}...")
+            elif event.type == events.PHASE_END:
+                self._set_progress(1)
+                if "error" not in data:
+                    self.status_text = f"✓ {self.phase.title()} finished in {data['duration']:.1f}s"
+            elif event.type == events.STEP_START:
+                self._set_progress(data["index"] / max(data["total"], 1))
+                self.status_text = f"Step {data['index'] + 1}/{data['total']}: {data.get('description') or data['tool']}"
+            elif event.type == events.STEP_END:
+                self._set_progress((data["index"] + 1) / max(data["total"], 1))
+            elif event.type == events.RETRY:
+                self.status_text = (f"⚠️ {data['tool']} request failed, retrying "
+                                    f"(attempt {data['attempt']}/{data['max_attempts']})...")
+            elif event.type == events.LLM_TOKEN:
+                self.streamed += data["text"]
+                self._set_progress(0.9 * len(self.streamed) / (len(self.streamed) + self.EXPECTED_CHARS))
+
+
+class TaskRunner:
+    """Runs tasks for every dashboard session on one shared worker pool"""
+
+    def __init__(self, planner, executor, verifier, max_workers: int, history=None):
+        self.planner = planner
+        self.executor = executor
+        self.verifier = verifier
+        self.history = history
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dashboard-task")
+        self._ids = itertools.count(1)
+        # Completion of each conversation's latest submitted run
+        self._last_runs = weakref.WeakKeyDictionary()
+        self._last_runs_lock = threading.Lock()
+
+    def submit(self, task: str, verifier_mode: str, session: Session = None) -> TaskRun:
+        """Queue a task; runs of one conversation start one after another
+
+        A follow-up such as "and what about Paris?" is planned from the
+        session's earlier turns, so it waits until the runs before it have
+        added theirs instead of taking up a worker.
+        """
+        run = TaskRun(f"{os.getpid()}-{next(self._ids)}", task, verifier_mode, session)
+        if session is None:
+            self.pool.submit(self._run, run)
+            return run
+
+        finished = Future()
+        with self._last_runs_lock:
+            previous = self._last_runs.get(session)
+            self._last_runs[session] = finished
+
+        def start(_=None):
+            with run._lock:
+                run.status_text = "Waiting for a free worker..."
+            self.pool.submit(self._run, run).add_done_callback(lambda _: finished.set_result(None))
+
+        if previous is None or previous.done():
+            start()
+        else:
+            run.status_text = "Waiting for the previous task in this conversation..."
+            previous.add_done_callback(start)
+        return run
+
+    def _run(self, run: TaskRun):
+        with run._lock:
+            run.state = "running"
+        try:
+            def keep_output(phase, output):
+                # Kept as each phase finishes, so a failed run still shows what it got done
+                if phase == "planning":
+                    run.plan = output
+                elif phase == "execution":
+                    run.execution_results = output
+
+            with events.listen(run.handle_event):
+                run.final_result = run_task(self.planner, self.executor, self.verifier, run.task,
+                                            source="dashboard", verifier_mode=run.verifier_mode,
+                                            session=run.session, run_id=run.id,
+                                            on_phase=keep_output)["final_result"]
+            state, status_text = "done", "✅ Task completed!"
+        except Exception as e:
+            run.error = f"{run.phase or 'task'} failed: {e}"
+            state, status_text = "failed", f"❌ {run.error}"
+
+        # Saved by the worker, so the run reaches the history even if its browser session is gone
+        self._record(run)
+        with run._lock:
+            run.state, run.status_text = state, status_text
+            if state == "done":
+                run.progress = 100
+
+    def _record(self, run: TaskRun):
+        if self.history is None:
+            return
+        final_result = run.final_result or {"status": "failed", "error": run.error}
+        formatted_result = final_result.get("formatted_result") or {}
+        try:
+            run.history_id = self.history.add(
+                task=run.task,
+                status=final_result.get("status", "failed"),
+                summary=formatted_result.get("summary", run.error or ""),
+                steps=len((run.plan or {}).get("steps", [])),
+                successful_steps=sum(1 for r in run.execution_results or [] if r.get("success", False)),
+                payload=final_result,
+                created_at=run.submitted_at.timestamp()
+            )
+        except Exception as e:
+            print(f"⚠️  Failed to save task history: {e}")
 
 
-# Initialize agents (once)
+@st.cache_resource
+def get_task_history():
+    """Task history shared by all sessions (SQLite in SHARED_DB_PATH)"""
+    return create_task_history()
+
+
+# Initialize agents and the shared worker pool (once per server process)
 @st.cache_resource
 def initialize_agents():
     """Initialize agents with caching"""
     try:
+        Config.validate()
         planner = PlannerAgent()
         executor = ExecutorAgent()
         verifier = VerifierAgent()
         st.session_state.agents_initialized = True
-        return planner, executor, verifier
+        return TaskRunner(planner, executor, verifier, Config.APP_WORKERS, history=get_task_history())
     except Exception as e:
         st.error(f"Failed to initialize agents: {str(e)}")
-        return None, None, None
+        return None
+
+
+# Result cards are built as one HTML block per section with the CSS classes
+# above; the builders are memoized on the result content (st.cache_data hashes
+# it), so reruns showing the same results reuse the HTML
+# Detail links are matched in HTML-escaped text, so a URL ends at an escaped quote
+_GITHUB_DETAIL_LINK_RE = re.compile(r'\((https?://github\.com/(?:(?!&quot;|&#x27;)[^)\s<])+)\)'
+                                    r'|(https?://github\.com/(?:(?!&quot;|&#x27;)[^\s<])+)')
+_GITHUB_URL_RE = re.compile(r'https?://(?:[\w-]+\.)*github\.com/[^\s<)"\']+')
+
+
+def _detail_link(match) -> str:
+    """Link a GitHub URL in a detail line; URLs in parentheses are shown as owner/repo"""
+    if match.group(1):
+        url = match.group(1)
+        return f'(<a class="result-link" href="{url}" target="_blank">{"/".join(url.rstrip("/").split("/")[-2:])}</a>)'
+    url = match.group(2)
+    return f'<a class="result-link" href="{url}" target="_blank">{url}</a>'
+
+
+def _repo_card_html(repo: dict) -> str:
+    stats = [f"<span>⭐ {escape(str(repo.get('stars', 0)))} stars</span>"]
+    if repo.get('forks') is not None:
+        stats.append(f"<span>🍴 {escape(str(repo['forks']))} forks</span>")
+    if repo.get('language'):
+        stats.append(f"<span class='repo-language'>🔤 {escape(str(repo['language']))}</span>")
+    url = escape(str(repo.get('url') or '#'))
+    return (
+        '<div class="repo-card">'
+        f'<div class="repo-name">{escape(str(repo.get("name") or "Unnamed Repository"))}</div>'
+        f'<div class="repo-description">{escape(str(repo.get("description") or "No description available"))}</div>'
+        f'<div class="repo-footer"><div class="repo-stats">{"".join(stats)}</div>'
+        f'<a href="{url}" target="_blank" class="github-link">View on GitHub</a></div>'
+        f'<div class="repo-url"><strong>URL:</strong> {url}</div>'
+        '</div>'
+    )
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_repo_cards(repos: list) -> str:
+    return "".join(_repo_card_html(repo) for repo in repos if isinstance(repo, dict))
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def render_result_sections(formatted_result: dict) -> list:
+    """(markdown heading or None, HTML) for each section of a formatted result"""
+    sections = []
+    if "summary" in formatted_result:
+        sections.append((None, '<div class="summary-box"><h4>Summary</h4>'
+                               f'<p>{escape(str(formatted_result["summary"]))}</p></div>'))
+
+    details = [detail for detail in formatted_result.get("details") or [] if isinstance(detail, str)]
+    if details:
+        sections.append(("#### What I Found:", "".join(
+            f'<div class="detail-card"><div>{_GITHUB_DETAIL_LINK_RE.sub(_detail_link, escape(detail))}</div></div>'
+            for detail in details
+        )))
+
+    data = formatted_result.get("data", {})
+    if isinstance(data, dict):
+        if isinstance(data.get("repositories"), list):
+            sections.append(("#### GitHub Repositories", render_repo_cards(data["repositories"])))
+
+        weather = data.get("weather")
+        if isinstance(weather, dict) and "city" in weather and "temperature_c" in weather:
+            stats = "".join(
+                f'<div><p class="weather-label">{label}</p><p class="weather-value">{escape(str(weather.get(key, "N/A")))}{unit}</p></div>'
+                for label, key, unit in (("Humidity", "humidity", "%"), ("Wind Speed", "wind_kph", " km/h"),
+                                         ("Last Updated", "last_updated", ""))
+            )
+            sections.append(("#### Weather Information", (
+                '<div class="weather-card">'
+                f'<h3>{escape(str(weather.get("city", "Unknown")))}</h3>'
+                f'<p class="weather-label">{escape(str(weather.get("condition", "")))}</p>'
+                f'<h2>{escape(str(weather.get("temperature_c", "N/A")))}°C</h2>'
+                f'<p class="weather-label">{escape(str(weather.get("temperature_f", "N/A")))}°F</p>'
+                f'<div class="weather-stats">{stats}</div>'
+                '</div>'
+            )))
+
+    if formatted_result.get("notes"):
+        sections.append((None, '<div class="note-box"><h4>Note</h4>'
+                               f'<p>{escape(str(formatted_result["notes"]))}</p></div>'))
+    return sections
 
 
 def display_github_repos(data):
     """Display GitHub repositories with clickable links"""
-    if not data:
+    if not isinstance(data, dict):
         return
 
-    # Check if data contains repositories
-    if isinstance(data, dict):
-        if 'repositories' in data:
-            st.markdown("#### 📦 GitHub Repositories")
-            for repo in data['repositories']:
-                with st.container():
-                    st.markdown(f"""
-                    <div class="repo-card">
-                        <div class="repo-name">{repo.get('name', 'Unnamed Repository')}</div>
-                        <div class="repo-description">{repo.get('description', 'No description available')}</div>
-                        <div class="repo-stats">
-                            <span>⭐ {repo.get('stars', 0)} stars</span>
-                            {f"<span class='repo-language'>🔤 {repo.get('language', 'N/A')}</span>" if repo.get('language') else ''}
-                        </div>
-                        <a href="{repo.get('url', '#')}" target="_blank" class="github-link">
-                            <svg height="16" viewBox="0 0 16 16" width="16" style="fill: white;">
-                                <path d="M8 0c4.42 0 8 3.58 8 8a8.013 8.013 0 0 1-5.45 7.59c-.4.08-.55-.17-.55-.38 0-.27.01-1.13.01-2.2 0-.75-.25-1.23-.54-1.48 1.78-.2 3.65-.88 3.65-3.95 0-.88-.31-1.59-.82-2.15.08-.2.36-1.02-.08-2.12 0 0-.67-.22-2.2.82-.64-.18-1.32-.27-2-.27-.68 0-1.36.09-2 .27-1.53-1.03-2.2-.82-2.2-.82-.44 1.1-.16 1.92-.08 2.12-.51.56-.82 1.28-.82 2.15 0 3.06 1.86 3.75 3.64 3.95-.23.2-.44.55-.51 1.07-.46.21-1.61.55-2.33-.66-.15-.24-.6-.83-1.23-.82-.67.01-.27.38.01.53.34.19.73.9.82 1.13.16.45.68 1.31 2.69.94 0 .67.01 1.3.01 1.49 0 .21-.15.45-.55.38A7.995 7.995 0 0 1 0 8c0-4.42 3.58-8 8-8Z"></path>
-                            </svg>
-                            View on GitHub
-                        </a>
-                    </div>
-                    """, unsafe_allow_html=True)
-        elif 'name' in data and 'url' in data:
-            # Single repository
-            st.markdown("#### 📦 Repository")
-            with st.container():
-                st.markdown(f"""
-                <div class="repo-card">
-                    <div class="repo-name">{data.get('name', 'Unnamed Repository')}</div>
-                    <div class="repo-description">{data.get('description', 'No description available')}</div>
-                    <div class="repo-stats">
-                        <span>⭐ {data.get('stars', 0)} stars</span>
-                        <span>🍴 {data.get('forks', 0)} forks</span>
-                        {f"<span class='repo-language'>🔤 {data.get('language', 'N/A')}</span>" if data.get('language') else ''}
-                    </div>
-                    <a href="{data.get('url', '#')}" target="_blank" class="github-link">
-                        <svg height="16" viewBox="0 0 16 16" width="16" style="fill: white;">
-                            <path d="M8 0c4.42 0 8 3.58 8 8a8.013 8.013 0 0 1-5.45 7.59c-.4.08-.55-.17-.55-.38 0-.27.01-1.13.01-2.2 0-.75-.25-1.23-.54-1.48 1.78-.2 3.65-.88 3.65-3.95 0-.88-.31-1.59-.82-2.15.08-.2.36-1.02-.08-2.12 0 0-.67-.22-2.2.82-.64-.18-1.32-.27-2-.27-.68 0-1.36.09-2 .27-1.53-1.03-2.2-.82-2.2-.82-.44 1.1-.16 1.92-.08 2.12-.51.56-.82 1.28-.82 2.15 0 3.06 1.86 3.75 3.64 3.95-.23.2-.44.55-.51 1.07-.46.21-1.61.55-2.33-.66-.15-.24-.6-.83-1.23-.82-.67.01-.27.38.01.53.34.19.73.9.82 1.13.16.45.68 1.31 2.69.94 0 .67.01 1.3.01 1.49 0 .21-.15.45-.55.38A7.995 7.995 0 0 1 0 8c0-4.42 3.58-8 8-8Z"></path>
-                        </svg>
-                        View on GitHub
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
+    if isinstance(data.get('repositories'), list):
+        st.markdown("#### 📦 GitHub Repositories")
+        st.markdown(render_repo_cards(data['repositories']), unsafe_allow_html=True)
+    elif 'name' in data and 'url' in data:
+        # Single repository
+        st.markdown("#### 📦 Repository")
+        st.markdown(render_repo_cards([data]), unsafe_allow_html=True)
 
 
 def display_natural_language_results(formatted_result):
@@ -210,135 +531,10 @@ def display_natural_language_results(formatted_result):
     if not formatted_result:
         return
 
-    # Summary
-    if "summary" in formatted_result:
-        st.markdown(f"""
-        <div style="background: #f0f7ff; padding: 20px; border-radius: 10px; margin: 20px 0; border-left: 5px solid #1E88E5;">
-            <h4 style="color: #1E88E5; margin-top: 0;">Summary</h4>
-            <p style="font-size: 1.1rem; line-height: 1.6; color: #333;">
-                {formatted_result['summary']}
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-
-    # Details with clickable GitHub links
-    if "details" in formatted_result and formatted_result["details"]:
-        st.markdown("#### What I Found:")
-
-        for detail in formatted_result["details"]:
-            if isinstance(detail, str):
-                # Convert GitHub URLs to clickable links
-                html_detail = detail
-
-                # Pattern to find GitHub URLs in parentheses
-                github_pattern = r'\((https?://github\.com/[^)]+)\)'
-
-                # Find all GitHub URLs
-                github_urls = re.findall(github_pattern, detail)
-
-                # Replace each URL with clickable link
-                for url in github_urls:
-                    # Extract repo name from URL
-                    repo_name = url.split('/')[-2] + '/' + url.split('/')[-1]
-
-                    # Create clickable link
-                    clickable_link = f'<a href="{url}" target="_blank" style="color: #0366d6; text-decoration: none; font-weight: 600;">{repo_name}</a>'
-
-                    # Replace the URL with clickable link
-                    html_detail = html_detail.replace(f'({url})', f'({clickable_link})')
-
-                # Also convert any standalone GitHub URLs
-                standalone_pattern = r'(https?://github\.com/[^\s]+)'
-                html_detail = re.sub(
-                    standalone_pattern,
-                    r'<a href="\1" target="_blank" style="color: #0366d6; text-decoration: none; font-weight: 600;">\1</a>',
-                    html_detail
-                )
-
-                # Display the detail with styling
-                st.markdown(f"""
-                <div style="background: white; padding: 15px; margin: 10px 0; border-radius: 8px; border-left: 4px solid #4CAF50; box-shadow: 0 2px 4px rgba(0,0,0,0.05);">
-                    <div style="color: #4CAF50; font-size: 1.2rem; float: left; margin-right: 10px;">•</div>
-                    <div style="overflow: hidden; font-size: 1rem; line-height: 1.5;">
-                        {html_detail}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-    # Display structured data
-    data = formatted_result.get("data", {})
-
-    # GitHub repositories
-    if isinstance(data, dict):
-        if "repositories" in data:
-            st.markdown("#### GitHub Repositories")
-            for repo in data["repositories"]:
-                repo_name = repo.get('name', 'Unnamed Repository')
-                repo_desc = repo.get('description', 'No description')
-                repo_stars = repo.get('stars', 0)
-                repo_language = repo.get('language', '')
-                repo_url = repo.get('url', '#')
-
-                # Display in a nice card
-                st.markdown(f"""
-                <div style="background: white; border: 1px solid #e1e4e8; border-radius: 8px; padding: 15px; margin: 10px 0;">
-                    <div style="font-weight: 600; color: #24292e; margin-bottom: 5px;">{repo_name}</div>
-                    <div style="color: #586069; font-size: 0.9rem; margin-bottom: 10px;">{repo_desc}</div>
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <div style="display: flex; gap: 15px; font-size: 0.85rem; color: #586069;">
-                            <span>Stars: {repo_stars}</span>
-                            {f"<span>Language: {repo_language}</span>" if repo_language else ""}
-                        </div>
-                        <a href="{repo_url}" target="_blank" style="background: #24292e; color: white; padding: 6px 12px; border-radius: 6px; text-decoration: none; font-size: 0.9rem; font-weight: 600;">
-                            Open on GitHub
-                        </a>
-                    </div>
-                    <div style="margin-top: 10px; font-size: 0.8rem; color: #586069;">
-                        <strong>URL:</strong> {repo_url}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-        # Weather data
-        if "weather" in data and isinstance(data["weather"], dict):
-            weather = data["weather"]
-            if "city" in weather and "temperature_c" in weather:
-                st.markdown("#### Weather Information")
-                st.markdown(f"""
-                <div class="weather-card">
-                    <div style="display: flex; justify-content: space-between; align-items: center;">
-                        <div>
-                            <h3 style="margin: 0; color: white;">{weather.get('city', 'Unknown')}</h3>
-                            <p style="margin: 5px 0; opacity: 0.9;">{weather.get('condition', '')}</p>
-                            <h2 style="margin: 0; font-size: 2.5rem;">{weather.get('temperature_c', 'N/A')}°C</h2>
-                            <p style="margin: 5px 0; opacity: 0.9;">{weather.get('temperature_f', 'N/A')}°F</p>
-                        </div>
-                    </div>
-                    <div style="display: flex; gap: 20px; margin-top: 15px;">
-                        <div>
-                            <p style="margin: 5px 0; opacity: 0.9;">Humidity</p>
-                            <p style="margin: 0; font-size: 1.2rem;">{weather.get('humidity', 'N/A')}%</p>
-                        </div>
-                        <div>
-                            <p style="margin: 5px 0; opacity: 0.9;">Wind Speed</p>
-                            <p style="margin: 0; font-size: 1.2rem;">{weather.get('wind_kph', 'N/A')} km/h</p>
-                        </div>
-                        <div>
-                            <p style="margin: 5px 0; opacity: 0.9;">Last Updated</p>
-                            <p style="margin: 0; font-size: 1.2rem;">{weather.get('last_updated', 'N/A')}</p>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-
-    # Notes
-    if "notes" in formatted_result and formatted_result["notes"]:
-        st.markdown(f"""
-        <div style="background: #fff3cd; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #ffc107;">
-            <h4 style="color: #856404; margin-top: 0;">Note</h4>
-            <p style="color: #856404; margin: 0;">{formatted_result['notes']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    for heading, section_html in render_result_sections(formatted_result):
+        if heading:
+            st.markdown(heading)
+        st.markdown(section_html, unsafe_allow_html=True)
 
 
 def extract_and_display_github_links(formatted_result):
@@ -358,22 +554,12 @@ def extract_and_display_github_links(formatted_result):
         display_github_repos(data)
 
     # Check details section for GitHub URLs
-    details = formatted_result.get("details", [])
-    if details:
+    urls = [url for detail in formatted_result.get("details", []) if isinstance(detail, str)
+            for url in _GITHUB_URL_RE.findall(detail)]
+    if urls:
         st.markdown("#### 🔗 Found GitHub Links")
-        for detail in details:
-            if isinstance(detail, str) and 'github.com' in detail.lower():
-                # Try to extract URL
-                urls = re.findall(r'https?://[^\s]+github\.com[^\s]+', detail)
-                for url in urls:
-                    st.markdown(f"""
-                    <a href="{url}" target="_blank" class="github-link">
-                        <svg height="16" viewBox="0 0 16 16" width="16" style="fill: white;">
-                            <path d="M8 0c4.42 0 8 3.58 8 8a8.013 8.013 0 0 1-5.45 7.59c-.4.08-.55-.17-.55-.38 0-.27.01-1.13.01-2.2 0-.75-.25-1.23-.54-1.48 1.78-.2 3.65-.88 3.65-3.95 0-.88-.31-1.59-.82-2.15.08-.2.36-1.02-.08-2.12 0 0-.67-.22-2.2.82-.64-.18-1.32-.27-2-.27-.68 0-1.36.09-2 .27-1.53-1.03-2.2-.82-2.2-.82-.44 1.1-.16 1.92-.08 2.12-.51.56-.82 1.28-.82 2.15 0 3.06 1.86 3.75 3.64 3.95-.23.2-.44.55-.51 1.07-.46.21-1.61.55-2.33-.66-.15-.24-.6-.83-1.23-.82-.67.01-.27.38.01.53.34.19.73.9.82 1.13.16.45.68 1.31 2.69.94 0 .67.01 1.3.01 1.49 0 .21-.15.45-.55.38A7.995 7.995 0 0 1 0 8c0-4.42 3.58-8 8-8Z"></path>
-                        </svg>
-                        {url}
-                    </a>
-                    """, unsafe_allow_html=True)
+        st.markdown("".join(f'<a href="{escape(url)}" target="_blank" class="github-link">{escape(url)}</a>' for url in urls),
+                    unsafe_allow_html=True)
 
 
 # Header
@@ -384,6 +570,103 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+def show_run_result(run: TaskRun, verbose_mode: bool):
+    """Render the plan, step results and final answer of a finished run"""
+    if run.state == "failed":
+        st.error(run.error)
+        return
+
+    final_result = run.final_result
+    if verbose_mode:
+        with st.expander("📝 Execution Plan", expanded=False):
+            st.json(run.plan)
+        with st.expander("⚡ Execution Results", expanded=False):
+            for result in run.execution_results:
+                if result["success"]:
+                    st.success(f"Step {result['step']}: ✅ Success")
+                    if result.get("result"):
+                        st.json(result["result"], expanded=False)
+                else:
+                    st.error(f"Step {result['step']}: ❌ Failed - {result['error']}")
+
+    # Status indicator
+    status = final_result.get("status", "unknown")
+    if status == "success":
+        st.markdown('<div class="success-box"><strong>✅ Task Completed Successfully</strong></div>',
+                    unsafe_allow_html=True)
+    elif status == "partial":
+        st.markdown('<div class="info-box"><strong>⚠️ Task Partially Completed</strong></div>',
+                    unsafe_allow_html=True)
+    else:
+        st.markdown('<div class="error-box"><strong>❌ Task Failed</strong></div>', unsafe_allow_html=True)
+
+    reused = sum(1 for result in run.execution_results or [] if "reused_from" in result)
+    if reused:
+        st.caption(f"♻️ Reused {reused} result(s) from earlier in this conversation")
+
+    # Display formatted result - USING NATURAL LANGUAGE DISPLAY
+    formatted_result = final_result.get("formatted_result") or {}
+
+    if formatted_result:
+        # Use the natural language display function
+        display_natural_language_results(formatted_result)
+
+        # Also show the structured data in an expander for debugging
+        if verbose_mode:
+            with st.expander("📊 View Raw Structured Data", expanded=False):
+                st.json(formatted_result)
+
+    # Failed steps
+    failed_steps = final_result.get("failed_steps", [])
+    if failed_steps:
+        st.markdown("**⚠️ Issues encountered:**")
+        for step in failed_steps:
+            st.error(f"Step {step['step']}: {step['error']}")
+
+
+def show_task_runs(verbose_mode: bool):
+    """Progress of queued and running tasks, then finished results (newest first)"""
+    runs = st.session_state.task_runs
+    # Seen results beyond the newest APP_RESULTS_SHOWN are no longer displayed and are
+    # kept in TaskHistory, so the session drops them instead of holding them forever
+    excess = sum(1 for run in runs if run.finished) - Config.APP_RESULTS_SHOWN
+    if excess > 0:
+        dropped = [run for run in runs if run.finished and run.seen][:excess]
+        if dropped:
+            runs = st.session_state.task_runs = [run for run in runs if run not in dropped]
+    newly_finished = [run for run in runs if run.finished and not run.seen]
+    for run in newly_finished:
+        run.seen = True
+
+    st.markdown("---")
+    st.markdown('<h3 class="sub-header">Execution Progress</h3>', unsafe_allow_html=True)
+    for run in reversed(runs):
+        if run.finished:
+            continue
+        state = run.snapshot()
+        st.markdown(f"**{run.task}**")
+        st.progress(state["progress"], text=state["status_text"])
+        if verbose_mode and state["streamed"]:
+            st.code(state["streamed"][-1500:], language="json")
+
+    finished = [run for run in reversed(runs) if run.finished]
+    if finished:
+        st.markdown('<h3 class="sub-header">Final Result</h3>', unsafe_allow_html=True)
+        for run in finished[:Config.APP_RESULTS_SHOWN]:
+            with st.container(border=True):
+                st.markdown(f"**{'❌' if run.state == 'failed' else '✅'} {run.task}**")
+                show_run_result(run, verbose_mode)
+
+    if newly_finished:
+        st.session_state.toast = f"{len(newly_finished)} task(s) completed and saved to history!"
+        # Refresh the whole page so the sidebar and history tab include the new results
+        st.rerun()
+
+
+# Polls the shared workers without rerunning the rest of the page
+poll_task_runs = st.fragment(run_every=Config.APP_POLL_INTERVAL)(show_task_runs)
+
+
 # Sidebar
 with st.sidebar:
     st.image("https://cdn-icons-png.flaticon.com/512/2103/2103655.png", width=100)
@@ -420,11 +703,11 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown("### 📊 Statistics")
-    st.metric("Tasks Executed", len(st.session_state.tasks_history))
+    history_counts = get_task_history().counts()
+    st.metric("Tasks Executed", history_counts["total"])
 
-    if st.session_state.tasks_history:
-        success_count = sum(1 for task in st.session_state.tasks_history if task.get('status') == 'success')
-        st.metric("Success Rate", f"{success_count}/{len(st.session_state.tasks_history)}")
+    if history_counts["total"]:
+        st.metric("Success Rate", f"{history_counts.get('success', 0)}/{history_counts['total']}")
 
     st.markdown("---")
     st.markdown("### 🛠️ Agents")
@@ -454,171 +737,81 @@ with tab1:
         placeholder="Type your natural language task here..."
     )
 
+    conversation = st.session_state.conversation
+    if len(conversation):
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption(f"💬 Follow-ups like \"and what about Paris?\" build on the last {len(conversation)} "
+                       f"task(s) of this conversation")
+        with col2:
+            st.button("🆕 New conversation", on_click=conversation.clear, use_container_width=True)
+
     col1, col2, col3 = st.columns([1, 1, 2])
     with col1:
         verbose_mode = st.checkbox("Show Details", value=True)
     with col2:
         auto_run = st.checkbox("Auto Run", value=True)
+    with col3:
+        verifier_mode = st.selectbox(
+            "Result formatting",
+            ["auto", "template", "llm", "mapreduce"],
+            help="auto: format known results instantly, LLM otherwise · template: never call the LLM · "
+                 "llm: always write a natural-language answer · mapreduce: summarize steps in parallel, then merge"
+        )
 
     # Execute button
     execute_button = st.button("🚀 Execute Task", type="primary", use_container_width=True)
 
     if execute_button and task_input:
-        # Initialize agents
-        planner, executor, verifier = initialize_agents()
-
-        if planner and executor and verifier:
-            # Create progress container
-            progress_container = st.container()
-            result_container = st.container()
-
-            with progress_container:
-                st.markdown("---")
-                st.markdown('<h3 class="sub-header">Execution Progress</h3>', unsafe_allow_html=True)
-
-                # Step 1: Planning
-                with st.spinner("📋 Planning phase..."):
-                    st.markdown("**Step 1: Planning**")
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-
-                    try:
-                        status_text.text("Analyzing task and creating execution plan...")
-                        plan = planner.create_plan(task_input)
-                        progress_bar.progress(33)
-                        time.sleep(0.5)
-
-                        if verbose_mode:
-                            with st.expander("📝 Execution Plan", expanded=False):
-                                st.json(plan)
-
-                    except Exception as e:
-                        st.error(f"Planning failed: {str(e)}")
-                        st.stop()
-
-                # Step 2: Execution
-                with st.spinner("⚡ Executing..."):
-                    st.markdown("**Step 2: Execution**")
-                    status_text.text("Executing steps and calling APIs...")
-
-                    try:
-                        execution_results = executor.execute_plan(plan["steps"])
-                        progress_bar.progress(66)
-                        time.sleep(0.5)
-
-                        if verbose_mode:
-                            with st.expander("⚡ Execution Results", expanded=False):
-                                for result in execution_results:
-                                    if result["success"]:
-                                        st.success(f"Step {result['step']}: ✅ Success")
-                                        if result.get("result"):
-                                            with st.expander(f"Step {result['step']} Details", expanded=False):
-                                                st.json(result["result"])
-                                    else:
-                                        st.error(f"Step {result['step']}: ❌ Failed - {result['error']}")
-
-                    except Exception as e:
-                        st.error(f"Execution failed: {str(e)}")
-                        st.stop()
-
-                # Step 3: Verification
-                with st.spinner("🔍 Verifying..."):
-                    st.markdown("**Step 3: Verification**")
-                    status_text.text("Verifying results and formatting output...")
-
-                    try:
-                        final_result = verifier.verify_and_format(task_input, execution_results)
-                        progress_bar.progress(100)
-                        status_text.text("✅ Task completed!")
-                        time.sleep(0.5)
-
-                    except Exception as e:
-                        st.error(f"Verification failed: {str(e)}")
-                        st.stop()
-
-            # Display final results - UPDATED THIS SECTION
-            with result_container:
-                st.markdown("---")
-                st.markdown('<h3 class="sub-header">Final Result</h3>', unsafe_allow_html=True)
-
-                # Status indicator
-                status = final_result.get("status", "unknown")
-                if status == "success":
-                    st.markdown('<div class="success-box"><strong>✅ Task Completed Successfully</strong></div>',
-                                unsafe_allow_html=True)
-                elif status == "partial":
-                    st.markdown('<div class="info-box"><strong>⚠️ Task Partially Completed</strong></div>',
-                                unsafe_allow_html=True)
-                else:
-                    st.markdown('<div class="error-box"><strong>❌ Task Failed</strong></div>', unsafe_allow_html=True)
-
-                # Display formatted result - USING NATURAL LANGUAGE DISPLAY
-                formatted_result = final_result.get("formatted_result", {})
-
-                if formatted_result:
-                    # Use the natural language display function
-                    display_natural_language_results(formatted_result)
-
-                    # Also show the structured data in an expander for debugging
-                    if verbose_mode:
-                        with st.expander("📊 View Raw Structured Data", expanded=False):
-                            st.json(formatted_result)
-
-                # Failed steps
-                failed_steps = final_result.get("failed_steps", [])
-                if failed_steps:
-                    st.markdown("**⚠️ Issues encountered:**")
-                    for step in failed_steps:
-                        st.error(f"Step {step['step']}: {step['error']}")
-
-                # Store in history
-                task_record = {
-                    "id": st.session_state.current_task_id,
-                    "task": task_input,
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "status": status,
-                    "summary": formatted_result.get("summary", ""),
-                    "steps": len(plan.get("steps", [])),
-                    "successful_steps": sum(1 for r in execution_results if r.get("success", False)),
-                    "data": final_result
-                }
-
-                st.session_state.tasks_history.append(task_record)
-                st.session_state.current_task_id += 1
-
-                # Show success message
-                st.balloons()
-                st.success("Task completed and saved to history!")
-
+        # Queue the task on the shared workers; this script run returns immediately
+        runner = initialize_agents()
+        if runner:
+            st.session_state.task_runs.append(runner.submit(task_input, verifier_mode, conversation))
         else:
             st.error("Failed to initialize agents. Please check your configuration.")
 
+    if "toast" in st.session_state:
+        st.toast(st.session_state.pop("toast"))
+
+    if any(not run.finished for run in st.session_state.task_runs):
+        # Only this fragment reruns while tasks are in flight
+        poll_task_runs(verbose_mode)
+    elif st.session_state.task_runs:
+        show_task_runs(verbose_mode)
+
 with tab2:
     st.markdown('<h3 class="sub-header">Task History</h3>', unsafe_allow_html=True)
 
-    if st.session_state.tasks_history:
-        # Show statistics
+    history = get_task_history()
+    if history_counts["total"]:
+        # Show statistics (kept up to date by the store, no scan of the history)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Tasks", len(st.session_state.tasks_history))
+            st.metric("Total Tasks", history_counts["total"])
         with col2:
-            success_count = sum(1 for task in st.session_state.tasks_history if task.get('status') == 'success')
-            st.metric("Successful", success_count)
+            st.metric("Successful", history_counts.get("success", 0))
         with col3:
-            partial_count = sum(1 for task in st.session_state.tasks_history if task.get('status') == 'partial')
-            st.metric("Partial", partial_count)
+            st.metric("Partial", history_counts.get("partial", 0))
         with col4:
-            failed_count = sum(1 for task in st.session_state.tasks_history if task.get('status') == 'failed')
-            st.metric("Failed", failed_count)
+            st.metric("Failed", history_counts.get("failed", 0))
 
-        # Task history table
+        # Task history, newest first, one page at a time
         st.markdown("### Recent Tasks")
-        for task in reversed(st.session_state.tasks_history[:10]):  # Show last 10
-            with st.expander(f"Task #{task['id']}: {task['task'][:50]}...", expanded=False):
+        cursors = st.session_state.history_cursors
+        entries = history.page(cursors[-1], Config.APP_HISTORY_PAGE_SIZE)
+        if not entries and len(cursors) > 1:
+            # The page was dropped by retention; start again from the newest tasks
+            cursors[:] = [None]
+            entries = history.page(None, Config.APP_HISTORY_PAGE_SIZE)
+
+        for task in entries:
+            entry = st.expander(f"Task #{task['id']}: {task['task'][:50]}...", expanded=False,
+                                key=f"history_{task['id']}", on_change="rerun")
+            with entry:
                 col1, col2 = st.columns(2)
                 with col1:
                     st.markdown(f"**Status:** {task['status'].upper()}")
-                    st.markdown(f"**Time:** {task['timestamp']}")
+                    st.markdown(f"**Time:** {datetime.fromtimestamp(task['created_at']).strftime('%Y-%m-%d %H:%M:%S')}")
                 with col2:
                     st.markdown(f"**Steps:** {task['steps']}")
                     st.markdown(f"**Successful:** {task['successful_steps']}/{task['steps']}")
@@ -626,22 +819,33 @@ with tab2:
                 if task['summary']:
                     st.markdown(f"**Summary:** {task['summary']}")
 
-                # Display GitHub links from history using natural language display
-                task_data = task.get('data', {})
+                # The full result is only loaded while the entry is open
+                task_data = history.payload(task['id']) if entry.open else None
                 if task_data:
                     formatted_result = task_data.get('formatted_result', {})
                     if formatted_result:
                         # Use natural language display for history items too
                         display_natural_language_results(formatted_result)
 
-                # View details button
-                if st.button(f"View Full Details", key=f"view_{task['id']}"):
-                    st.json(task['data'])
+                    # View details button
+                    if st.button(f"View Full Details", key=f"view_{task['id']}"):
+                        st.json(task_data)
 
                 # Rerun button
                 if st.button(f"Rerun Task", key=f"rerun_{task['id']}"):
                     st.session_state.quick_task = task['task']
                     st.rerun()
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            st.button("← Newer", disabled=len(cursors) == 1, on_click=cursors.pop, use_container_width=True)
+        with col2:
+            pages = -(-history_counts["total"] // Config.APP_HISTORY_PAGE_SIZE)
+            st.caption(f"Page {len(cursors)} of {pages}")
+        with col3:
+            st.button("Older →", disabled=not entries or not history.has_older(entries[-1]['id']),
+                      on_click=cursors.append, args=(entries[-1]['id'] if entries else None,),
+                      use_container_width=True)
     else:
         st.info("No tasks executed yet. Go to the 'Execute Task' tab to get started!")
 
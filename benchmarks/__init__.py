@@ -0,0 +1,4 @@
+"""
+Benchmarks for AI Operations Assistant
+Run individual benchmarks with `python -m benchmarks.<name>`
+"""
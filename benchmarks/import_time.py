@@ -0,0 +1,96 @@
+"""
+Import-time budget check
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters and
+checks, for each entry point, that:
+
+    - the median cumulative import time stays within its budget
+    - heavy SDKs (groq, requests, ...) are not imported eagerly
+    - importing prints nothing (imports are side-effect free)
+
+Exits with status 1 when any check fails, so it can guard against
+regressions in CI.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 10 --scale 1.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> (budget in ms, modules that must not be imported)
+BUDGETS = {
+    "config": (40, ["groq", "requests", "fastapi"]),
+    "cli": (40, ["groq", "requests", "fastapi", "agents"]),
+    "daemon": (60, ["groq", "requests", "fastapi", "agents"]),
+    "agents": (120, ["groq", "requests", "fastapi"]),
+    "tools": (100, ["groq", "requests"]),
+    "llm": (100, ["groq", "requests"])
+}
+
+_PROBE = (
+    "import sys, json; import {module}; "
+    "sys.stdout.write('\\n__PROBE__' + json.dumps(sorted(set(m.split('.')[0] for m in sys.modules))))"
+)
+
+
+def measure(module: str):
+    """Return (cumulative import time in ms, imported top-level modules, stray stdout)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module)],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1].strip())
+
+    stray, _, probe = result.stdout.rpartition("\n__PROBE__")
+    return (cumulative_us or 0) / 1000, set(json.loads(probe)), stray.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time budgets for the entry points")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (for slow machines)")
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="Modules to check (default: all)")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<10} {'median ms':>10} {'budget ms':>10}  status")
+    for module in args.modules:
+        budget, forbidden = BUDGETS.get(module, (float("inf"), []))
+        budget *= args.scale
+        samples = [measure(module) for _ in range(args.runs)]
+        median_ms = statistics.median(sample[0] for sample in samples)
+        imported, stray = samples[-1][1], samples[-1][2]
+
+        problems = []
+        if median_ms > budget:
+            problems.append(f"over budget by {median_ms - budget:.1f}ms")
+        eager = sorted(name for name in forbidden if name in imported)
+        if eager:
+            problems.append(f"eagerly imports {', '.join(eager)}")
+        if stray:
+            problems.append(f"prints on import: {stray.splitlines()[0]!r}")
+
+        print(f"{module:<10} {median_ms:>10.1f} {budget:>10.1f}  {'FAIL: ' + '; '.join(problems) if problems else 'ok'}")
+        failures.extend(f"{module}: {problem}" for problem in problems)
+
+    if failures:
+        print(f"\n{len(failures)} import-time check(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
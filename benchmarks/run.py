@@ -0,0 +1,382 @@
+"""
+Benchmark suite for AI Operations Assistant
+
+Starts the local stand-in servers from benchmarks.stubs, points Config at
+them and drives a task corpus through:
+
+    agents  PlannerAgent / ExecutorAgent / VerifierAgent called in-process
+    api     the FastAPI app served by uvicorn, via POST /execute (in this
+            process, or with --workers as `uvicorn --workers N` for each N)
+    cli     `python cli.py --no-daemon` as a subprocess (includes cold start)
+
+The report gives p50/p95/p99 per phase, throughput per concurrency level and
+peak RSS. Use --output to save it as JSON and --baseline to compare a new
+run against a saved one.
+
+Usage:
+    python -m benchmarks.run --concurrency 1 4 16 --output bench.json
+    python -m benchmarks.run --baseline bench.json
+    python -m benchmarks.run --targets api --workers 1 2 4
+"""
+import argparse
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.stubs import StubServers, StubSettings
+from observability.stats import summarize_latencies
+
+DEFAULT_CORPUS = [
+    "Get weather in Tokyo",
+    "Find python repositories",
+    "Get weather in London and find machine learning repositories",
+    "What is the temperature in Paris",
+    "Show me rust projects",
+    "Search for javascript libraries and weather in Berlin"
+]
+
+DUMMY_KEYS = {"GROQ_API_KEY": "stand-in", "GITHUB_TOKEN": "stand-in", "WEATHER_API_KEY": "stand-in"}
+
+
+def load_corpus(path: str = None) -> List[str]:
+    if not path:
+        return list(DEFAULT_CORPUS)
+    with open(path, encoding="utf-8") as f:
+        tasks = []
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                tasks.append(json.loads(line)["task"] if line.startswith("{") else line)
+        return tasks
+
+
+def configure(stubs: StubServers, tool_cache: bool):
+    """Point Config (and child processes) at the stand-in servers"""
+    overrides = dict(DUMMY_KEYS, **stubs.urls())
+    # With JOURNAL_ENABLED=true, runs are journaled into a temporary directory, not the real journal
+    overrides["JOURNAL_DIR"] = tempfile.mkdtemp(prefix="bench-journal-")
+    if not tool_cache:
+        overrides["TOOL_CACHE_TTL"] = "0"
+    os.environ.update(overrides)
+
+    from config import Config
+    for key, value in overrides.items():
+        setattr(Config, key, int(value) if key == "TOOL_CACHE_TTL" else value)
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        with self._lock:
+            self.samples[phase].append(seconds)
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {phase: _to_ms(summarize_latencies(values)) for phase, values in sorted(self.samples.items())}
+
+
+def _to_ms(stats: Dict[str, float]) -> Dict[str, float]:
+    return {key: (value if key == "count" else round(value * 1000, 2)) for key, value in stats.items()}
+
+
+def _run_concurrently(work, items: List[Any], concurrency: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(work, items))
+    return time.perf_counter() - start
+
+
+def bench_agents(tasks: List[str], concurrency_levels: List[int], verifier_mode: str = None) -> Dict[str, Any]:
+    from agents.planner import PlannerAgent
+    from agents.executor import ExecutorAgent
+    from agents.verifier import VerifierAgent
+    from agents.pipeline import start_speculation
+    from observability.metrics import LLM_TOKENS, PLAN_CACHE_LOOKUPS, SPECULATIVE_STEPS
+
+    executor = ExecutorAgent()
+    verifier = VerifierAgent()
+    results = {}
+
+    for concurrency in concurrency_levels:
+        # A fresh planner per level, so plans cached at one level are no hits at the next
+        planner = PlannerAgent()
+        timer = PhaseTimer()
+        counters_before = _hit_counters(PLAN_CACHE_LOOKUPS, SPECULATIVE_STEPS)
+        tokens_before = _prompt_tokens(LLM_TOKENS)
+
+        def run(task):
+            task_start = time.perf_counter()
+            start = time.perf_counter()
+            speculative = start_speculation(planner, executor, task)
+            plan = planner.create_plan(task)
+            timer.add("planner", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            execution_results = executor.execute_plan(plan["steps"], speculative)
+            timer.add("executor", time.perf_counter() - start)
+
+            start = time.perf_counter()
+            verifier.verify_and_format(task, execution_results, mode=verifier_mode)
+            timer.add("verifier", time.perf_counter() - start)
+            timer.add("task", time.perf_counter() - task_start)
+
+        elapsed = _run_concurrently(run, tasks, concurrency)
+        counters = _hit_counters(PLAN_CACHE_LOOKUPS, SPECULATIVE_STEPS)
+        tokens = _prompt_tokens(LLM_TOKENS)
+        prompt_tokens = tokens["prompt"] - tokens_before["prompt"]
+        results[str(concurrency)] = {
+            "tasks": len(tasks),
+            "throughput_rps": round(len(tasks) / elapsed, 2),
+            "phases": timer.report(),
+            "hit_rates": {
+                "plan_cache": _hit_rate(counters_before[0], counters[0], "miss"),
+                "speculation": _hit_rate(counters_before[1], counters[1], "wasted"),
+                # Share of prompt tokens served from the provider's prompt cache
+                "prompt_cache": round((tokens["cached"] - tokens_before["cached"]) / prompt_tokens, 3)
+                                if prompt_tokens else None
+            }
+        }
+    return results
+
+
+def _hit_counters(*counters) -> List[Dict[str, float]]:
+    return [{result: counter.value(result=result) for result in ("hit", "miss", "wasted")} for counter in counters]
+
+
+def _prompt_tokens(counter) -> Dict[str, float]:
+    return {kind: counter.value(type=kind) for kind in ("prompt", "cached")}
+
+
+def _hit_rate(before: Dict[str, float], after: Dict[str, float], miss: str):
+    hits = after["hit"] - before["hit"]
+    total = hits + after[miss] - before[miss]
+    return round(hits / total, 3) if total else None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _api_server(workers: int = None) -> Iterator[str]:
+    """Serve the FastAPI app and yield its base URL
+
+    In this process by default; with `workers`, as `uvicorn main:app --workers N`
+    sharing a SQLite state backend, as in a multi-worker deployment.
+    """
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    if workers is None:
+        import uvicorn
+        import main
+
+        server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        try:
+            yield base_url
+        finally:
+            server.should_exit = True
+            thread.join(timeout=5)
+        return
+
+    import requests
+
+    state_dir = tempfile.mkdtemp(prefix="bench-workers-")
+    env = dict(os.environ, CACHE_BACKEND="sqlite", SHARED_DB_PATH=os.path.join(state_dir, "shared.db"))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+            try:
+                if requests.get(f"{base_url}/health", timeout=1).ok:
+                    break
+            except requests.exceptions.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start within 60s")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def bench_api(tasks: List[str], concurrency_levels: List[int], verifier_mode: str = None,
+              workers: int = None) -> Dict[str, Any]:
+    import requests
+
+    results = {}
+    with _api_server(workers) as base_url:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(concurrency_levels))
+        session.mount("http://", adapter)
+        url = f"{base_url}/execute"
+        for concurrency in concurrency_levels:
+            timer = PhaseTimer()
+
+            def run(task):
+                start = time.perf_counter()
+                response = session.post(url, json={"task": task, "verifier_mode": verifier_mode},
+                                        params={"verbosity": "minimal"})
+                response.raise_for_status()
+                timer.add("request", time.perf_counter() - start)
+
+            elapsed = _run_concurrently(run, tasks, concurrency)
+            results[str(concurrency)] = {
+                "tasks": len(tasks),
+                "throughput_rps": round(len(tasks) / elapsed, 2),
+                "phases": timer.report()
+            }
+    return results
+
+
+def bench_cli(tasks: List[str]) -> Dict[str, Any]:
+    timer = PhaseTimer()
+    for task in tasks:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, os.path.join(PROJECT_ROOT, "cli.py"), "--no-daemon", "-o", "json", task],
+            cwd=PROJECT_ROOT, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            check=False
+        )
+        timer.add("process", time.perf_counter() - start)
+    return {"1": {"tasks": len(tasks), "throughput_rps": None, "phases": timer.report()}}
+
+
+def peak_rss_kb() -> Dict[str, int]:
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    for target, levels in report["targets"].items():
+        print(f"\n=== {target} ===")
+        for concurrency, result in levels.items():
+            throughput = result["throughput_rps"]
+            print(f"concurrency {concurrency}: {result['tasks']} tasks"
+                  + (f", {throughput} tasks/s" if throughput is not None else ""))
+            print(f"  {'phase':<22} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'count':>6}")
+            for phase, stats in result["phases"].items():
+                print(f"  {phase:<22} {stats['p50']:>9} {stats['p95']:>9} {stats['p99']:>9} {stats['count']:>6}")
+            for name, rate in result.get("hit_rates", {}).items():
+                print(f"  {name} hit rate: {'n/a' if rate is None else f'{rate:.1%}'}")
+    rss = report["peak_rss_kb"]
+    print(f"\nPeak RSS: {rss['self'] / 1024:.1f} MB (benchmark process), {rss['children'] / 1024:.1f} MB (largest subprocess)")
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print p50/p95/p99 and throughput deltas against a baseline report"""
+    print("\n=== Comparison with baseline (negative latency delta = faster) ===")
+    for target, levels in report["targets"].items():
+        for concurrency, result in levels.items():
+            base = baseline.get("targets", {}).get(target, {}).get(concurrency)
+            if not base:
+                continue
+            if result["throughput_rps"] and base["throughput_rps"]:
+                delta = (result["throughput_rps"] / base["throughput_rps"] - 1) * 100
+                print(f"{target} c={concurrency} throughput: {base['throughput_rps']} -> "
+                      f"{result['throughput_rps']} tasks/s ({delta:+.1f}%)")
+            for phase, stats in result["phases"].items():
+                base_stats = base["phases"].get(phase)
+                if not base_stats:
+                    continue
+                deltas = []
+                for key in ("p50", "p95", "p99"):
+                    if base_stats[key]:
+                        deltas.append(f"{key} {(stats[key] / base_stats[key] - 1) * 100:+.1f}%")
+                print(f"  {target} c={concurrency} {phase}: " + ", ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the assistant against local stand-in APIs")
+    parser.add_argument("--targets", nargs="+", choices=["agents", "api", "cli"], default=["agents", "api", "cli"])
+    parser.add_argument("--corpus", help="Task file (one task per line or JSONL with a 'task' key)")
+    parser.add_argument("--repeat", type=int, default=5, help="Times to repeat the corpus (default: 5)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="Benchmark the api target as `uvicorn --workers N` (shared SQLite state) for each N, "
+                             "instead of in this process")
+    parser.add_argument("--cli-runs", type=int, default=3, help="cli.py invocations to time (default: 3)")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--tool-latency-ms", type=float, default=80)
+    parser.add_argument("--tool-cache", action="store_true", help="Keep the tool response cache enabled")
+    parser.add_argument("--verifier", choices=["auto", "template", "llm", "mapreduce"],
+                        help="Verifier mode (default: VERIFIER_MODE)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON report")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    tasks = corpus * args.repeat
+    settings = StubSettings(llm_latency_ms=args.llm_latency_ms, tool_latency_ms=args.tool_latency_ms)
+
+    with StubServers(settings) as stubs:
+        configure(stubs, args.tool_cache)
+        targets = {}
+        if "agents" in args.targets:
+            targets["agents"] = bench_agents(tasks, args.concurrency, args.verifier)
+        if "api" in args.targets and args.workers:
+            for workers in args.workers:
+                targets[f"api ({workers} workers)"] = bench_api(tasks, args.concurrency, args.verifier, workers)
+        elif "api" in args.targets:
+            targets["api"] = bench_api(tasks, args.concurrency, args.verifier)
+        if "cli" in args.targets:
+            targets["cli"] = bench_cli(corpus[:args.cli_runs])
+
+    report = {
+        "settings": {
+            "llm_latency_ms": args.llm_latency_ms,
+            "tool_latency_ms": args.tool_latency_ms,
+            "tasks": len(tasks),
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "tool_cache": args.tool_cache,
+            "verifier": args.verifier
+        },
+        "targets": targets,
+        "peak_rss_kb": peak_rss_kb()
+    }
+
+    print_report(report)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
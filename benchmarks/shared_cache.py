@@ -0,0 +1,97 @@
+"""
+Multi-worker cache benchmark
+
+Simulates N worker processes serving tool lookups over a shared key space.
+A cache miss costs a simulated upstream round-trip; a hit costs only the
+cache lookup. Per-process memory caches split the hit rate N ways, while the
+shared SQLite cache lets every worker benefit from entries fetched by the
+others, so throughput keeps scaling with the worker count.
+
+Usage:
+    python -m benchmarks.shared_cache --workers 1 2 4 8 --duration 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.cache import MemoryCache, SQLiteCache
+
+
+def _worker(backend: str, db_path: str, duration: float, keys: int, upstream_ms: float, results):
+    cache = SQLiteCache(db_path, "benchmark") if backend == "sqlite" else MemoryCache(max_entries=keys)
+    rng = random.Random(os.getpid())
+    requests_done = hits = 0
+    deadline = time.perf_counter() + duration
+
+    while time.perf_counter() < deadline:
+        key = f"tool:{int(rng.paretovariate(1.2)) % keys}"
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            time.sleep(upstream_ms / 1000)
+            cache.set(key, {"key": key, "payload": "x" * 512}, ttl=300)
+        requests_done += 1
+
+    results.put((requests_done, hits))
+
+
+def run(backend: str, workers: int, duration: float, keys: int, upstream_ms: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "shared.db")
+        if backend == "sqlite":
+            SQLiteCache(db_path, "benchmark")  # create the schema before forking
+
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker, args=(backend, db_path, duration, keys, upstream_ms, results))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    requests_done = sum(t[0] for t in totals)
+    hits = sum(t[1] for t in totals)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "requests": requests_done,
+        "throughput_rps": round(requests_done / duration, 1),
+        "hit_rate": round(hits / requests_done, 3) if requests_done else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-process vs shared caches across workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--backends", nargs="+", choices=["memory", "sqlite"], default=["memory", "sqlite"])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per run (default: 5)")
+    parser.add_argument("--keys", type=int, default=500, help="Distinct tool requests (default: 500)")
+    parser.add_argument("--upstream-ms", type=float, default=50.0, help="Simulated API latency on a miss")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    rows = [run(backend, workers, args.duration, args.keys, args.upstream_ms)
+            for backend in args.backends for workers in args.workers]
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'backend':<8} {'workers':>7} {'requests':>9} {'req/s':>9} {'hit rate':>9}")
+    for row in rows:
+        print(f"{row['backend']:<8} {row['workers']:>7} {row['requests']:>9} "
+              f"{row['throughput_rps']:>9} {row['hit_rate']:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Local stand-in servers for Groq, GitHub and WeatherAPI
+
+One threaded HTTP server answers all three APIs with canned JSON after a
+configurable delay, so the agents, the FastAPI app and cli.py can be
+benchmarked without API keys or network access.
+
+Routes:
+    POST /openai/v1/chat/completions   Groq/OpenAI-compatible chat endpoint (also streamed)
+    GET  /github/search/repositories   GitHub repository search
+    GET  /github/repos/{owner}/{repo}  GitHub repository details
+    GET  /weather/v1/current.json      WeatherAPI current weather
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+from urllib.parse import urlparse, parse_qs
+
+_WEATHER_RE = re.compile(r"(?:weather|temperature|climate) (?:in|of|for) ([a-z]+(?: [a-z]+)?)", re.IGNORECASE)
+_REPOS_RE = re.compile(r"([a-z+#]+(?: [a-z]+)?) (?:repositories|repos|projects|libraries)", re.IGNORECASE)
+_USER_REQUEST_RE = re.compile(r"USER REQUEST: (.*)")
+
+
+class StubSettings:
+    def __init__(self,
+                 llm_latency_ms: float = 300,
+                 tool_latency_ms: float = 80,
+                 jitter: float = 0.2,
+                 prompt_tokens: int = 600,
+                 completion_tokens: int = 150):
+        self.llm_latency_ms = llm_latency_ms
+        self.tool_latency_ms = tool_latency_ms
+        self.jitter = jitter
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    def sleep(self, latency_ms: float):
+        if latency_ms <= 0:
+            return
+        spread = latency_ms * self.jitter
+        time.sleep(max(0.0, random.uniform(latency_ms - spread, latency_ms + spread)) / 1000)
+
+
+def plan_for_task(task: str) -> Dict[str, Any]:
+    """Build the plan a well-behaved planner model would return for a task"""
+    steps = []
+    weather = _WEATHER_RE.search(task)
+    if weather:
+        steps.append({
+            "step_number": len(steps) + 1,
+            "description": f"Get weather for {weather.group(1).title()}",
+            "tool": "weather",
+            "parameters": {"city": weather.group(1).title()}
+        })
+    repos = _REPOS_RE.search(task)
+    if repos or not steps:
+        query = repos.group(1) if repos else task
+        steps.append({
+            "step_number": len(steps) + 1,
+            "description": f"Search GitHub for {query}",
+            "tool": "github_search",
+            "parameters": {"query": query, "per_page": 5}
+        })
+    return {"task": task, "steps": steps}
+
+
+def verification_for_prompt(prompt: str) -> Dict[str, Any]:
+    """Build a verifier-style formatted result"""
+    return {
+        "summary": "Retrieved the requested information.",
+        "data": {"key_results": "stand-in data"},
+        "details": [line.strip() for line in prompt.splitlines() if line.strip().startswith("Step ")][:10],
+        "status": "success",
+        "notes": "Generated by the benchmark stand-in server"
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, completion: Dict[str, Any], chunk_chars: int = 16):
+        """Send a completion as server-sent chat.completion.chunk events"""
+        content = completion["choices"][0]["message"]["content"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        events = []
+        for i in range(0, len(content), chunk_chars):
+            delta = {"content": content[i:i + chunk_chars]}
+            if i == 0:
+                delta["role"] = "assistant"
+            events.append(dict(base, object="chat.completion.chunk",
+                               choices=[{"index": 0, "delta": delta, "finish_reason": None}]))
+        events.append(dict(base, object="chat.completion.chunk",
+                           choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                           x_groq={"id": completion["id"], "usage": completion["usage"]}))
+
+        body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        path = urlparse(self.path).path
+
+        if path.endswith("/chat/completions"):
+            self.settings.sleep(self.settings.llm_latency_ms)
+            completion = self._chat_completion(request)
+            if request.get("stream"):
+                self._send_stream(completion)
+            else:
+                self._send_json(completion)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        self.settings.sleep(self.settings.tool_latency_ms)
+
+        if parsed.path == "/github/search/repositories":
+            self._send_json(self._search(query.get("q", "python"), int(query.get("per_page", 5))))
+        elif parsed.path.startswith("/github/repos/"):
+            owner, _, repo = parsed.path[len("/github/repos/"):].partition("/")
+            self._send_json(self._repository(owner, repo))
+        elif parsed.path == "/weather/v1/current.json":
+            self._send_json(self._weather(query.get("q", "London")))
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _chat_completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = "\n".join(message.get("content", "") for message in request.get("messages", []))
+        cached_tokens = self._cached_tokens(request.get("messages", []), prompt)
+        # In a conversation the prompt holds earlier requests too; plan the latest one
+        user_requests = _USER_REQUEST_RE.findall(prompt)
+        if user_requests:
+            content = plan_for_task(user_requests[-1].strip())
+        else:
+            content = verification_for_prompt(prompt)
+
+        return {
+            "id": f"chatcmpl-{random.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stand-in"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content)},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": self.settings.prompt_tokens,
+                "completion_tokens": self.settings.completion_tokens,
+                "total_tokens": self.settings.prompt_tokens + self.settings.completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    def _cached_tokens(self, messages, prompt: str) -> int:
+        """Mimic provider prompt caching: a system message seen before counts as cached prompt tokens"""
+        if not messages or messages[0].get("role") != "system" or not prompt:
+            return 0
+        prefix = messages[0].get("content", "")
+        with self.server.prompt_cache_lock:
+            if prefix not in self.server.prompt_cache:
+                self.server.prompt_cache.add(prefix)
+                return 0
+        return int(self.settings.prompt_tokens * len(prefix) / len(prompt))
+
+    @staticmethod
+    def _repo_item(full_name: str, index: int) -> Dict[str, Any]:
+        return {
+            "full_name": full_name,
+            "description": f"Stand-in repository {index}",
+            "stargazers_count": 10000 - index * 37,
+            "forks_count": 500 - index,
+            "open_issues_count": index,
+            "html_url": f"https://github.com/{full_name}",
+            "language": "Python",
+            "created_at": "2020-01-01T00:00:00Z",
+            "updated_at": "2026-01-01T00:00:00Z",
+            "topics": ["benchmark", "stand-in"]
+        }
+
+    def _search(self, query: str, per_page: int) -> Dict[str, Any]:
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "repo"
+        items = [self._repo_item(f"stand-in/{slug}-{i}", i) for i in range(per_page)]
+        return {"total_count": 1000, "incomplete_results": False, "items": items}
+
+    def _repository(self, owner: str, repo: str) -> Dict[str, Any]:
+        return self._repo_item(f"{owner}/{repo}", 0)
+
+    @staticmethod
+    def _weather(city: str) -> Dict[str, Any]:
+        return {
+            "location": {"name": city.title(), "country": "Standinland"},
+            "current": {
+                "temp_c": 21.0,
+                "temp_f": 69.8,
+                "condition": {"text": "Partly cloudy"},
+                "humidity": 60,
+                "wind_kph": 12.2,
+                "last_updated": "2026-01-01 12:00"
+            }
+        }
+
+
+class StubServers:
+    """Run the stand-in APIs on a background thread"""
+
+    def __init__(self, settings: StubSettings = None, host: str = "127.0.0.1", port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _StubHandler)
+        self.server.daemon_threads = True
+        self.server.settings = settings or StubSettings()
+        self.server.prompt_cache = set()
+        self.server.prompt_cache_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> Dict[str, str]:
+        """Config overrides pointing every API at this server"""
+        return {
+            "GROQ_BASE_URL": self.base_url,
+            "GITHUB_API_URL": f"{self.base_url}/github",
+            "WEATHER_API_URL": f"{self.base_url}/weather/v1/current.json"
+        }
+
+    def start(self) -> "StubServers":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-servers", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the stand-in Groq/GitHub/WeatherAPI servers")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--tool-latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    stubs = StubServers(StubSettings(args.llm_latency_ms, args.tool_latency_ms), port=args.port)
+    for name, url in stubs.urls().items():
+        print(f"{name}={url}")
+    try:
+        stubs.server.serve_forever()
+    except KeyboardInterrupt:
+        stubs.stop()
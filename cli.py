@@ -3,11 +3,160 @@
 Command Line Interface for AI Operations Assistant
 """
 import argparse
+import contextlib
 import json
 import sys
-from agents.planner import PlannerAgent
-from agents.executor import ExecutorAgent
-from agents.verifier import VerifierAgent
+import threading
+import time
+
+
+def _print_step_results(execution_results):
+    for result in execution_results:
+        if result["success"]:
+            print(f"Step {result['step']}: Success")
+        else:
+            print(f"Step {result['step']}: Failed - {result['error']}")
+
+
+def _run_in_process(args):
+    """Initialize agents and run all phases in this process"""
+    from agents.planner import PlannerAgent
+    from agents.executor import ExecutorAgent
+    from agents.verifier import VerifierAgent
+    from agents.pipeline import run_task
+    from config import Config
+
+    Config.validate(verbose=args.output == "text")
+
+    # Initialize agents
+    planner = PlannerAgent()
+    executor = ExecutorAgent()
+    verifier = VerifierAgent()
+
+    def show_progress(phase, output):
+        if phase == "planning":
+            if args.verbose:
+                print(f"Plan generated:\n{json.dumps(output, indent=2)}")
+            print("\n⚡ 2. Execution Phase...")
+        elif phase == "execution":
+            _print_step_results(output)
+            print("\n3.Verification & Formatting Phase...")
+
+    if args.output == "text":
+        print("\n📋 1. Planning Phase...")
+    return run_task(planner, executor, verifier, args.task, source="cli", verifier_mode=args.verifier,
+                    on_phase=show_progress if args.output == "text" else None)
+
+
+def _read_batch_tasks(source):
+    """Yield (id, task, error) from plain-text lines or JSONL objects with a "task" key
+
+    A line that cannot be read yields its line number as id, no task and the error.
+    """
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                    yield record.get("id", line_number), record["task"], None
+                except ValueError as e:
+                    yield line_number, None, f"Invalid JSON on line {line_number}: {e}"
+                except KeyError:
+                    yield line_number, None, f'Missing "task" key on line {line_number}'
+            else:
+                yield line_number, line, None
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _run_batch(args):
+    """Run tasks concurrently over shared agents, streaming one JSON line per result"""
+    # Agent diagnostics go to stderr so stdout stays valid JSONL
+    results_out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        _run_batch_tasks(args, results_out)
+
+
+def _run_batch_tasks(args, results_out):
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    from agents.planner import PlannerAgent
+    from agents.executor import ExecutorAgent
+    from agents.verifier import VerifierAgent
+    from agents.pipeline import run_task
+    from config import Config
+    from observability.stats import summarize_latencies
+
+    Config.validate()
+    planner = PlannerAgent()
+    executor = ExecutorAgent()
+    verifier = VerifierAgent()
+    output_lock = threading.Lock()
+    latencies = []
+    counts = {"success": 0, "partial": 0, "failed": 0, "error": 0}
+
+    def write(record, status, latency=None):
+        with output_lock:
+            if latency is not None:
+                latencies.append(latency)
+            counts[status] = counts.get(status, 0) + 1
+            results_out.write(json.dumps(record, default=str) + "\n")
+            results_out.flush()
+
+    def run_one(task_id, task):
+        start = time.perf_counter()
+        try:
+            record = run_task(planner, executor, verifier, task, source="batch", verifier_mode=args.verifier)
+            status = record["final_result"]["status"]
+        except Exception as e:
+            record = {"task": task, "error": str(e)}
+            status = "error"
+        latency = time.perf_counter() - start
+
+        record = {"id": task_id, "status": status, "latency_ms": round(latency * 1000, 1), **record}
+        if not args.verbose:
+            record.pop("plan", None)
+            record.pop("execution_results", None)
+        write(record, status, latency)
+
+    started = time.perf_counter()
+    max_in_flight = args.concurrency * 2
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        in_flight = set()
+        # Submit lazily so huge inputs are never fully buffered in memory
+        for task_id, task, error in _read_batch_tasks(args.batch):
+            if error is not None:
+                # A bad line fails on its own; the rest of the batch still runs
+                write({"id": task_id, "status": "error", "error": error}, "error")
+                continue
+            if len(in_flight) >= max_in_flight:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight.add(pool.submit(run_one, task_id, task))
+        wait(in_flight)
+    elapsed = time.perf_counter() - started
+
+    stats = summarize_latencies(latencies)
+    total = sum(counts.values())
+    print(f"\n📊 Batch completed: {total} tasks in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.2f} tasks/s, concurrency {args.concurrency})",
+          file=sys.stderr)
+    print("   " + " | ".join(f"{status}: {count}" for status, count in counts.items()), file=sys.stderr)
+    print(f"   Latency p50: {stats['p50'] * 1000:.0f}ms | p95: {stats['p95'] * 1000:.0f}ms | "
+          f"p99: {stats['p99'] * 1000:.0f}ms | max: {stats['max'] * 1000:.0f}ms", file=sys.stderr)
+
+    if counts["error"]:
+        sys.exit(1)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
@@ -16,6 +165,7 @@ def main():
     )
     parser.add_argument(
         "task",
+        nargs="?",
         help="Natural language task to execute (enclose in quotes if it contains spaces)"
     )
     parser.add_argument(
@@ -29,53 +179,64 @@ def main():
         default="text",
         help="Output format (default: text)"
     )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Always run in-process, even if a daemon is running"
+    )
+
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="Run tasks from FILE ('-' for stdin), one per line or as JSONL with a \"task\" key; "
+             "prints one JSON result per line"
+    )
+    parser.add_argument(
+        "--verifier",
+        choices=["auto", "template", "llm", "mapreduce"],
+        help="Result formatting: auto (templates for known results, LLM otherwise), template (never call "
+             "the LLM), llm (always ask the LLM) or mapreduce (summarize steps concurrently, then merge); "
+             "default: VERIFIER_MODE"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=_positive_int,
+        default=4,
+        help="Number of tasks to run concurrently in batch mode (default: 4)"
+    )
 
     args = parser.parse_args()
 
-    # Initialize agents
-    planner = PlannerAgent()
-    executor = ExecutorAgent()
-    verifier = VerifierAgent()
+    if args.batch:
+        _run_batch(args)
+        return
+    if not args.task:
+        parser.error("a task is required unless --batch is given")
 
     try:
         if args.output == "text":
             print(f"🔍 Task: {args.task}")
             print("=" * 60)
 
-        # Step 1: Planning
-        if args.output == "text":
-            print("\n📋 1. Planning Phase...")
-        plan = planner.create_plan(args.task)
-
-        if args.verbose and args.output == "text":
-            print(f"Plan generated:\n{json.dumps(plan, indent=2)}")
+        # Prefer a warm daemon; fall back to in-process execution
+        output = None
+        if not args.no_daemon:
+            from daemon import run_task_via_daemon
+            output = run_task_via_daemon(args.task, verifier_mode=args.verifier)
+            if output is not None and args.output == "text":
+                print("\n⚡ Served by daemon")
+                if args.verbose:
+                    print(f"Plan generated:\n{json.dumps(output['plan'], indent=2)}")
+                _print_step_results(output["execution_results"])
 
-        # Step 2: Execution
-        if args.output == "text":
-            print("\n⚡ 2. Execution Phase...")
-        execution_results = executor.execute_plan(plan["steps"])
+        if output is None:
+            output = _run_in_process(args)
 
-        if args.output == "text":
-            for result in execution_results:
-                if result["success"]:
-                    print(f"Step {result['step']}: Success")
-                else:
-                    print(f"Step {result['step']}: Failed - {result['error']}")
-
-        # Step 3: Verification
-        if args.output == "text":
-            print("\n3.Verification & Formatting Phase...")
-        final_result = verifier.verify_and_format(args.task, execution_results)
+        final_result = output["final_result"]
 
         # Output based on format
         if args.output == "json":
             # Return JSON output
-            output = {
-                "task": args.task,
-                "plan": plan,
-                "execution_results": execution_results,
-                "final_result": final_result
-            }
             print(json.dumps(output, indent=2))
         else:
             # Text output
@@ -1,4 +1,5 @@
 import os
+import sys
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -7,10 +8,55 @@ env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 
+class ConfigurationError(Exception):
+    """Raised when a required setting is missing"""
+
+
 class Config:
     # LLM Settings - Support both Groq and OpenAI
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
     GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # optional, e.g. a local stand-in server
+
+    # Model cascade: easy planner/verifier calls go to the small model and
+    # escalate to GROQ_MODEL when their JSON or plan fails validation
+    GROQ_SMALL_MODEL = os.getenv("GROQ_SMALL_MODEL", "llama-3.1-8b-instant")
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+    # USD per million (input, output) tokens, used for the cost metric
+    LLM_COSTS = {
+        "small": (float(os.getenv("GROQ_SMALL_INPUT_COST", 0.05)), float(os.getenv("GROQ_SMALL_OUTPUT_COST", 0.08))),
+        "large": (float(os.getenv("GROQ_INPUT_COST", 0.59)), float(os.getenv("GROQ_OUTPUT_COST", 0.79)))
+    }
+
+    # Share of the input price saved on prompt tokens served from a provider's prompt cache
+    LLM_CACHED_INPUT_DISCOUNT = float(os.getenv("LLM_CACHED_INPUT_DISCOUNT", 0.5))
+
+    # Any OpenAI-compatible endpoint (OpenAI, or a local server: set OPENAI_BASE_URL, the key is optional)
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # default https://api.openai.com/v1
+    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    OPENAI_SMALL_MODEL = os.getenv("OPENAI_SMALL_MODEL", OPENAI_MODEL)
+    # Structured output the endpoint supports: json_schema, json_object or off
+    OPENAI_JSON_MODE = os.getenv("OPENAI_JSON_MODE", "json_schema")
+    OPENAI_COSTS = {
+        "small": (float(os.getenv("OPENAI_SMALL_INPUT_COST", 0.15)), float(os.getenv("OPENAI_SMALL_OUTPUT_COST", 0.6))),
+        "large": (float(os.getenv("OPENAI_INPUT_COST", 0.15)), float(os.getenv("OPENAI_OUTPUT_COST", 0.6)))
+    }
+
+    # Provider failover: configured providers in order of preference; a provider whose
+    # recent latency/error score is LLM_ROUTING_TOLERANCE times worse than the best is
+    # moved to the back, and failed calls fail over to the next provider. A provider is
+    # skipped for LLM_PROVIDER_COOLDOWN seconds after LLM_PROVIDER_MAX_FAILURES failures in a row.
+    LLM_PROVIDERS = [name.strip() for name in os.getenv("LLM_PROVIDERS", "groq,openai").split(",") if name.strip()]
+    LLM_ROUTING_TOLERANCE = float(os.getenv("LLM_ROUTING_TOLERANCE", 2.0))
+    LLM_HEALTH_WINDOW = float(os.getenv("LLM_HEALTH_WINDOW", 300))
+    LLM_PROVIDER_MAX_FAILURES = int(os.getenv("LLM_PROVIDER_MAX_FAILURES", 3))
+    LLM_PROVIDER_COOLDOWN = float(os.getenv("LLM_PROVIDER_COOLDOWN", 30))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 60))
+    # Hedging: when the first provider has not answered by its p95 latency, send the call
+    # to the next one too and use whichever answers first (needs two providers)
+    LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
 
     # API Keys
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
@@ -19,10 +65,78 @@ class Config:
     # Application Settings
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", 3))
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 30))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+    # Caching and shared state (use "sqlite" when running several workers)
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory or sqlite
+    SHARED_DB_PATH = os.getenv("SHARED_DB_PATH", str(Path(__file__).parent / "data" / "shared.db"))
+    TOOL_CACHE_TTL = int(os.getenv("TOOL_CACHE_TTL", 60))
+
+    # Semantic plan cache: reuse plans of similar past tasks instead of calling the planner LLM
+    PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "false").lower() == "true"
+    PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 512))
+    PLAN_CACHE_THRESHOLD = float(os.getenv("PLAN_CACHE_THRESHOLD", 0.85))
+
+    # Verifier formatting: auto (templates when possible), template or llm
+    VERIFIER_MODE = os.getenv("VERIFIER_MODE", "auto")
+    # LLM verification switches to map-reduce above this many steps or prompt characters
+    VERIFIER_MAP_REDUCE_STEPS = int(os.getenv("VERIFIER_MAP_REDUCE_STEPS", 4))
+    VERIFIER_MAP_REDUCE_CHARS = int(os.getenv("VERIFIER_MAP_REDUCE_CHARS", 8000))
+    VERIFIER_CHUNK_CHARS = int(os.getenv("VERIFIER_CHUNK_CHARS", 4000))
+    VERIFIER_SUMMARY_TTL = int(os.getenv("VERIFIER_SUMMARY_TTL", 3600))
+
+    # Start the tool calls the rule-based patterns predict while the planner LLM is running
+    # (opt-in: predictions the plan does not use still spend upstream rate limits and quota)
+    SPECULATIVE_EXECUTION = os.getenv("SPECULATIVE_EXECUTION", "false").lower() == "true"
+
+    # API responses smaller than this (bytes) are not compressed
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+
+    # Record/replay of tool and LLM traffic (off, record or replay)
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", str(Path(__file__).parent / "data" / "cassette.jsonl.gz"))
+    CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY", "none")  # none, recorded or sampled
+    CASSETTE_SEED = int(os.getenv("CASSETTE_SEED", 0))
+
+    # Conversation sessions (interactive CLI, dashboard): earlier turns kept, and how long (seconds)
+    # their tool results are reused by follow-up requests
+    SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", 5))
+    SESSION_RESULT_TTL = float(os.getenv("SESSION_RESULT_TTL", 300))
+
+    # POST /tasks/{task_id}/refresh re-runs steps whose results are older than their tool's
+    # freshness window, or than this many seconds for tools that do not declare one
+    REFRESH_MAX_AGE = float(os.getenv("REFRESH_MAX_AGE", 300))
+
+    # Run journal: one record per task run, appended to segment files of JOURNAL_SEGMENT_MB;
+    # the oldest segments are deleted above JOURNAL_MAX_MB (opt-in)
+    JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "false").lower() == "true"
+    JOURNAL_DIR = os.getenv("JOURNAL_DIR", str(Path(__file__).parent / "data" / "journal"))
+    JOURNAL_SEGMENT_MB = float(os.getenv("JOURNAL_SEGMENT_MB", 8))
+    JOURNAL_MAX_MB = float(os.getenv("JOURNAL_MAX_MB", 256))
+
+    # Streamlit dashboard: shared task workers, progress polling interval (seconds), results shown
+    APP_WORKERS = int(os.getenv("APP_WORKERS", 8))
+    APP_POLL_INTERVAL = float(os.getenv("APP_POLL_INTERVAL", 0.5))
+    APP_RESULTS_SHOWN = int(os.getenv("APP_RESULTS_SHOWN", 5))
+    # Dashboard task history (kept in SHARED_DB_PATH): entries per page, oldest dropped above these limits
+    APP_HISTORY_PAGE_SIZE = int(os.getenv("APP_HISTORY_PAGE_SIZE", 10))
+    APP_HISTORY_MAX_ENTRIES = int(os.getenv("APP_HISTORY_MAX_ENTRIES", 1000))
+    APP_HISTORY_MAX_MB = float(os.getenv("APP_HISTORY_MAX_MB", 50))
+
+    # Local daemon used by cli.py to skip cold start
+    DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", str(Path(__file__).parent / "data" / "daemon.sock"))
+
+    # Observability
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")  # none, jsonl or otlp
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+    OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 1.0))
+    TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", 0))
 
     # API Endpoints
-    WEATHER_API_URL = "http://api.weatherapi.com/v1/current.json"
-    GITHUB_API_URL = "https://api.github.com"
+    WEATHER_API_URL = os.getenv("WEATHER_API_URL", "http://api.weatherapi.com/v1/current.json")
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
 
     # LLM Temperature
     PLANNER_TEMPERATURE = 0.1
@@ -33,41 +147,55 @@ class Config:
         """Determine which LLM provider to use"""
         if cls.GROQ_API_KEY:
             return "groq", cls.GROQ_MODEL
+        elif cls.OPENAI_API_KEY or cls.OPENAI_BASE_URL:
+            return "openai", cls.OPENAI_MODEL
         else:
             return None, None
 
     @classmethod
-    def validate(cls):
-        """Validate that all required keys are present"""
+    def validate(cls, verbose: bool = True) -> bool:
+        """Validate that all required keys are present
+
+        Call this once from an entry point's startup path; importing this
+        module never validates or prints anything.
+        """
         errors = []
+        found = []
 
         # Check for at least one LLM provider
-        if not cls.GROQ_API_KEY:
-            errors.append("Either GROQ_API_KEY or OPENAI_API_KEY must be set")
-
+        if not (cls.GROQ_API_KEY or cls.OPENAI_API_KEY or cls.OPENAI_BASE_URL):
+            errors.append("Either GROQ_API_KEY or OPENAI_API_KEY (or OPENAI_BASE_URL) must be set")
         if cls.GROQ_API_KEY:
-            print(f"Groq API key found (model: {cls.GROQ_MODEL})")
+            found.append(f"Groq API key found (model: {cls.GROQ_MODEL})")
+        if cls.OPENAI_API_KEY or cls.OPENAI_BASE_URL:
+            found.append(f"OpenAI-compatible endpoint found (model: {cls.OPENAI_MODEL})")
 
         # Check other required APIs
         if not cls.GITHUB_TOKEN:
             errors.append("GITHUB_TOKEN is missing")
         else:
-            print(" GitHub token found")
+            found.append(" GitHub token found")
 
         if not cls.WEATHER_API_KEY:
             errors.append("WEATHER_API_KEY is missing")
         else:
-            print(" Weather API key found")
+            found.append(" Weather API key found")
+
+        if verbose:
+            for line in found:
+                print(line)
 
         if errors:
-            print("\n Configuration errors:")
-            for error in errors:
-                print(f"   - {error}")
+            if verbose:
+                print("\n Configuration errors:")
+                for error in errors:
+                    print(f"   - {error}")
             return False
 
-        print(" All configurations validated successfully!")
+        if verbose:
+            print(" All configurations validated successfully!")
         return True
 
 
-# Validate on import
-Config.validate()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(0 if Config.validate() else 1)
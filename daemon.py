@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local daemon for AI Operations Assistant
+
+Keeps warm agents, HTTP/LLM client pools and caches in one long-running
+process listening on a Unix socket, so cli.py invocations skip the cold
+start. The protocol is one JSON object per line in each direction.
+
+Usage:
+    python daemon.py            # start the daemon in the foreground
+    python daemon.py --status   # check whether a daemon is running
+    python daemon.py --stop     # ask a running daemon to shut down
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from config import Config
+
+
+def send_request(request: Dict[str, Any],
+                 socket_path: str = None,
+                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Send one request to the daemon; returns None when no daemon is listening"""
+    socket_path = socket_path or Config.DAEMON_SOCKET
+    if not os.path.exists(socket_path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+
+    if not line:
+        raise Exception("Daemon closed the connection without a response")
+    return json.loads(line)
+
+
+def run_task_via_daemon(task: str, socket_path: str = None, verifier_mode: str = None) -> Optional[Dict[str, Any]]:
+    """Run a task on the daemon; returns None when no daemon is running"""
+    response = send_request({"command": "run", "task": task, "verifier_mode": verifier_mode}, socket_path)
+    if response is not None and "error" in response:
+        raise Exception(response["error"])
+    return response
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request)
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+            if response.get("status") == "stopping":
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+class AssistantDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        from agents.planner import PlannerAgent
+        from agents.executor import ExecutorAgent
+        from agents.verifier import VerifierAgent
+
+        self.socket_path = socket_path
+        self.planner = PlannerAgent()
+        self.executor = ExecutorAgent()
+        self.verifier = VerifierAgent()
+        self.tasks_served = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        self._remove_stale_socket()
+        super().__init__(socket_path, _DaemonHandler)
+        os.chmod(socket_path, 0o600)
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        if send_request({"command": "ping"}, self.socket_path, timeout=1) is not None:
+            raise Exception(f"A daemon is already listening on {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get("command", "run")
+
+        if command == "ping":
+            return {"status": "ok", "pid": os.getpid(), "tasks_served": self.tasks_served}
+        if command == "shutdown":
+            return {"status": "stopping"}
+        if command != "run":
+            raise ValueError(f"Unknown command: {command}")
+
+        from agents.pipeline import run_task
+
+        task = (request.get("task") or "").strip()
+        if not task:
+            raise ValueError("Task cannot be empty")
+
+        result = run_task(self.planner, self.executor, self.verifier, task, source="daemon",
+                          verifier_mode=request.get("verifier_mode"))
+        with self._lock:
+            self.tasks_served += 1
+        return result
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Operations Assistant - local daemon")
+    parser.add_argument("--socket", default=Config.DAEMON_SOCKET, help="Unix socket path")
+    parser.add_argument("--status", action="store_true", help="Check whether a daemon is running")
+    parser.add_argument("--stop", action="store_true", help="Stop a running daemon")
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        command = "shutdown" if args.stop else "ping"
+        response = send_request({"command": command}, args.socket, timeout=5)
+        if response is None:
+            print(f"No daemon running on {args.socket}")
+            sys.exit(1)
+        print(json.dumps(response))
+        return
+
+    Config.validate()
+    server = AssistantDaemon(args.socket)
+    print(f"🚀 Daemon listening on {args.socket} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nInterrupted. Exiting.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Run journal analysis and replay for AI Operations Assistant
+
+Reads the journal every task run appends to (see storage.journal) one record
+at a time, so memory use does not grow with the size of the journal.
+
+Usage:
+    python journal.py stats                          # per-intent and per-tool tables
+    python journal.py stats --since 24h --source api --json
+    python journal.py replay --status failed --limit 20   # re-run with the current build
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator
+
+from config import Config
+
+PHASES = ("planning", "execution", "verification")
+STATUS_RANK = {"success": 3, "partial": 2, "failed": 1, "error": 0}
+# Distinct error messages kept per tool; further ones are counted as "(other)"
+MAX_ERRORS = 50
+
+_DURATION_RE = re.compile(r"^(\d+(?:\.\d+)?)([mhd])$")
+
+
+def _parse_since(value: str) -> float:
+    """"30m", "24h", "7d" or an ISO date/time -> epoch seconds"""
+    match = _DURATION_RE.match(value)
+    if match:
+        amount, unit = float(match.group(1)), match.group(2)
+        return time.time() - amount * {"m": 60, "h": 3600, "d": 86400}[unit]
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected e.g. 30m, 24h, 7d or an ISO date, got {value!r}")
+
+
+def _records(args) -> Iterator[Dict[str, Any]]:
+    """Journal records matching the command-line filters"""
+    from storage.journal import read_journal
+
+    for record in read_journal(args.dir):
+        if args.since and record.get("ts", 0) < args.since:
+            continue
+        if args.source and record.get("source") != args.source:
+            continue
+        if args.intent and record.get("intent") != args.intent:
+            continue
+        if args.status and record.get("status") not in args.status:
+            continue
+        yield record
+
+
+class _GroupStats:
+    """Aggregates of the runs of one intent (or source)"""
+
+    def __init__(self):
+        from observability.stats import LatencySketch
+
+        self.runs = 0
+        self.statuses: Dict[str, int] = {}
+        self.latency = LatencySketch()
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)
+        self.plan_sources: Dict[str, int] = {}
+        self.llm_calls = 0
+        self.tokens = {"prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self.steps = 0
+        self.speculative_steps = 0
+        self.cache_hits: Dict[str, int] = {}
+
+    def add(self, record: Dict[str, Any]):
+        self.runs += 1
+        status = record.get("status", "error")
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency.add(record.get("ms", 0.0))
+        for phase, ms in (record.get("phases") or {}).items():
+            if phase in self.phase_ms:
+                self.phase_ms[phase] += ms
+        plan_source = (record.get("plan") or {}).get("source") or "unknown"
+        self.plan_sources[plan_source] = self.plan_sources.get(plan_source, 0) + 1
+        llm = record.get("llm") or {}
+        self.llm_calls += llm.get("calls", 0)
+        for key in self.tokens:
+            self.tokens[key] += llm.get(key, 0)
+        steps = record.get("steps") or []
+        self.steps += len(steps)
+        self.speculative_steps += sum(1 for step in steps if step.get("speculative"))
+        for cache, hits in (record.get("cache") or {}).items():
+            self.cache_hits[cache] = self.cache_hits.get(cache, 0) + hits
+
+    def share(self, *statuses: str) -> float:
+        return sum(self.statuses.get(status, 0) for status in statuses) / self.runs if self.runs else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency.summary()
+        return {
+            "runs": self.runs,
+            "statuses": self.statuses,
+            "failure_rate": round(self.share("failed", "error"), 4),
+            "partial_rate": round(self.share("partial"), 4),
+            "latency_ms": {key: (value if key == "count" else round(value, 1)) for key, value in latency.items()},
+            "mean_phase_ms": {phase: round(total / self.runs, 1) for phase, total in self.phase_ms.items()},
+            "plan_sources": self.plan_sources,
+            "llm_calls_per_run": round(self.llm_calls / self.runs, 2),
+            "tokens_per_run": {key: round(value / self.runs, 1) for key, value in self.tokens.items()},
+            "speculation_hit_rate": round(self.speculative_steps / self.steps, 4) if self.steps else None,
+            "cache_hits": self.cache_hits
+        }
+
+
+class _ToolStats:
+    def __init__(self):
+        from observability.stats import LatencySketch
+
+        self.calls = 0
+        self.failures = 0
+        self.latency = LatencySketch()
+        self.errors: Dict[str, int] = {}
+
+    def add(self, step: Dict[str, Any]):
+        self.calls += 1
+        self.latency.add(step.get("ms", 0.0))
+        if not step.get("ok"):
+            self.failures += 1
+            error = step.get("error") or "(no message)"
+            if error not in self.errors and len(self.errors) >= MAX_ERRORS:
+                error = "(other)"
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        latency = self.latency.summary()
+        top_error = max(self.errors.items(), key=lambda item: item[1]) if self.errors else None
+        return {
+            "calls": self.calls,
+            "failure_rate": round(self.failures / self.calls, 4) if self.calls else 0.0,
+            "latency_ms": {key: (value if key == "count" else round(value, 1)) for key, value in latency.items()},
+            "top_error": {"error": top_error[0], "count": top_error[1]} if top_error else None
+        }
+
+
+def aggregate(records: Iterator[Dict[str, Any]], by: str = "intent") -> Dict[str, Any]:
+    """Per-group and per-tool tables from a stream of records"""
+    overall = _GroupStats()
+    groups: Dict[str, _GroupStats] = {}
+    tools: Dict[str, _ToolStats] = {}
+    first_ts = last_ts = None
+
+    for record in records:
+        overall.add(record)
+        key = str(record.get(by) or "unknown")
+        groups.setdefault(key, _GroupStats()).add(record)
+        for step in record.get("steps") or []:
+            tools.setdefault(str(step.get("tool")), _ToolStats()).add(step)
+        ts = record.get("ts")
+        if ts is not None:
+            first_ts = ts if first_ts is None else min(first_ts, ts)
+            last_ts = ts if last_ts is None else max(last_ts, ts)
+
+    return {
+        "runs": overall.runs,
+        "from": first_ts,
+        "to": last_ts,
+        "overall": overall.to_dict() if overall.runs else None,
+        "by": by,
+        "groups": {key: stats.to_dict() for key, stats in sorted(groups.items(), key=lambda item: -item[1].runs)},
+        "tools": {name: stats.to_dict() for name, stats in sorted(tools.items(), key=lambda item: -item[1].calls)}
+    }
+
+
+def _format_time(ts) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M") if ts else "?"
+
+
+def print_stats(report: Dict[str, Any]):
+    if not report["runs"]:
+        print("No journal records match.")
+        return
+
+    overall = report["overall"]
+    print(f"📒 {report['runs']} runs from {_format_time(report['from'])} to {_format_time(report['to'])}")
+    phase_total = sum(overall["mean_phase_ms"].values()) or 1
+    print("   Time spent: " + " | ".join(f"{phase} {ms / phase_total:.0%}"
+                                         for phase, ms in overall["mean_phase_ms"].items()))
+    tokens = overall["tokens_per_run"]
+    print(f"   Per run: {overall['llm_calls_per_run']} LLM calls, {tokens['prompt_tokens']:.0f} prompt "
+          f"({tokens['cached_tokens']:.0f} cached) + {tokens['completion_tokens']:.0f} completion tokens")
+
+    print(f"\n{report['by'].title():<32} {'runs':>6} {'share':>6} {'fail':>6} {'partial':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'plan ms':>8} {'exec ms':>8} {'verify ms':>9} {'plan cache':>10}")
+    for key, stats in report["groups"].items():
+        latency, phases = stats["latency_ms"], stats["mean_phase_ms"]
+        cached_plans = stats["plan_sources"].get("cache", 0) / stats["runs"]
+        print(f"{key[:32]:<32} {stats['runs']:>6} {stats['runs'] / report['runs']:>6.1%} "
+              f"{stats['failure_rate']:>6.1%} {stats['partial_rate']:>7.1%} "
+              f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f} "
+              f"{phases['planning']:>8.1f} {phases['execution']:>8.1f} {phases['verification']:>9.1f} "
+              f"{cached_plans:>10.1%}")
+
+    if report["tools"]:
+        print(f"\n{'Tool':<20} {'calls':>7} {'fail':>6} {'p50 ms':>8} {'p95 ms':>8}  top error")
+        for name, stats in report["tools"].items():
+            latency = stats["latency_ms"]
+            top = stats["top_error"]
+            top_error = f"{top['error'][:60]} (×{top['count']})" if top else ""
+            print(f"{name[:20]:<20} {stats['calls']:>7} {stats['failure_rate']:>6.1%} "
+                  f"{latency['p50']:>8.1f} {latency['p95']:>8.1f}  {top_error}")
+
+
+def replay(args):
+    """Re-run the newest matching records against the current build and compare the outcome"""
+    from agents.planner import PlannerAgent
+    from agents.executor import ExecutorAgent
+    from agents.verifier import VerifierAgent
+    from agents.pipeline import run_task
+    from observability.stats import summarize_latencies
+
+    # Keep only the newest --limit matches, however many records there are. Refreshes
+    # re-ran only part of a stored run, so their timings cannot be compared with a full run
+    selected = deque((record for record in _records(args) if record.get("source") != "refresh"),
+                     maxlen=args.limit)
+    if not selected:
+        print("No journal records match.", file=sys.stderr)
+        return
+
+    # Replays are not production traffic, so they stay out of the journal unless asked for
+    Config.JOURNAL_ENABLED = args.journal
+    Config.validate()
+    planner, executor, verifier = PlannerAgent(), ExecutorAgent(), VerifierAgent()
+
+    def run_one(record):
+        start = time.perf_counter()
+        try:
+            output = run_task(planner, executor, verifier, record["task"], source="replay",
+                              verifier_mode=args.verifier)
+            plan_tools = [step.get("tool") for step in output["plan"]["steps"]]
+            status = output["final_result"]["status"]
+            intent = "+".join(dict.fromkeys(str(tool) for tool in plan_tools)) or "none"
+            error = None
+        except Exception as e:
+            status, intent, error = "error", None, str(e)
+        return {
+            "task": record["task"],
+            "id": record.get("id"),
+            "recorded": {"status": record.get("status"), "intent": record.get("intent"), "ms": record.get("ms")},
+            "replayed": {"status": status, "intent": intent, "ms": round((time.perf_counter() - start) * 1000, 1),
+                         "error": error}
+        }
+
+    regressed = fixed = intent_changed = 0
+    recorded_ms, replayed_ms = [], []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for result in pool.map(run_one, selected):
+            before, after = result["recorded"], result["replayed"]
+            change = STATUS_RANK.get(after["status"], 0) - STATUS_RANK.get(before["status"], 0)
+            regressed += change < 0
+            fixed += change > 0
+            intent_changed += after["intent"] is not None and after["intent"] != before["intent"]
+            if before["ms"] is not None:
+                recorded_ms.append(before["ms"])
+            replayed_ms.append(after["ms"])
+
+            if args.json:
+                print(json.dumps(result, default=str), flush=True)
+                continue
+            marker = "⬇️ " if change < 0 else "⬆️ " if change > 0 else "  "
+            intent = "" if after["intent"] in (None, before["intent"]) else f"  intent {before['intent']} → {after['intent']}"
+            print(f"{marker} {before['status']:>8} → {after['status']:<8} {before['ms'] or 0:>8.0f} → "
+                  f"{after['ms']:>8.0f} ms  {result['task'][:60]}{intent}"
+                  + (f"  ({after['error']})" if after["error"] else ""), flush=True)
+
+    before_stats, after_stats = summarize_latencies(recorded_ms), summarize_latencies(replayed_ms)
+    print(f"\n🔁 Replayed {len(selected)} runs: {fixed} improved, {regressed} regressed, "
+          f"{intent_changed} planned differently", file=sys.stderr)
+    print(f"   Latency p50 {before_stats['p50']:.0f} → {after_stats['p50']:.0f} ms | "
+          f"p95 {before_stats['p95']:.0f} → {after_stats['p95']:.0f} ms", file=sys.stderr)
+    if regressed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Operations Assistant - run journal analysis and replay")
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--dir", default=Config.JOURNAL_DIR, help="Journal directory (default: JOURNAL_DIR)")
+    filters.add_argument("--since", type=_parse_since, help="Only runs since this age (30m, 24h, 7d) or ISO date")
+    filters.add_argument("--source", help="Only runs from this source (api, refresh, cli, batch, daemon, dashboard)")
+    filters.add_argument("--intent", help="Only runs with this intent (tools in plan order, e.g. weather+github_search)")
+    filters.add_argument("--status", nargs="+", choices=sorted(STATUS_RANK), help="Only runs with these statuses")
+    filters.add_argument("--json", action="store_true", help="Print JSON instead of tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stats = commands.add_parser("stats", parents=[filters], help="Latency and failure tables per intent and tool")
+    stats.add_argument("--by", choices=["intent", "source", "status"], default="intent",
+                       help="Group runs by intent (default), source or status")
+
+    rerun = commands.add_parser("replay", parents=[filters], help="Re-run matching runs with the current build")
+    rerun.add_argument("--limit", type=int, default=20, help="Replay the newest N matching runs (default: 20)")
+    rerun.add_argument("--concurrency", "-c", type=int, default=1, help="Runs replayed at once (default: 1)")
+    rerun.add_argument("--verifier", choices=["auto", "template", "llm", "mapreduce"],
+                       help="Verifier mode for the replays (default: VERIFIER_MODE)")
+    rerun.add_argument("--journal", action="store_true", help="Also journal the replays (source \"replay\")")
+
+    args = parser.parse_args()
+    if not os.path.isdir(args.dir):
+        print(f"No journal at {args.dir}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "stats":
+        report = aggregate(_records(args), by=args.by)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_stats(report)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 """
 LLM package for AI Operations Assistant
-Contains LLM client and utilities
+Contains the LLM client and its providers
 """
 
 from .client import LLMClient
+from .providers import LLMProvider, GroqProvider, OpenAICompatibleProvider
 
-__all__ = ["LLMClient"]
\ No newline at end of file
+__all__ = ["LLMClient", "LLMProvider", "GroqProvider", "OpenAICompatibleProvider"]
\ No newline at end of file
@@ -1,87 +1,341 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional
+import contextvars
 import json
-import sys
-import groq
-from config import Config
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from config import Config, ConfigurationError
+from llm.providers import LLMProvider, configured_providers, rank_providers
+from llm.schema import SchemaValidator, format_path, get_validator
+from observability.metrics import (LLM_TOKENS, LLM_LATENCY, LLM_REQUESTS, LLM_ESCALATIONS, LLM_COST,
+                                   LLM_PROVIDER_REQUESTS, LLM_FAILOVERS, LLM_HEDGES, LLM_REPAIRS)
+from observability import events
+from observability.tracing import tracer
+from storage.cassette import get_cassette
+
+# Model tiers for cascade routing: easy calls go to the small model and are
+# escalated to the large one when their output fails validation
+TIERS = ("small", "large")
+
+# Static system messages of the repair calls (shared, never modified)
+_REPAIR_FIELDS_PREFIX = {"role": "system", "content": (
+    "You repair JSON values so they match a JSON schema. Each quoted path below is followed by its "
+    "current value, its schema and the problems found. Fix only the listed problems and keep everything "
+    "else as it is. Respond with a JSON object mapping each quoted path to its corrected value. "
+    "Return ONLY valid JSON."
+)}
+_REPAIR_SYNTAX_PREFIX = {"role": "system", "content": (
+    "You repair malformed JSON. Fix the syntax of the JSON you are given without changing its content. "
+    "Return ONLY valid JSON."
+)}
+
+_FENCED_JSON_RE = re.compile(r'```json\n(.*?)\n```', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'(\{.*\})', re.DOTALL)
 
 
 class LLMClient:
-    def __init__(self):
-        # Check which provider to use
-        if hasattr(Config, 'GROQ_API_KEY') and Config.GROQ_API_KEY:
-            self.provider = "groq"
-            self.api_key = Config.GROQ_API_KEY
-            self.model = Config.GROQ_MODEL if hasattr(Config, 'GROQ_MODEL') else "mixtral-8x7b-32768"
-            print(f" Using Groq provider with model: {self.model}")
+    # Worker threads for hedged calls, shared by all clients
+    _hedge_pool = None
+    _hedge_lock = threading.Lock()
 
-        else:
-            print(" ERROR: No API key found for any LLM provider!")
-            print("   Please set either GROQ_API_KEY or OPENAI_API_KEY in .env")
-            sys.exit(1)
+    def __init__(self, providers: List[LLMProvider] = None):
+        self.providers = providers if providers is not None else configured_providers()
+        if not self.providers:
+            raise ConfigurationError(
+                "No API key found for any LLM provider. Please set either GROQ_API_KEY or OPENAI_API_KEY in .env"
+            )
+        # The preferred provider; its models identify calls in cassettes
+        self.provider = self.providers[0].name
+        self.models = self.providers[0].models
+        self.model = self.models["large"]
+
+    @staticmethod
+    def score_complexity(messages: List[Dict[str, str]], steps: Optional[int] = None, failures: int = 0) -> float:
+        """Rough difficulty of a request; below 1.0 the small model is expected to cope
+
+        Three steps, ~6000 prompt characters or any failed step each count as
+        hard on their own. An unknown step count is treated as hard.
+        """
+        prompt_chars = sum(len(message.get("content") or "") for message in messages)
+        score = prompt_chars / 6000
+        score += 1.0 if steps is None else steps / 3
+        if failures:
+            score += 1.0
+        return score
+
+    def route(self, messages: List[Dict[str, str]], steps: Optional[int] = None, failures: int = 0) -> str:
+        """Choose the model tier for a request"""
+        if not Config.MODEL_ROUTING:
+            return "large"
+        return "small" if self.score_complexity(messages, steps, failures) < 1.0 else "large"
 
     def generate_completion(self,
                             messages: List[Dict[str, str]],
                             temperature: float = 0.1,
-                            response_format: Dict[str, Any] = None) -> str:
+                            response_format: Dict[str, Any] = None,
+                            tier: str = "large") -> str:
         """Generate completion from LLM"""
-        try:
-            if self.provider == "groq":
-                return self._generate_groq_completion(messages, temperature, response_format)
-            else:
-                return self._generate_openai_completion(messages, temperature, response_format)
-        except Exception as e:
-            raise Exception(f"LLM generation failed: {str(e)}")
+        model = self.models[tier]
+        with tracer.start_span("llm.generate_completion", provider=self.provider, model=model, tier=tier) as span:
+            LLM_REQUESTS.inc(tier=tier)
+            cassette = get_cassette()
+            # Snapshot the request before the provider call can modify the messages
+            cassette_request = {
+                "messages": [dict(message) for message in messages],
+                "temperature": temperature,
+                "response_format": response_format,
+                "model": model
+            }
+            try:
+                if cassette is not None and cassette.mode == "replay":
+                    span.set_attribute("llm.replayed", True)
+                    content = cassette.replay("llm", cassette_request)
+                    events.emit(events.LLM_TOKEN, "llm", text=content, tier=tier)
+                    return content
 
-    def _generate_groq_completion(self,
-                                  messages: List[Dict[str, str]],
-                                  temperature: float,
-                                  response_format: Dict[str, Any] = None) -> str:
-        """Generate completion using Groq API"""
+                start = time.perf_counter()
+                with LLM_LATENCY.time(tier=tier):
+                    content = self._complete(messages, temperature, response_format, tier)
+                if cassette is not None:
+                    cassette.record("llm", cassette_request, content, time.perf_counter() - start)
+                return content
+            except Exception as e:
+                span.record_error(e)
+                raise Exception(f"LLM generation failed: {str(e)}")
 
+    def _complete(self, messages: List[Dict[str, str]], temperature: float,
+                  response_format: Dict[str, Any], tier: str) -> str:
+        """Try providers from the healthiest down, hedging the first one when it is slow"""
+        providers = rank_providers(self.providers)
+        # Streamed tokens would be emitted twice by a hedged pair
+        hedge = Config.LLM_HEDGING and not events.has_listeners()
+        errors = []
+        index = 0
+        while index < len(providers):
+            provider = providers[index]
+            backup = providers[index + 1] if index + 1 < len(providers) else None
+            delay = provider.health.percentile(0.95) if hedge and backup is not None else None
+            try:
+                if delay is not None:
+                    index += 2
+                    return self._hedged_call(provider, backup, delay, messages, temperature, response_format, tier)
+                index += 1
+                return self._call(provider, messages, temperature, response_format, tier)
+            except Exception as e:
+                # Errors from a hedged pair already name both providers
+                errors.append(str(e) if delay is not None else f"{provider.name}: {e}")
+                if index < len(providers):
+                    LLM_FAILOVERS.inc(provider=provider.name)
+        raise Exception("; ".join(errors))
 
-        client = groq.Groq(api_key=self.api_key)
+    def _call(self, provider: LLMProvider, messages: List[Dict[str, str]], temperature: float,
+              response_format: Dict[str, Any], tier: str) -> str:
+        """One provider call, recorded in the provider's health and the token/cost metrics"""
+        with tracer.start_span("llm.provider", provider=provider.name, model=provider.models[tier]) as span:
+            start = time.perf_counter()
+            try:
+                completion = provider.complete(messages, temperature, response_format, tier,
+                                               stream=events.has_listeners())
+            except Exception as e:
+                provider.health.record(False, time.perf_counter() - start)
+                LLM_PROVIDER_REQUESTS.inc(provider=provider.name, result="error")
+                span.record_error(e)
+                raise
+            duration = time.perf_counter() - start
+            provider.health.record(True, duration)
+            LLM_PROVIDER_REQUESTS.inc(provider=provider.name, result="ok")
+            events.emit(events.LLM_USAGE, "llm", provider=provider.name, tier=tier,
+                        prompt_tokens=completion.prompt_tokens, cached_tokens=completion.cached_tokens,
+                        completion_tokens=completion.completion_tokens, duration=duration)
 
-        # Groq doesn't have direct response_format parameter like OpenAI
-        # We need to add it to the system message
-        if response_format and response_format.get("type") == "json_object":
-            # Add JSON instruction to the first system message
-            if messages and messages[0]["role"] == "system":
-                messages[0][
-                    "content"] += "\n\nIMPORTANT: You MUST respond with valid JSON only. Do not include any other text, explanations, or markdown formatting."
-            else:
-                messages.insert(0, {
-                    "role": "system",
-                    "content": "You MUST respond with valid JSON only. Do not include any other text, explanations, or markdown formatting."
-                })
+            LLM_TOKENS.inc(completion.prompt_tokens, type="prompt")
+            LLM_TOKENS.inc(completion.cached_tokens, type="cached")
+            LLM_TOKENS.inc(completion.completion_tokens, type="completion")
+            input_cost, output_cost = provider.costs[tier]
+            # Prompt tokens served from the provider's prompt cache are billed at a discount
+            input_tokens = completion.prompt_tokens - completion.cached_tokens * Config.LLM_CACHED_INPUT_DISCOUNT
+            LLM_COST.inc((input_tokens * input_cost + completion.completion_tokens * output_cost) / 1_000_000, tier=tier)
+            span.set_attribute("llm.prompt_tokens", completion.prompt_tokens)
+            span.set_attribute("llm.cached_tokens", completion.cached_tokens)
+            span.set_attribute("llm.completion_tokens", completion.completion_tokens)
+            return completion.content
 
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=temperature,
-            stream=False
-        )
+    def _hedged_call(self, primary: LLMProvider, backup: LLMProvider, delay: float,
+                     messages: List[Dict[str, str]], temperature: float,
+                     response_format: Dict[str, Any], tier: str) -> str:
+        """Call `primary`; if it has not answered after `delay` seconds, call `backup` too and take the first answer
 
-        return response.choices[0].message.content
+        Either way both providers have been tried when this raises.
+        """
+        with LLMClient._hedge_lock:
+            if LLMClient._hedge_pool is None:
+                LLMClient._hedge_pool = ThreadPoolExecutor(max_workers=Config.HTTP_POOL_SIZE,
+                                                           thread_name_prefix="llm-hedge")
+        pool = LLMClient._hedge_pool
 
-    def generate_json(self,
-                      messages: List[Dict[str, str]],
-                      temperature: float = 0.1) -> Dict[str, Any]:
-        """Generate JSON response from LLM"""
+        first = pool.submit(contextvars.copy_context().run, self._call, primary, messages, temperature,
+                            response_format, tier)
         try:
-            content = self.generate_completion(messages, temperature)
+            return first.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        except Exception as e:
+            # Failed before it was slow: plain failover to the backup
+            LLM_FAILOVERS.inc(provider=primary.name)
+            try:
+                return self._call(backup, messages, temperature, response_format, tier)
+            except Exception as backup_error:
+                raise Exception(f"{primary.name}: {e}; {backup.name}: {backup_error}")
 
-            # Try to extract JSON if it's wrapped in markdown
-            import re
-            json_match = re.search(r'```json\n(.*?)\n```', content, re.DOTALL)
-            if json_match:
-                content = json_match.group(1)
+        second = pool.submit(contextvars.copy_context().run, self._call, backup, messages, temperature,
+                             response_format, tier)
+        tracer.current_span().set_attribute("llm.hedged", True)
+        errors = []
+        # The slower call is left to finish in the background; its latency still feeds the provider's health
+        for future in as_completed((first, second)):
+            try:
+                content = future.result()
+            except Exception as e:
+                errors.append(f"{(primary if future is first else backup).name}: {e}")
+                continue
+            LLM_HEDGES.inc(winner="primary" if future is first else "backup")
+            return content
+        raise Exception("; ".join(errors))
 
-            # Remove any non-JSON text before/after
-            json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-            if json_match:
-                content = json_match.group(1)
+    def provider_health(self) -> Dict[str, Dict[str, Any]]:
+        return {provider.name: provider.health.snapshot() for provider in self.providers}
 
-            return json.loads(content)
+    def generate_json(self,
+                      messages: List[Dict[str, str]],
+                      temperature: float = 0.1,
+                      tier: str = "large",
+                      validate: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+                      schema: Dict[str, Any] = None,
+                      repair_context: str = None) -> Dict[str, Any]:
+        """Generate JSON response from LLM
+
+        The provider's JSON mode is requested, constrained to `schema` where
+        the provider supports it. The response is checked against `schema`
+        with a compiled validator, and invalid parts are fixed by one targeted
+        repair call (given `repair_context`, e.g. the user's task) instead of
+        regenerating the whole response. `validate` may check or normalize the
+        parsed JSON and raise ValueError to reject it. Small-tier responses
+        that still fail to parse or validate are retried once on the large
+        model.
+        """
+        if schema is not None:
+            response_format = {"type": "json_schema", "json_schema": {"name": "response", "schema": schema}}
+        else:
+            response_format = {"type": "json_object"}
+        content = ""
+        try:
+            content = self.generate_completion(messages, temperature, response_format, tier)
+            try:
+                result = self._parse_json(content)
+            except json.JSONDecodeError:
+                if tier != "large":
+                    raise
+                result = self._repair_syntax(content, tier)
+            if schema is not None:
+                result = self._check_schema(result, get_validator(schema), tier, repair_context)
+            return validate(result) if validate else result
         except json.JSONDecodeError as e:
+            if tier != "large":
+                LLM_ESCALATIONS.inc(reason="json")
+                return self.generate_json(messages, temperature, "large", validate, schema, repair_context)
             print(f"  Raw LLM response that failed to parse: {content[:200]}...")
-            raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
+        except ValueError:
+            if tier != "large":
+                LLM_ESCALATIONS.inc(reason="validation")
+                return self.generate_json(messages, temperature, "large", validate, schema, repair_context)
+            raise
+
+    @staticmethod
+    def _parse_json(content: str) -> Any:
+        # Try to extract JSON if it's wrapped in markdown
+        json_match = _FENCED_JSON_RE.search(content)
+        if json_match:
+            content = json_match.group(1)
+
+        # Remove any non-JSON text before/after
+        json_match = _JSON_OBJECT_RE.search(content)
+        if json_match:
+            content = json_match.group(1)
+
+        return json.loads(content)
+
+    def _check_schema(self, document: Any, validator: SchemaValidator, tier: str, context: str = None) -> Any:
+        """Validate against the schema, repairing the invalid parts once; raises ValueError if they stay invalid"""
+        document, errors = validator.validate(document)
+        if not errors:
+            return document
+
+        with tracer.start_span("llm.repair", kind="schema", errors=len(errors)):
+            try:
+                document = self._repair_fields(document, errors, validator, tier, context)
+            except Exception as e:
+                print(f"⚠️  JSON repair failed: {e}")
+            document, errors = validator.validate(document)
+        LLM_REPAIRS.inc(kind="schema", result="failed" if errors else "fixed")
+        if errors:
+            raise ValueError("Response does not match the schema: "
+                             + "; ".join(f"{format_path(path)} {message}" for path, message in errors[:5]))
+        return document
+
+    def _repair_fields(self, document: Any, errors, validator: SchemaValidator, tier: str, context: str = None) -> Any:
+        """Ask for corrected values of only the invalid parts: the list item (e.g. plan step) around each error"""
+        fragments: Dict[tuple, List[str]] = {}
+        for path, message in errors:
+            cut = next((i + 1 for i, part in enumerate(path) if isinstance(part, int)), 0)
+            if not isinstance(document, dict):
+                cut = 0
+            fragments.setdefault(path[:cut], []).append(f"{format_path(path[cut:]) if path[cut:] else 'value'} {message}")
+        if () in fragments:
+            # A problem at the top level: the whole document is the fragment
+            fragments = {(): [problem for problems in fragments.values() for problem in problems]}
+
+        sections = []
+        for fragment, problems in fragments.items():
+            sections.append(
+                f'"{format_path(fragment)}":\n'
+                f"  value: {json.dumps(_value_at(document, fragment), ensure_ascii=False, default=str)}\n"
+                f"  schema: {json.dumps(validator.subschema(fragment, document))}\n"
+                + "".join(f"  - {problem}\n" for problem in problems)
+            )
+        messages = [
+            _REPAIR_FIELDS_PREFIX,
+            {"role": "user", "content": (f"Context: {context}\n\n" if context else "") + "\n".join(sections)}
+        ]
+        fixes = self._parse_json(self.generate_completion(messages, 0.0, {"type": "json_object"}, tier))
+        if not isinstance(fixes, dict):
+            raise ValueError("Repair response is not a JSON object")
+
+        for fragment in fragments:
+            key = format_path(fragment)
+            if key not in fixes:
+                continue
+            if not fragment:
+                document = fixes[key]
+            else:
+                _value_at(document, fragment[:-1])[fragment[-1]] = fixes[key]
+        return document
+
+    def _repair_syntax(self, content: str, tier: str) -> Any:
+        """One call to turn an unparseable response into valid JSON; raises JSONDecodeError if that fails too"""
+        messages = [_REPAIR_SYNTAX_PREFIX, {"role": "user", "content": content}]
+        with tracer.start_span("llm.repair", kind="syntax"):
+            try:
+                result = self._parse_json(self.generate_completion(messages, 0.0, {"type": "json_object"}, tier))
+            except json.JSONDecodeError:
+                LLM_REPAIRS.inc(kind="syntax", result="failed")
+                raise
+        LLM_REPAIRS.inc(kind="syntax", result="fixed")
+        return result
+
+
+def _value_at(document: Any, path: tuple) -> Any:
+    for part in path:
+        document = document[part]
+    return document
@@ -0,0 +1,287 @@
+"""
+LLM providers and their health
+
+A provider is one chat-completions endpoint with a model per tier: Groq
+through its SDK, or any OpenAI-compatible server (OpenAI, vLLM, Ollama,
+llama.cpp, ...) over plain HTTP. Every call's outcome and latency is recorded
+in the provider's health, which LLMClient uses to order providers, fail over
+and decide when to hedge a slow request.
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from config import Config
+from observability import events
+
+# Each point of error rate adds this many times the median latency to the score
+ERROR_PENALTY = 4.0
+
+
+class ProviderHealth:
+    """Outcomes and latencies of a provider's calls in the last LLM_HEALTH_WINDOW seconds"""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples = deque(maxlen=max_samples)  # (time, success, latency)
+        self._consecutive_failures = 0
+        self._unavailable_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, success: bool, latency: float):
+        with self._lock:
+            self._samples.append((time.monotonic(), success, latency))
+            if success:
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= Config.LLM_PROVIDER_MAX_FAILURES:
+                    # Give a failing provider a rest instead of paying its timeout on every call
+                    self._unavailable_until = time.monotonic() + Config.LLM_PROVIDER_COOLDOWN
+
+    def _recent(self):
+        horizon = time.monotonic() - Config.LLM_HEALTH_WINDOW
+        with self._lock:
+            while self._samples and self._samples[0][0] < horizon:
+                self._samples.popleft()
+            return list(self._samples)
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile of recent successful calls, None until there are enough of them"""
+        latencies = sorted(latency for _, success, latency in self._recent() if success)
+        if len(latencies) < Config.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def score(self) -> Optional[float]:
+        """Median recent latency inflated by the recent error rate (lower is better), None without recent calls"""
+        samples = self._recent()
+        if not samples:
+            return None
+        latencies = sorted(latency for _, success, latency in samples if success)
+        # Without a single success the timeouts are the best latency estimate
+        median = (latencies or sorted(latency for _, _, latency in samples))[len(latencies or samples) // 2]
+        error_rate = sum(1 for _, success, _ in samples if not success) / len(samples)
+        return median * (1 + ERROR_PENALTY * error_rate)
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = self._recent()
+        score = self.score()
+        return {
+            "available": self.available,
+            "score": round(score, 4) if score is not None else None,
+            "p95": self.percentile(0.95),
+            "calls": len(samples),
+            "error_rate": sum(1 for _, success, _ in samples if not success) / len(samples) if samples else 0.0
+        }
+
+
+class Completion(NamedTuple):
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens the provider served from its prompt cache
+    cached_tokens: int = 0
+
+
+def _cached_tokens(usage: Any) -> int:
+    """cached_tokens from OpenAI-style usage (prompt_tokens_details), as an object or a dict"""
+    if isinstance(usage, dict):
+        return (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", 0) or 0
+
+
+class LLMProvider(ABC):
+    """One chat-completions endpoint"""
+
+    def __init__(self, name: str, models: Dict[str, str], costs: Dict[str, Tuple[float, float]]):
+        self.name = name
+        self.models = models
+        self.costs = costs
+        self.health = ProviderHealth()
+
+    @abstractmethod
+    def complete(self, messages: List[Dict[str, str]], temperature: float,
+                 response_format: Dict[str, Any], tier: str, stream: bool) -> Completion:
+        """Run one chat completion; `messages` is shared with the caller and must not be modified"""
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, {self.models!r})"
+
+
+class GroqProvider(LLMProvider):
+    def __init__(self, api_key: str, base_url: str = None, max_retries: int = 2):
+        super().__init__("groq", {"small": Config.GROQ_SMALL_MODEL, "large": Config.GROQ_MODEL}, Config.LLM_COSTS)
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self._client = None
+
+    def _get_client(self):
+        # Reuse one client (and its connection pool) across calls; the SDK is
+        # imported on first use to keep module import cheap
+        if self._client is None:
+            import groq
+            self._client = groq.Groq(api_key=self.api_key, base_url=self.base_url,
+                                     timeout=Config.LLM_TIMEOUT, max_retries=self.max_retries)
+        return self._client
+
+    def complete(self, messages, temperature, response_format, tier, stream):
+        client = self._get_client()
+        options = {}
+        if response_format:
+            # Groq's JSON mode; schemas are enforced by the client's validator, since
+            # json_schema output is only available on some Groq models
+            options["response_format"] = {"type": "json_object"}
+
+        if stream:
+            parts = []
+            usage = None
+            for chunk in client.chat.completions.create(model=self.models[tier], messages=messages,
+                                                        temperature=temperature, stream=True, **options):
+                if chunk.choices:
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        parts.append(text)
+                        events.emit(events.LLM_TOKEN, "llm", text=text, tier=tier)
+                # Groq reports usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = getattr(chunk, "usage", None) or getattr(x_groq, "usage", None) or usage
+            content = "".join(parts)
+        else:
+            response = client.chat.completions.create(model=self.models[tier], messages=messages,
+                                                      temperature=temperature, stream=False, **options)
+            content, usage = response.choices[0].message.content, getattr(response, "usage", None)
+
+        return Completion(content,
+                          getattr(usage, "prompt_tokens", 0) or 0,
+                          getattr(usage, "completion_tokens", 0) or 0,
+                          _cached_tokens(usage))
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """Any server implementing POST {base_url}/chat/completions, called with requests"""
+
+    def __init__(self, name: str, base_url: str, api_key: str = None,
+                 models: Dict[str, str] = None, costs: Dict[str, Tuple[float, float]] = None,
+                 json_mode: str = "json_schema"):
+        super().__init__(name, models, costs or {"small": (0.0, 0.0), "large": (0.0, 0.0)})
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        # json_schema, json_object or off, depending on what the server supports
+        self.json_mode = json_mode
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=Config.HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            if self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+            self._session = session
+        return self._session
+
+    def complete(self, messages, temperature, response_format, tier, stream):
+        payload = {"model": self.models[tier], "messages": messages, "temperature": temperature, "stream": stream}
+        if response_format and self.json_mode != "off":
+            if response_format.get("type") == "json_schema" and self.json_mode == "json_object":
+                response_format = {"type": "json_object"}
+            payload["response_format"] = response_format
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+
+        response = self._get_session().post(f"{self.base_url}/chat/completions", json=payload,
+                                            timeout=Config.LLM_TIMEOUT, stream=stream)
+        response.raise_for_status()
+
+        if not stream:
+            body = response.json()
+            usage = body.get("usage") or {}
+            return Completion(body["choices"][0]["message"]["content"], usage.get("prompt_tokens", 0),
+                              usage.get("completion_tokens", 0), _cached_tokens(usage))
+
+        parts = []
+        usage = {}
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                for choice in chunk.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        parts.append(text)
+                        events.emit(events.LLM_TOKEN, "llm", text=text, tier=tier)
+                usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+        return Completion("".join(parts), usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+                          _cached_tokens(usage))
+
+
+_providers = None
+_providers_lock = threading.Lock()
+
+
+def configured_providers() -> List[LLMProvider]:
+    """Providers from LLM_PROVIDERS that have credentials or an endpoint, in preference order
+
+    Shared by every LLMClient in the process, so their health reflects all calls.
+    """
+    global _providers
+    if _providers is None:
+        with _providers_lock:
+            if _providers is None:
+                names = [name for name in Config.LLM_PROVIDERS
+                         if (name == "groq" and Config.GROQ_API_KEY)
+                         or (name == "openai" and (Config.OPENAI_API_KEY or Config.OPENAI_BASE_URL))]
+                providers = []
+                for name in names:
+                    if name == "groq":
+                        # With a provider to fail over to, retrying inside the SDK only delays the failover
+                        providers.append(GroqProvider(Config.GROQ_API_KEY, Config.GROQ_BASE_URL,
+                                                      max_retries=2 if len(names) == 1 else 0))
+                    else:
+                        providers.append(OpenAICompatibleProvider(
+                            "openai",
+                            Config.OPENAI_BASE_URL or "https://api.openai.com/v1",
+                            Config.OPENAI_API_KEY,
+                            {"small": Config.OPENAI_SMALL_MODEL, "large": Config.OPENAI_MODEL},
+                            Config.OPENAI_COSTS,
+                            Config.OPENAI_JSON_MODE
+                        ))
+                _providers = providers
+    return _providers
+
+
+def rank_providers(providers: List[LLMProvider]) -> List[LLMProvider]:
+    """Order providers for a call
+
+    Preference order, except that providers scoring worse than
+    LLM_ROUTING_TOLERANCE times the best available score are degraded and
+    go last (best score first), behind them only those cooling down after
+    repeated failures. Providers without recent calls are not degraded, so a
+    preferred provider is tried again once its bad samples have aged out.
+    """
+    scores = [provider.health.score() for provider in providers]
+    available = [provider.health.available for provider in providers]
+    best = min((score for score, up in zip(scores, available) if score is not None and up), default=None)
+
+    def key(index):
+        score = scores[index]
+        degraded = score is not None and best is not None and score > best * Config.LLM_ROUTING_TOLERANCE
+        return (not available[index], degraded, score if degraded else 0.0, index)
+
+    return [providers[index] for index in sorted(range(len(providers)), key=key)]
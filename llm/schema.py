@@ -0,0 +1,242 @@
+"""
+Compiled JSON-schema validation for LLM output
+
+Supports the subset of JSON Schema the application's schemas use: type,
+properties, required, additionalProperties (bool), items, minItems, enum,
+const, minLength and anyOf. A schema is compiled once into nested closures,
+so validating a response is a walk over the document with no schema
+interpretation. anyOf branches that all pin the same property with a const
+(like a plan step's "tool") are dispatched on that property, which keeps the
+errors specific to the chosen branch.
+
+Validators coerce numeric and boolean strings ("5", "5.0", "true") and
+integral floats (5.0 for an integer) in place, since models often write them
+that way, and report every remaining problem as a
+(path, message) pair, path being a tuple of keys and list indexes.
+"""
+import json
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Path = Tuple[Any, ...]
+Errors = List[Tuple[Path, str]]
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None
+}
+
+
+def _coerce(value: Any, types: Tuple[str, ...]) -> Any:
+    """Convert a quoted scalar or an integral float to the expected type, or return it unchanged"""
+    if isinstance(value, float) and "integer" in types and value.is_integer():
+        return int(value)
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    if "integer" in types or "number" in types:
+        if "integer" in types:
+            try:
+                return int(text)
+            except ValueError:
+                pass
+        try:
+            number = float(text)
+        except ValueError:
+            number = None
+        # "5.0" is an integer too; "nan" and "inf" are never numbers here
+        if number is not None and math.isfinite(number):
+            if "integer" in types and number.is_integer():
+                return int(number)
+            if "number" in types:
+                return number
+    if "boolean" in types and text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    return value
+
+
+def format_path(path: Path) -> str:
+    """("steps", 1, "tool") -> "steps[1].tool" """
+    text = ""
+    for part in path:
+        text += f"[{part}]" if isinstance(part, int) else (f".{part}" if text else str(part))
+    return text or "$"
+
+
+def _discriminator(branches: List[Dict[str, Any]]) -> Optional[str]:
+    """The property every anyOf branch pins with a const, if there is one"""
+    shared = None
+    for branch in branches:
+        pinned = {name for name, prop in (branch.get("properties") or {}).items() if "const" in prop}
+        shared = pinned if shared is None else shared & pinned
+    return sorted(shared)[0] if shared else None
+
+
+def _compile(schema: Dict[str, Any]) -> Callable[[Any, Path, Errors], Any]:
+    checks = []
+
+    if "anyOf" in schema:
+        branches = schema["anyOf"]
+        compiled = [_compile(branch) for branch in branches]
+        key = _discriminator(branches)
+        if key is not None:
+            by_value = {branch["properties"][key]["const"]: check for branch, check in zip(branches, compiled)}
+
+            def check_any(value, path, errors):
+                if not isinstance(value, dict) or value.get(key) not in by_value:
+                    errors.append((path + (key,), f"must be one of {sorted(by_value)}"))
+                    return value
+                return by_value[value[key]](value, path, errors)
+        else:
+            def check_any(value, path, errors):
+                for check in compiled:
+                    branch_errors = []
+                    result = check(value, path, branch_errors)
+                    if not branch_errors:
+                        return result
+                errors.append((path, "does not match any of the allowed schemas"))
+                return value
+        checks.append(check_any)
+
+    if "type" in schema:
+        types = (schema["type"],) if isinstance(schema["type"], str) else tuple(schema["type"])
+        tests = [_TYPES[name] for name in types]
+
+        def check_type(value, path, errors):
+            if not any(test(value) for test in tests):
+                value = _coerce(value, types)
+                if not any(test(value) for test in tests):
+                    errors.append((path, f"must be of type {' or '.join(types)}"))
+            return value
+        checks.append(check_type)
+
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append((path, f"must be {json.dumps(const)}"))
+            return value
+        checks.append(check_const)
+
+    if "enum" in schema:
+        allowed = schema["enum"]
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append((path, f"must be one of {allowed}"))
+            return value
+        checks.append(check_enum)
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_length(value, path, errors):
+            if isinstance(value, str) and len(value) < min_length:
+                errors.append((path, "must not be empty" if min_length == 1 else f"must have at least {min_length} characters"))
+            return value
+        checks.append(check_length)
+
+    if "properties" in schema or "required" in schema or schema.get("additionalProperties") is False:
+        properties = {name: _compile(prop) for name, prop in (schema.get("properties") or {}).items()}
+        required = tuple(schema.get("required") or ())
+        closed = schema.get("additionalProperties") is False
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return value
+            for name in required:
+                if name not in value:
+                    errors.append((path + (name,), "required property is missing"))
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    value[name] = check(item, path + (name,), errors)
+                elif closed:
+                    errors.append((path + (name,), "is not an allowed property"))
+            return value
+        checks.append(check_object)
+
+    if "items" in schema or "minItems" in schema:
+        check_item = _compile(schema["items"]) if "items" in schema else None
+        min_items = schema.get("minItems", 0)
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return value
+            if len(value) < min_items:
+                errors.append((path, f"must have at least {min_items} item(s)"))
+            if check_item is not None:
+                for index, item in enumerate(value):
+                    value[index] = check_item(item, path + (index,), errors)
+            return value
+        checks.append(check_array)
+
+    def check(value, path, errors):
+        for step in checks:
+            value = step(value, path, errors)
+        return value
+    return check
+
+
+class SchemaValidator:
+    """A compiled schema; validate() returns the (coerced) document and its errors"""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self._check = _compile(schema)
+
+    def validate(self, document: Any) -> Tuple[Any, Errors]:
+        errors: Errors = []
+        document = self._check(document, (), errors)
+        return document, errors
+
+    def subschema(self, path: Path, document: Any) -> Dict[str, Any]:
+        """Schema of the value at `path` in `document` (anyOf branches resolved against the document)"""
+        schema, value = self.schema, document
+        for part in path:
+            schema = self._resolve(schema, value)
+            if isinstance(part, int):
+                schema = schema.get("items", {})
+            else:
+                schema = (schema.get("properties") or {}).get(part, {})
+            value = value[part] if isinstance(value, (dict, list)) and _has(value, part) else None
+        return self._resolve(schema, value)
+
+    @staticmethod
+    def _resolve(schema: Dict[str, Any], value: Any) -> Dict[str, Any]:
+        branches = schema.get("anyOf")
+        if not branches:
+            return schema
+        key = _discriminator(branches)
+        if key is not None and isinstance(value, dict):
+            for branch in branches:
+                if branch["properties"][key]["const"] == value.get(key):
+                    return branch
+        return schema
+
+
+def _has(container, part) -> bool:
+    if isinstance(container, list):
+        return isinstance(part, int) and 0 <= part < len(container)
+    return part in container
+
+
+_validators: Dict[str, SchemaValidator] = {}
+_validators_lock = threading.Lock()
+
+
+def get_validator(schema: Dict[str, Any]) -> SchemaValidator:
+    """Compiled validator for a schema, compiled once per distinct schema"""
+    key = json.dumps(schema, sort_keys=True)
+    validator = _validators.get(key)
+    if validator is None:
+        with _validators_lock:
+            validator = _validators.setdefault(key, SchemaValidator(schema))
+    return validator
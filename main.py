@@ -4,100 +4,220 @@ AI Operations Assistant
 - Interactive CLI when run directly
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Response
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
 import json
+import time
 import uuid
 
 from agents.planner import PlannerAgent
 from agents.executor import ExecutorAgent
 from agents.verifier import VerifierAgent
+from agents.pipeline import refresh_task, run_task
+from agents.session import Session
+from llm.providers import configured_providers
+from api.compression import CompressionMiddleware
+from api.serialization import ORJSONResponse, build_task_response
+from config import Config
+from observability.metrics import registry as metrics_registry, TASK_LATENCY
+from storage.task_store import create_task_store
 
 # ============================================================
 # FastAPI App
 # ============================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup hook: validate configuration once, not at import time
+    Config.validate()
+    get_agents()
+    yield
+
+
 app = FastAPI(
     title="AI Operations Assistant",
     description="Multi-agent system for executing natural language tasks",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
+app.add_middleware(CompressionMiddleware, minimum_size=Config.COMPRESSION_MIN_SIZE)
+
+# Agents are created on first use (or at startup), never at import time
+_agents = None
+
 
-# Initialize agents
-planner = PlannerAgent()
-executor = ExecutorAgent()
-verifier = VerifierAgent()
+def get_agents():
+    """Return the shared (planner, executor, verifier), creating them once"""
+    global _agents
+    if _agents is None:
+        _agents = (PlannerAgent(), ExecutorAgent(), VerifierAgent())
+    return _agents
 
 
 class TaskRequest(BaseModel):
     task: str
     max_steps: Optional[int] = 10
+    verifier_mode: Optional[str] = Field(
+        None, pattern="^(auto|template|llm|mapreduce)$",
+        description="auto: format known results without the LLM, template: never call the LLM, "
+                    "llm: always ask the LLM for a natural-language answer, "
+                    "mapreduce: summarize each step concurrently, then merge"
+    )
+
+
+class ExecutionResults(BaseModel):
+    steps: List[Dict[str, Any]]
 
 
 class TaskResponse(BaseModel):
+    """Shape of a task response (documentation only)
+
+    Handlers build the response with api.serialization.build_task_response and
+    return it encoded with orjson, without validating it against this model.
+    Only task_id and status are always present: the other fields are left out
+    as `verbosity` or `fields` ask, and `refresh` is only sent by the refresh
+    endpoint.
+    """
     task_id: str
     status: str
     plan: Optional[Dict[str, Any]] = None
-    execution_results: Optional[Dict[str, Any]] = None
+    execution_results: Optional[ExecutionResults] = None
     final_result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    refresh: Optional[Dict[str, Any]] = None
+
 
+# Route arguments of the task endpoints
+TASK_RESPONSE_DOCS = {"response_class": ORJSONResponse, "responses": {200: {"model": TaskResponse}}}
 
-# In-memory storage (replace with DB in production)
-tasks_db = {}
 
+# Task results (shared across workers when CACHE_BACKEND=sqlite)
+tasks_db = create_task_store()
 
-@app.post("/execute", response_model=TaskResponse)
-async def execute_task(request: TaskRequest):
+
+VERBOSITY_QUERY = Query("full", pattern="^(full|compact|minimal)$",
+                        description="full: everything, compact: no raw execution_results, minimal: final result only")
+FIELDS_QUERY = Query(None, description="Comma-separated top-level fields to return (overrides verbosity)")
+
+
+# The task handlers block on LLM and tool calls, so they are plain functions:
+# FastAPI runs them in its thread pool instead of on the event loop
+@app.post("/execute", **TASK_RESPONSE_DOCS)
+def execute_task(request: TaskRequest, verbosity: str = VERBOSITY_QUERY, fields: Optional[str] = FIELDS_QUERY):
     task_id = str(uuid.uuid4())[:8]
+    start = time.perf_counter()
 
     try:
-        plan = planner.create_plan(request.task)
-        execution_results = executor.execute_plan(plan["steps"])
-        final_result = verifier.verify_and_format(request.task, execution_results)
-
-        tasks_db[task_id] = {
+        planner, executor, verifier = get_agents()
+        output = run_task(planner, executor, verifier, request.task, source="api",
+                          verifier_mode=request.verifier_mode, run_id=task_id)
+        plan, execution_results, final_result = output["plan"], output["execution_results"], output["final_result"]
+        TASK_LATENCY.observe(time.perf_counter() - start, status=final_result["status"])
+
+        tasks_db.save(task_id, {
+            "task": request.task,
+            "verifier_mode": request.verifier_mode,
             "plan": plan,
             "execution_results": execution_results,
             "final_result": final_result
-        }
+        })
 
-        return TaskResponse(
+        return ORJSONResponse(build_task_response(
             task_id=task_id,
             status="completed",
             plan=plan,
-            execution_results={"steps": execution_results},
-            final_result=final_result
-        )
+            execution_results=execution_results,
+            final_result=final_result,
+            verbosity=verbosity,
+            fields=fields
+        ))
 
     except Exception as e:
-        return TaskResponse(
+        TASK_LATENCY.observe(time.perf_counter() - start, status="error")
+        return ORJSONResponse(build_task_response(
             task_id=task_id,
             status="failed",
-            error=str(e)
-        )
+            error=str(e),
+            verbosity=verbosity,
+            fields=fields
+        ))
 
 
-@app.get("/tasks/{task_id}", response_model=TaskResponse)
-async def get_task_result(task_id: str):
-    if task_id not in tasks_db:
+@app.get("/tasks/{task_id}", **TASK_RESPONSE_DOCS)
+def get_task_result(task_id: str, verbosity: str = VERBOSITY_QUERY, fields: Optional[str] = FIELDS_QUERY):
+    task_data = tasks_db.get(task_id)
+    if task_data is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    task_data = tasks_db[task_id]
-
-    return TaskResponse(
+    return ORJSONResponse(build_task_response(
         task_id=task_id,
         status="completed",
         plan=task_data["plan"],
-        execution_results={"steps": task_data["execution_results"]},
-        final_result=task_data["final_result"]
-    )
+        execution_results=task_data["execution_results"],
+        final_result=task_data["final_result"],
+        verbosity=verbosity,
+        fields=fields
+    ))
+
+
+@app.post("/tasks/{task_id}/refresh", **TASK_RESPONSE_DOCS)
+def refresh_task_result(task_id: str,
+                        max_age: Optional[float] = Query(
+                            None, ge=0,
+                            description="Re-execute steps older than this many seconds instead of each "
+                                        "tool's freshness window (0 re-executes every step)"),
+                        verbosity: str = VERBOSITY_QUERY, fields: Optional[str] = FIELDS_QUERY):
+    """Re-execute the stale steps of a stored task, verifying again only if a result changed"""
+    task_data = tasks_db.get(task_id)
+    if task_data is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task = task_data.get("task") or task_data["plan"].get("task", "")
+    try:
+        # Not observed in TASK_LATENCY: a refresh is only part of a run (see aiops_task_refreshes_total)
+        _, executor, verifier = get_agents()
+        output = refresh_task(executor, verifier, task, task_data["plan"], task_data["execution_results"],
+                              task_data["final_result"], max_age=max_age,
+                              verifier_mode=task_data.get("verifier_mode"), run_id=task_id)
+    except Exception as e:
+        return ORJSONResponse(build_task_response(
+            task_id=task_id,
+            status="failed",
+            error=str(e),
+            verbosity=verbosity,
+            fields=fields
+        ))
+
+    tasks_db.save(task_id, dict(task_data, execution_results=output["execution_results"],
+                                final_result=output["final_result"], refreshed_at=output["refresh"]["refreshed_at"]))
+
+    return ORJSONResponse(build_task_response(
+        task_id=task_id,
+        status="completed",
+        plan=output["plan"],
+        execution_results=output["execution_results"],
+        final_result=output["final_result"],
+        refresh=output["refresh"],
+        verbosity=verbosity,
+        fields=fields
+    ))
 
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "AI Operations Assistant"}
+    return {
+        "status": "healthy",
+        "service": "AI Operations Assistant",
+        "llm_providers": {provider.name: provider.health.snapshot() for provider in configured_providers()}
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 
 # ============================================================
@@ -105,8 +225,13 @@ async def health_check():
 # ============================================================
 
 if __name__ == "__main__":
+    Config.validate()
+    planner, executor, verifier = get_agents()
     print("AI Operations Assistant (CLI Mode)")
-    print("Type your task below (or 'exit' to quit)\n")
+    print("Type your task below ('new' starts a new conversation, 'exit' quits)\n")
+
+    # Follow-ups ("and what about Paris?") build on the earlier tasks of the conversation
+    session = Session()
 
     while True:
         try:
@@ -120,14 +245,23 @@ if __name__ == "__main__":
                 print("Exiting.")
                 break
 
-            print("\nPlanning...")
-            plan = planner.create_plan(task)
+            if task.lower() == "new":
+                session.clear()
+                print("Started a new conversation\n")
+                continue
 
-            print("\nExecuting...")
-            execution_results = executor.execute_plan(plan["steps"])
+            def show_progress(phase, output):
+                if phase == "planning":
+                    print("\nExecuting...")
+                elif phase == "execution":
+                    reused = sum(1 for result in output if "reused_from" in result)
+                    if reused:
+                        print(f"  Reused {reused} result(s) from earlier in this conversation")
+                    print("\nVerifying...")
 
-            print("\nVerifying...")
-            final_result = verifier.verify_and_format(task, execution_results)
+            print("\nPlanning...")
+            final_result = run_task(planner, executor, verifier, task, source="cli", session=session,
+                                    on_phase=show_progress)["final_result"]
 
             print("\n" + "=" * 60)
             print("🤖 AI OPERATIONS ASSISTANT - RESULTS")
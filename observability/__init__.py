@@ -0,0 +1,10 @@
+"""
+Observability package for AI Operations Assistant
+Contains metrics, tracing and progress event instrumentation
+"""
+
+from .metrics import registry, Counter, Histogram, MetricsRegistry
+from .tracing import tracer, Tracer, Span
+from .events import AgentEvent, listen
+
+__all__ = ["registry", "Counter", "Histogram", "MetricsRegistry", "tracer", "Tracer", "Span", "AgentEvent", "listen"]
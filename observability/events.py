@@ -0,0 +1,106 @@
+"""
+Progress events from the agents, tools and LLM client
+
+Listeners are scoped to the current context (like spans), so a callback
+registered around one task only sees that task's events even when the agents
+are shared by concurrent requests; work handed to thread pools with a copied
+context reports to the same listeners.
+
+    from observability.events import listen
+
+    with listen(lambda event: print(event.type, event.data)):
+        plan = planner.create_plan(task)
+
+Event types:
+    phase_start / phase_end   planner, executor or verifier phase
+    step_start / step_end     one plan step (step, tool, success, duration)
+    llm_token                 a streamed chunk of LLM output (text, tier)
+    llm_usage                 one LLM provider call finished (provider, tier, token counts, duration)
+    cache_hit                 a result was served from a cache (cache: plan, tool or verifier_summary)
+    retry                     a tool HTTP request is retried (tool, attempt, error)
+
+LLM responses are streamed only while a listener wants llm_token events;
+listeners registered with tokens=False (like the run journal) do not get
+them and leave the LLM calls unstreamed.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+PHASE_START = "phase_start"
+PHASE_END = "phase_end"
+STEP_START = "step_start"
+STEP_END = "step_end"
+LLM_TOKEN = "llm_token"
+LLM_USAGE = "llm_usage"
+CACHE_HIT = "cache_hit"
+RETRY = "retry"
+
+# (callback, wants llm_token events) pairs
+_listeners = contextvars.ContextVar("event_listeners", default=())
+
+
+class AgentEvent:
+    __slots__ = ("type", "source", "data", "timestamp")
+
+    def __init__(self, type: str, source: str, data: Dict[str, Any]):
+        self.type = type
+        self.source = source
+        self.data = data
+        self.timestamp = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"type": self.type, "source": self.source, "timestamp": self.timestamp, **self.data}
+
+    def __repr__(self):
+        return f"AgentEvent({self.type!r}, {self.source!r}, {self.data!r})"
+
+
+@contextmanager
+def listen(callback: Callable[[AgentEvent], None], tokens: bool = True):
+    """Send every event emitted in this context to `callback` (llm_token events only if `tokens`)"""
+    if callback is None:
+        yield
+        return
+    token = _listeners.set(_listeners.get() + ((callback, tokens),))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
+def has_listeners() -> bool:
+    """True when a listener wants streamed LLM tokens"""
+    return any(tokens for _, tokens in _listeners.get())
+
+
+@contextmanager
+def phase(source: str, name: str, **data):
+    """Emit phase_start, then phase_end with its duration, any error and the fields added to the yielded dict"""
+    emit(PHASE_START, source, phase=name, **data)
+    end_data: Dict[str, Any] = {}
+    start = time.perf_counter()
+    try:
+        yield end_data
+    except Exception as e:
+        end_data["error"] = str(e)
+        raise
+    finally:
+        emit(PHASE_END, source, phase=name, duration=time.perf_counter() - start, **end_data)
+
+
+def emit(type: str, source: str, **data):
+    """Deliver an event to the listeners of the current context"""
+    listeners = _listeners.get()
+    if not listeners:
+        return
+    event = AgentEvent(type, source, data)
+    for callback, tokens in listeners:
+        if type == LLM_TOKEN and not tokens:
+            continue
+        try:
+            callback(event)
+        except Exception as e:
+            # A broken progress display must never fail the task
+            print(f"⚠️  Event listener failed: {e}")
@@ -0,0 +1,296 @@
+"""
+Lightweight Prometheus-compatible metrics
+
+Counters and histograms are kept in plain Python structures guarded by a
+per-metric lock, so recording a sample costs a dict lookup and a bisect.
+The registry renders everything in the Prometheus text exposition format.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+# Buckets (seconds) tuned for HTTP and LLM calls: 5ms up to 1 minute
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        # label values -> the series' value(s)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Sample lines of every series, in the text exposition format"""
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        """Increment the counter for the given label values"""
+        if not Config.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self,
+                 name: str,
+                 documentation: str,
+                 labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record a single observation"""
+        if not Config.METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the wrapped block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {int(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self,
+                  name: str,
+                  documentation: str,
+                  labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Clear all recorded samples (metric definitions are kept)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# Default registry and the metrics exported by the application
+registry = MetricsRegistry()
+
+PLANNER_LLM_LATENCY = registry.histogram(
+    "aiops_planner_llm_latency_seconds",
+    "Latency of planner LLM calls"
+)
+VERIFIER_LLM_LATENCY = registry.histogram(
+    "aiops_verifier_llm_latency_seconds",
+    "Latency of verifier LLM calls"
+)
+TOOL_REQUEST_LATENCY = registry.histogram(
+    "aiops_tool_request_latency_seconds",
+    "Latency of individual tool HTTP request attempts",
+    ("tool",)
+)
+TASK_LATENCY = registry.histogram(
+    "aiops_task_latency_seconds",
+    "End-to-end latency of a task (plan, execute, verify)",
+    ("status",)
+)
+LLM_TOKENS = registry.counter(
+    "aiops_llm_tokens_total",
+    "LLM tokens used",
+    ("type",)
+)
+PLANNER_FALLBACKS = registry.counter(
+    "aiops_planner_fallback_total",
+    "Number of times the planner fell back to the rule-based plan"
+)
+TOOL_RETRIES = registry.counter(
+    "aiops_tool_retries_total",
+    "Number of retried tool HTTP requests",
+    ("tool",)
+)
+CACHE_HITS = registry.counter(
+    "aiops_cache_hits_total",
+    "Cache hits",
+    ("cache",)
+)
+PLAN_CACHE_LOOKUPS = registry.counter(
+    "aiops_plan_cache_lookups_total",
+    "Semantic plan cache lookups by result (hit or miss)",
+    ("result",)
+)
+SPECULATIVE_STEPS = registry.counter(
+    "aiops_speculative_steps_total",
+    "Tool calls started before the plan was known, by result (hit: reused by the plan, wasted: not)",
+    ("result",)
+)
+REFRESH_STEPS = registry.counter(
+    "aiops_refresh_steps_total",
+    "Steps of refreshed tasks by result (fresh: kept, unchanged or changed: re-executed)",
+    ("result",)
+)
+TASK_REFRESHES = registry.counter(
+    "aiops_task_refreshes_total",
+    "Refreshed tasks by result (unchanged: verifier skipped, changed: verified again)",
+    ("result",)
+)
+VERIFIER_PATHS = registry.counter(
+    "aiops_verifier_path_total",
+    "Verified tasks by formatting path (template, llm, mapreduce or session)",
+    ("path",)
+)
+LLM_LATENCY = registry.histogram(
+    "aiops_llm_latency_seconds",
+    "Latency of LLM calls by model tier",
+    ("tier",)
+)
+LLM_REQUESTS = registry.counter(
+    "aiops_llm_requests_total",
+    "LLM calls by model tier",
+    ("tier",)
+)
+LLM_ESCALATIONS = registry.counter(
+    "aiops_llm_escalations_total",
+    "Small-model responses retried on the large model, by reason (json or validation)",
+    ("reason",)
+)
+LLM_COST = registry.counter(
+    "aiops_llm_cost_usd_total",
+    "Estimated LLM cost in USD by model tier",
+    ("tier",)
+)
+LLM_PROVIDER_REQUESTS = registry.counter(
+    "aiops_llm_provider_requests_total",
+    "LLM provider calls by provider and result (ok or error)",
+    ("provider", "result")
+)
+LLM_FAILOVERS = registry.counter(
+    "aiops_llm_failovers_total",
+    "LLM calls moved to the next provider after this provider failed",
+    ("provider",)
+)
+LLM_HEDGES = registry.counter(
+    "aiops_llm_hedges_total",
+    "Hedged LLM calls by the provider that answered first (primary or backup)",
+    ("winner",)
+)
+LLM_REPAIRS = registry.counter(
+    "aiops_llm_repairs_total",
+    "Follow-up calls repairing invalid LLM JSON, by kind (schema or syntax) and result (fixed or failed)",
+    ("kind", "result")
+)
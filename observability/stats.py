@@ -0,0 +1,74 @@
+"""
+Latency statistics helpers shared by batch mode, benchmarks and the run journal
+"""
+import math
+from typing import Dict, Iterable, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(values: Iterable[float]) -> Dict[str, float]:
+    """Return count, mean, p50, p95, p99 and max of latency samples"""
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1]
+    }
+
+
+class LatencySketch:
+    """Streaming latency percentiles in constant memory
+
+    Values are counted in logarithmic buckets 2% wide, so percentiles stay
+    within about 1% of the exact ones however many values are added.
+    """
+
+    GROWTH = 1.02
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        index = math.floor(math.log(max(value, 1e-6)) / math.log(self.GROWTH))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile, as the midpoint of its bucket"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self.GROWTH ** (index + 0.5), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Same fields as summarize_latencies"""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
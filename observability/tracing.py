@@ -0,0 +1,253 @@
+"""
+Lightweight tracing for tasks, agents, tools and LLM calls
+
+Spans are buffered per trace and handed to the exporter only when the root
+span finishes, which lets us tail-sample: error traces and traces slower than
+TRACE_SLOW_MS are always kept, the rest are kept with TRACE_SAMPLE_RATE
+probability. Exporting happens on a background thread so the request path
+only pays for building the span objects.
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+SERVICE_NAME = "ai-ops-assistant"
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = "ok"
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_to_attribute(self, key: str, amount: float = 1):
+        """Accumulate a numeric attribute (e.g. token counts across calls)"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.error = str(error)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span stand-in used when tracing is disabled"""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def add_to_attribute(self, key: str, amount: float = 1):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JsonlExporter:
+    """Append finished spans to a local JSONL file, one span per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OTLPExporter:
+    """Send spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+
+    def export(self, spans: List[Span]):
+        import requests
+
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": "ai_ops_assistant"},
+                    "spans": [self._span(span) for span in spans]
+                }]
+            }]
+        }
+        requests.post(self.url, json=payload, timeout=Config.REQUEST_TIMEOUT)
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": self._attributes(span.attributes),
+            "status": {"code": 2, "message": span.error} if span.status == "error" else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return otlp_span
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        encoded = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                encoded_value = {"boolValue": value}
+            elif isinstance(value, int):
+                encoded_value = {"intValue": str(value)}
+            elif isinstance(value, float):
+                encoded_value = {"doubleValue": value}
+            else:
+                encoded_value = {"stringValue": str(value)}
+            encoded.append({"key": key, "value": encoded_value})
+        return encoded
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate: float = 1.0, slow_ms: float = 0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._current = contextvars.ContextVar("current_span", default=None)
+        self._pending: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def current_span(self):
+        """Return the active span, or a no-op span outside of any trace"""
+        return self._current.get() or NOOP_SPAN
+
+    @contextmanager
+    def start_span(self, name: str, **attributes):
+        """Start a span as a child of the active span (or a new root span)"""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        parent = self._current.get()
+        trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        if parent is None:
+            with self._lock:
+                self._pending[trace_id] = []
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            self._current.reset(token)
+            self._finish(span, is_root=parent is None)
+
+    def _finish(self, span: Span, is_root: bool):
+        with self._lock:
+            spans = self._pending.get(span.trace_id)
+            if spans is None:
+                # Late child of a trace whose root already finished
+                return
+            spans.append(span)
+            if not is_root:
+                return
+            del self._pending[span.trace_id]
+
+        if self._should_keep(span, spans):
+            self._enqueue(spans)
+
+    def _should_keep(self, root: Span, spans: List[Span]) -> bool:
+        """Tail-sampling decision, made once the whole trace is known"""
+        if any(span.status == "error" for span in spans):
+            return True
+        if self.slow_ms and root.duration_ms >= self.slow_ms:
+            return True
+        return random.random() < self.sample_rate
+
+    def _enqueue(self, spans: List[Span]):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._queue = queue.Queue()
+                    self._worker = threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True)
+                    self._worker.start()
+                    atexit.register(self.flush)
+        self._queue.put(spans)
+
+    def _export_loop(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+            except Exception as e:
+                print(f"⚠️  Trace export failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until all queued traces have been exported"""
+        if self._queue is not None:
+            self._queue.join()
+
+
+def _create_exporter():
+    if Config.TRACE_EXPORTER == "jsonl":
+        return JsonlExporter(Config.TRACE_FILE)
+    if Config.TRACE_EXPORTER == "otlp":
+        return OTLPExporter(Config.OTLP_ENDPOINT)
+    return None
+
+
+tracer = Tracer(
+    exporter=_create_exporter(),
+    sample_rate=Config.TRACE_SAMPLE_RATE,
+    slow_ms=Config.TRACE_SLOW_MS
+)
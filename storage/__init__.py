@@ -0,0 +1,17 @@
+"""
+Storage package for AI Operations Assistant
+Contains caches, task result stores and the dashboard task history that can be shared across workers,
+record/replay cassettes for tool and LLM traffic and the run journal
+"""
+
+from .cache import MemoryCache, SQLiteCache, create_cache
+from .task_store import MemoryTaskStore, SQLiteTaskStore, create_task_store
+from .task_history import TaskHistory, create_task_history
+from .cassette import Cassette, CassetteMiss, get_cassette
+from .journal import RunJournal, get_journal, read_journal
+
+__all__ = ["MemoryCache", "SQLiteCache", "create_cache",
+           "MemoryTaskStore", "SQLiteTaskStore", "create_task_store",
+           "TaskHistory", "create_task_history",
+           "Cassette", "CassetteMiss", "get_cassette",
+           "RunJournal", "get_journal", "read_journal"]
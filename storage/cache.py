@@ -0,0 +1,140 @@
+"""
+Key/value caches with TTL
+
+MemoryCache is local to one process. SQLiteCache keeps entries in a shared
+SQLite database (WAL mode) so every uvicorn worker on the host sees the same
+entries and hit rates are not split N ways.
+"""
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from config import Config
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteDatabase:
+    """Per-thread, fork-safe SQLite connections to one shared database file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # A connection must not be reused across fork(), so key it by pid too
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=Config.REQUEST_TIMEOUT, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class SQLiteCache:
+    def __init__(self, path: str, namespace: str = "default", max_entries: int = 10000):
+        self.db = SQLiteDatabase(path)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        # next() on a count is atomic, so threads sharing the cache each get their own write number
+        self._writes = itertools.count(1)
+        self.db.connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self.db.connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        expires_at = time.time() + ttl if ttl else 0
+        conn = self.db.connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace, key, json.dumps(value), expires_at)
+        )
+        if next(self._writes) % 100 == 0:
+            self._prune(conn)
+
+    def delete(self, key: str):
+        self.db.connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def clear(self):
+        self.db.connection().execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def _prune(self, conn: sqlite3.Connection):
+        """Drop expired entries, then the oldest-expiring ones above max_entries"""
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at > 0 AND expires_at < ?",
+            (self.namespace, time.time())
+        )
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at = 0 DESC, expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+
+
+def create_cache(namespace: str):
+    """Create a cache using the configured backend (CACHE_BACKEND)"""
+    if Config.CACHE_BACKEND == "sqlite":
+        return SQLiteCache(Config.SHARED_DB_PATH, namespace)
+    return MemoryCache()
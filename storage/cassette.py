@@ -0,0 +1,121 @@
+"""
+Record/replay cassettes for tool HTTP and LLM traffic
+
+In record mode every tool request made through BaseTool.make_request and
+every LLMClient.generate_completion call is appended to a gzip-compressed
+JSONL cassette together with its latency. In replay mode the same calls are
+answered from the cassette without any network access. Identical requests
+are replayed in the order they were recorded, cycling when exhausted.
+
+Replay latency (CASSETTE_LATENCY):
+    none      answer immediately
+    recorded  sleep for the latency recorded with each response
+    sampled   sleep for a latency drawn (seeded) from all recorded latencies
+              of the same kind, reproducing the production distribution
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+# Request fields that carry credentials and must not affect matching
+_SECRET_PARAMS = {"key", "api_key", "apikey", "token", "access_token"}
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def request_key(kind: str, request: Dict[str, Any]) -> str:
+    """Stable hash of a request, ignoring credential parameters"""
+    params = request.get("params")
+    if isinstance(params, dict):
+        request = dict(request, params={k: v for k, v in params.items() if k.lower() not in _SECRET_PARAMS})
+    raw = json.dumps([kind, request], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str, latency_mode: str = "none", seed: int = 0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_mode = latency_mode
+        self._lock = threading.Lock()
+        self._writer = None
+        self._entries: Dict[str, List[Tuple[Any, float]]] = defaultdict(list)
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._positions: Dict[str, int] = defaultdict(int)
+        self._random = random.Random(seed)
+
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries[entry["k"]].append((entry["r"], entry["l"]))
+                self._latencies[entry["t"]].append(entry["l"])
+
+    def record(self, kind: str, request: Dict[str, Any], response: Any, latency: float):
+        entry = {"k": request_key(kind, request), "t": kind, "l": round(latency, 4), "r": response}
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._writer is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._writer = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._writer.write(line)
+            self._writer.flush()
+
+    def replay(self, kind: str, request: Dict[str, Any]) -> Any:
+        key = request_key(kind, request)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recorded {kind} response for this request in {self.path}")
+            response, latency = entries[self._positions[key] % len(entries)]
+            self._positions[key] += 1
+            if self.latency_mode == "sampled":
+                latency = self._random.choice(self._latencies[kind])
+
+        if self.latency_mode in ("recorded", "sampled"):
+            time.sleep(latency)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """Return the configured cassette, or None when CASSETTE_MODE is off"""
+    global _cassette
+    if Config.CASSETTE_MODE not in ("record", "replay"):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(Config.CASSETTE_PATH, Config.CASSETTE_MODE,
+                                     Config.CASSETTE_LATENCY, Config.CASSETTE_SEED)
+    return _cassette
@@ -0,0 +1,123 @@
+"""
+Append-only journal of task runs
+
+Every task run appends one compact JSON line (task, plan, phase and step
+timings, tool status, token counts, cache hits) to the current segment file
+in JOURNAL_DIR. A segment is closed once it reaches JOURNAL_SEGMENT_MB and a
+new one is started; the oldest segments are deleted while the journal is
+larger than JOURNAL_MAX_MB (checked whenever a segment is started), so disk
+usage stays bounded. Segment names start with their creation time and
+include the writing process id, so several workers can share a directory
+and the segments still sort chronologically.
+
+read_journal() streams the records back one at a time for `python journal.py`.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List
+
+from config import Config
+
+SEGMENT_PATTERN = "runs-*.jsonl"
+
+
+class RunJournal:
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+        self._size = 0
+        self._pid = None
+
+    def append(self, record: Dict[str, Any]):
+        data = (json.dumps(record, separators=(",", ":"), ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            # A forked worker starts its own segment instead of sharing its parent's file
+            if self._file is None or self._pid != os.getpid() or (self._size and self._size + len(data) > self.segment_bytes):
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+
+    def _rotate(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._pid = os.getpid()
+        self._path = os.path.join(self.directory, f"runs-{time.time_ns() // 1_000_000:013d}-{self._pid}.jsonl")
+        self._file = open(self._path, "ab")
+        self._size = 0
+        self._enforce_limit()
+
+    def _enforce_limit(self):
+        """Delete the oldest segments (never the one being written) while the journal exceeds max_bytes"""
+        segments = []
+        for path in segment_paths(self.directory):
+            try:
+                segments.append((path, os.path.getsize(path)))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size in segments)
+        for path, size in segments:
+            if total <= self.max_bytes:
+                break
+            if path == self._path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Already removed by another worker
+                pass
+            total -= size
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def segment_paths(directory: str) -> List[str]:
+    """Journal segments, oldest first"""
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)), key=os.path.basename)
+
+
+def read_journal(directory: str) -> Iterator[Dict[str, Any]]:
+    """Yield every record, oldest segment first, reading one line at a time"""
+    for path in segment_paths(directory):
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            # Deleted by retention since it was listed
+            continue
+        with f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn last line of a segment that is still being written
+                    continue
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Return the run journal, or None when JOURNAL_ENABLED is off"""
+    global _journal
+    if not Config.JOURNAL_ENABLED:
+        return None
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = RunJournal(Config.JOURNAL_DIR,
+                                      segment_bytes=int(Config.JOURNAL_SEGMENT_MB * 1024 * 1024),
+                                      max_bytes=int(Config.JOURNAL_MAX_MB * 1024 * 1024))
+    return _journal
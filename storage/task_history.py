@@ -0,0 +1,131 @@
+"""
+Task history for the Streamlit dashboard
+
+Finished runs are kept in SQLite so the history is shared by every browser
+session and survives restarts. A history row holds the small fields the list
+view shows; the full result payload is only read when an entry is opened.
+Per-status counts and the stored payload size are kept up to date by triggers,
+so the dashboard never scans the table to show them, and the oldest entries
+are dropped once the entry or size limit is exceeded.
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from storage.cache import SQLiteDatabase
+
+SUMMARY_COLUMNS = ("id", "task", "created_at", "status", "summary", "steps", "successful_steps")
+
+
+class TaskHistory:
+    def __init__(self, path: str, max_entries: int = 1000, max_bytes: int = 50 * 1024 * 1024):
+        self.db = SQLiteDatabase(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        conn = self.db.connection()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS task_history ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " task TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " status TEXT NOT NULL,"
+            " summary TEXT NOT NULL,"
+            " steps INTEGER NOT NULL,"
+            " successful_steps INTEGER NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " payload_size INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS task_history_stats ("
+            " name TEXT PRIMARY KEY,"
+            " value INTEGER NOT NULL);"
+            "CREATE TRIGGER IF NOT EXISTS task_history_added AFTER INSERT ON task_history BEGIN"
+            " INSERT INTO task_history_stats (name, value) VALUES ('total', 1), ('status:' || NEW.status, 1),"
+            "  ('bytes', NEW.payload_size)"
+            "  ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;"
+            " END;"
+            "CREATE TRIGGER IF NOT EXISTS task_history_removed AFTER DELETE ON task_history BEGIN"
+            " UPDATE task_history_stats SET value = value - 1 WHERE name IN ('total', 'status:' || OLD.status);"
+            " UPDATE task_history_stats SET value = value - OLD.payload_size WHERE name = 'bytes';"
+            " END;"
+        )
+
+    def add(self, task: str, status: str, summary: str, steps: int, successful_steps: int,
+            payload: Dict[str, Any], created_at: float = None) -> int:
+        """Store a finished run and apply retention; returns the entry id"""
+        data = json.dumps(payload, default=str)
+        conn = self.db.connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            entry_id = conn.execute(
+                "INSERT INTO task_history (task, created_at, status, summary, steps, successful_steps, payload, payload_size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (task, created_at or time.time(), status, summary or "", steps, successful_steps, data, len(data))
+            ).lastrowid
+            self._prune(conn)
+        return entry_id
+
+    def counts(self) -> Dict[str, int]:
+        """Entry count ("total"), payload size ("bytes") and count per status"""
+        rows = self.db.connection().execute("SELECT name, value FROM task_history_stats").fetchall()
+        counts = {"total": 0, "bytes": 0}
+        for name, value in rows:
+            counts[name.split(":", 1)[-1]] = value
+        return counts
+
+    def page(self, before_id: int = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest entries older than `before_id` (keyset pagination), without their payloads"""
+        query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM task_history"
+        params = []
+        if before_id is not None:
+            query += " WHERE id < ?"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        rows = self.db.connection().execute(query, params).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+    def has_older(self, entry_id: int) -> bool:
+        return self.db.connection().execute(
+            "SELECT 1 FROM task_history WHERE id < ? LIMIT 1", (entry_id,)
+        ).fetchone() is not None
+
+    def payload(self, entry_id: int) -> Optional[Dict[str, Any]]:
+        """Full final result of one entry"""
+        row = self.db.connection().execute(
+            "SELECT payload FROM task_history WHERE id = ?", (entry_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def clear(self):
+        self.db.connection().execute("DELETE FROM task_history")
+
+    def _prune(self, conn):
+        """Drop the oldest entries above max_entries, then above max_bytes of payload"""
+        stats = dict(conn.execute("SELECT name, value FROM task_history_stats WHERE name IN ('total', 'bytes')"))
+        excess_entries = stats.get("total", 0) - self.max_entries
+        if excess_entries > 0:
+            conn.execute(
+                "DELETE FROM task_history WHERE id IN (SELECT id FROM task_history ORDER BY id LIMIT ?)",
+                (excess_entries,)
+            )
+            stats["bytes"] = conn.execute("SELECT value FROM task_history_stats WHERE name = 'bytes'").fetchone()[0]
+
+        excess_bytes = stats.get("bytes", 0) - self.max_bytes
+        if excess_bytes > 0:
+            # Keep at least the newest entry, however large it is
+            newest = conn.execute("SELECT MAX(id) FROM task_history").fetchone()[0]
+            cutoff, freed = None, 0
+            for entry_id, size in conn.execute(
+                    "SELECT id, payload_size FROM task_history WHERE id < ? ORDER BY id", (newest,)):
+                cutoff, freed = entry_id, freed + size
+                if freed >= excess_bytes:
+                    break
+            if cutoff is not None:
+                conn.execute("DELETE FROM task_history WHERE id <= ?", (cutoff,))
+
+
+def create_task_history():
+    """Task history in the shared database (SHARED_DB_PATH), limited by APP_HISTORY_MAX_ENTRIES/_MB"""
+    return TaskHistory(Config.SHARED_DB_PATH,
+                       max_entries=Config.APP_HISTORY_MAX_ENTRIES,
+                       max_bytes=int(Config.APP_HISTORY_MAX_MB * 1024 * 1024))
@@ -0,0 +1,65 @@
+"""
+Storage for completed task results
+
+The API keeps every task's plan, execution results and final result so they
+can be fetched again via /tasks/{task_id}. With several uvicorn workers the
+SQLite store must be used, otherwise a task is only visible to the worker
+that ran it.
+"""
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+from storage.cache import SQLiteDatabase
+
+
+class MemoryTaskStore:
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, task_id: str, data: Dict[str, Any]):
+        with self._lock:
+            self._tasks[task_id] = data
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+
+class SQLiteTaskStore:
+    def __init__(self, path: str):
+        self.db = SQLiteDatabase(path)
+        self.db.connection().execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            " task_id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+
+    def save(self, task_id: str, data: Dict[str, Any]):
+        self.db.connection().execute(
+            "INSERT OR REPLACE INTO tasks (task_id, data, created_at) VALUES (?, ?, ?)",
+            (task_id, json.dumps(data, default=str), time.time())
+        )
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.connection().execute(
+            "SELECT data FROM tasks WHERE task_id = ?", (task_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+
+def create_task_store():
+    """Create a task store using the configured backend (CACHE_BACKEND)"""
+    if Config.CACHE_BACKEND == "sqlite":
+        return SQLiteTaskStore(Config.SHARED_DB_PATH)
+    return MemoryTaskStore()
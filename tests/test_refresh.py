@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from agents.pipeline import refresh_task
+from tools.registry import BUILTIN_TOOLS, ToolRegistry
+
+WEATHER = {"step_number": 1, "tool": "weather", "parameters": {"city": "London"}}
+GITHUB = {"step_number": 2, "tool": "github_search", "parameters": {"query": "python"}}
+STORED_ANSWER = {"status": "success", "answer": "stored"}
+
+
+class StubExecutor:
+    """Returns canned results per tool and records which steps it executed"""
+
+    def __init__(self, results):
+        self.registry = ToolRegistry(BUILTIN_TOOLS, load_plugins=False)
+        self.results = results
+        self.executed = []
+
+    def execute_plan(self, steps):
+        self.executed.extend(step["step_number"] for step in steps)
+        return [_result(step, self.results[step["tool"]]) for step in steps]
+
+
+class StubVerifier:
+    def __init__(self):
+        self.calls = []
+
+    def verify_and_format(self, task, results, mode=None):
+        self.calls.append(results)
+        return {"status": "success", "answer": "verified"}
+
+
+def _result(step, data, age=0.0):
+    return {"step": step["step_number"], "tool": step["tool"], "success": True,
+            "result": dict(data), "fetched_at": time.time() - age}
+
+
+def _weather(temperature, last_updated="10:00"):
+    return {"city": "London", "temperature": temperature, "last_updated": last_updated}
+
+
+REPOS = {"total_count": 1, "repositories": [{"name": "cpython"}]}
+
+
+@pytest.fixture
+def verifier():
+    return StubVerifier()
+
+
+def _refresh(executor, verifier, stored, **kwargs):
+    plan = {"task": "t", "steps": [WEATHER, GITHUB]}
+    return refresh_task(executor, verifier, "t", plan, stored, STORED_ANSWER, **kwargs)
+
+
+def test_only_steps_past_their_freshness_window_run(verifier):
+    executor = StubExecutor({"weather": _weather(20), "github_search": REPOS})
+    # Weather stays fresh for 600 s and GitHub for an hour
+    stored = [_result(WEATHER, _weather(20), age=900), _result(GITHUB, REPOS, age=900)]
+    output = _refresh(executor, verifier, stored)
+    assert executor.executed == [1]
+    assert output["refresh"]["refreshed_steps"] == [1]
+    assert output["execution_results"][1] is stored[1]
+
+
+def test_max_age_overrides_freshness_window(verifier):
+    executor = StubExecutor({"weather": _weather(20), "github_search": REPOS})
+    stored = [_result(WEATHER, _weather(20), age=60), _result(GITHUB, REPOS, age=60)]
+    assert _refresh(executor, verifier, stored)["refresh"]["refreshed_steps"] == []
+    assert _refresh(executor, verifier, stored, max_age=30)["refresh"]["refreshed_steps"] == [1, 2]
+    assert executor.executed == [1, 2]
+
+
+def test_failed_and_unmatched_results_are_refreshed(verifier):
+    executor = StubExecutor({"weather": _weather(20), "github_search": REPOS})
+    failed = {"step": 1, "tool": "weather", "success": False, "error": "timeout", "fetched_at": time.time()}
+    output = _refresh(executor, verifier, [failed, _result(GITHUB, REPOS)])
+    assert output["refresh"]["refreshed_steps"] == [1]
+    assert output["refresh"]["changed_steps"] == [1]
+
+    executor.executed.clear()
+    _refresh(executor, verifier, [_result(WEATHER, _weather(20))])
+    assert executor.executed == [1, 2]
+
+
+def test_unchanged_results_skip_the_verifier(verifier):
+    executor = StubExecutor({"weather": _weather(20), "github_search": REPOS})
+    stored = [_result(WEATHER, _weather(20), age=900), _result(GITHUB, REPOS)]
+    output = _refresh(executor, verifier, stored)
+    assert verifier.calls == []
+    assert output["final_result"] is STORED_ANSWER
+    assert output["refresh"]["changed_steps"] == []
+    assert output["refresh"]["verified"] is False
+    # The re-executed result is kept, so its new fetched_at restarts the window
+    assert output["execution_results"][0]["fetched_at"] > stored[0]["fetched_at"]
+
+
+def test_changed_results_are_verified_again(verifier):
+    executor = StubExecutor({"weather": _weather(25), "github_search": REPOS})
+    stored = [_result(WEATHER, _weather(20), age=900), _result(GITHUB, REPOS)]
+    output = _refresh(executor, verifier, stored)
+    assert output["refresh"]["changed_steps"] == [1]
+    assert output["refresh"]["verified"] is True
+    assert output["final_result"] == {"status": "success", "answer": "verified"}
+    assert len(verifier.calls) == 1
+    assert verifier.calls[0][0]["result"]["temperature"] == 25
+    assert verifier.calls[0][1] is stored[1]
+
+
+def test_volatile_only_differences_skip_the_verifier(verifier):
+    executor = StubExecutor({"weather": _weather(20, last_updated="10:10"), "github_search": REPOS})
+    stored = [_result(WEATHER, _weather(20, last_updated="10:00"), age=900), _result(GITHUB, REPOS)]
+    output = _refresh(executor, verifier, stored)
+    assert output["refresh"]["refreshed_steps"] == [1]
+    assert output["refresh"]["changed_steps"] == []
+    assert verifier.calls == []
+    assert output["final_result"] is STORED_ANSWER
+    assert output["execution_results"][0]["result"]["last_updated"] == "10:10"
+
+
+def test_volatile_fields_only_apply_to_their_tool(verifier):
+    repos = dict(REPOS, last_updated="10:10")
+    executor = StubExecutor({"weather": _weather(20), "github_search": repos})
+    stored = [_result(WEATHER, _weather(20)), _result(GITHUB, dict(REPOS, last_updated="10:00"), age=7200)]
+    output = _refresh(executor, verifier, stored)
+    assert output["refresh"]["changed_steps"] == [2]
+    assert len(verifier.calls) == 1
@@ -0,0 +1,139 @@
+import pytest
+
+from llm.schema import SchemaValidator, format_path, get_validator
+from tools.registry import BUILTIN_TOOLS, ToolRegistry
+
+
+@pytest.fixture
+def plan_validator():
+    return SchemaValidator(ToolRegistry(BUILTIN_TOOLS, load_plugins=False).plan_schema())
+
+
+def _plan(*steps):
+    return {"task": "t", "steps": list(steps)}
+
+
+def _github_step(**parameters):
+    return {"step_number": 1, "tool": "github_search", "parameters": dict({"query": "python"}, **parameters)}
+
+
+# -- coercion ---------------------------------------------------------------
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5),
+    (" 5 ", 5),
+    ("5.0", 5),
+    (5.0, 5),
+    ("1e1", 10),
+])
+def test_integer_coercion(value, expected):
+    document, errors = SchemaValidator({"type": "integer"}).validate(value)
+    assert errors == []
+    assert document == expected and type(document) is int
+
+
+@pytest.mark.parametrize("value", ["5.5", 5.5, "five", "nan", "inf", True, None])
+def test_integer_rejects_non_integral(value):
+    document, errors = SchemaValidator({"type": "integer"}).validate(value)
+    assert errors == [((), "must be of type integer")]
+    assert document == value
+
+
+def test_number_and_boolean_coercion():
+    assert SchemaValidator({"type": "number"}).validate("2.5") == (2.5, [])
+    assert SchemaValidator({"type": "boolean"}).validate("TRUE") == (True, [])
+    assert SchemaValidator({"type": ["integer", "number"]}).validate("2.5") == (2.5, [])
+    _, errors = SchemaValidator({"type": "number"}).validate("nan")
+    assert errors
+
+
+def test_coercion_happens_in_place(plan_validator):
+    plan = _plan(dict(_github_step(per_page="5.0"), step_number=1.0))
+    document, errors = plan_validator.validate(plan)
+    assert errors == []
+    assert document is plan
+    assert plan["steps"][0]["parameters"]["per_page"] == 5
+    assert plan["steps"][0]["step_number"] == 1
+
+
+# -- anyOf ------------------------------------------------------------------
+
+def test_any_of_dispatches_on_discriminator(plan_validator):
+    step = {"step_number": 1, "tool": "weather", "parameters": {}}
+    _, errors = plan_validator.validate(_plan(step))
+    # Only the weather branch is checked, so the error names the missing city
+    assert errors == [(("steps", 0, "parameters", "city"), "required property is missing")]
+
+
+def test_any_of_unknown_discriminator_value(plan_validator):
+    _, errors = plan_validator.validate(_plan({"step_number": 1, "tool": "jira", "parameters": {}}))
+    assert errors == [(("steps", 0, "tool"), "must be one of ['github_search', 'weather']")]
+
+
+def test_any_of_without_discriminator():
+    validator = SchemaValidator({"anyOf": [{"type": "integer"}, {"type": "string", "minLength": 2}]})
+    assert validator.validate(3) == (3, [])
+    assert validator.validate("ab") == ("ab", [])
+    _, errors = validator.validate([])
+    assert errors == [((), "does not match any of the allowed schemas")]
+
+
+# -- required, closed objects, arrays and scalars ---------------------------
+
+def test_required_properties(plan_validator):
+    _, errors = plan_validator.validate({"task": "t"})
+    assert errors == [(("steps",), "required property is missing")]
+
+
+def test_additional_properties_false():
+    validator = SchemaValidator({"type": "object", "properties": {"a": {}}, "additionalProperties": False})
+    assert validator.validate({"a": 1}) == ({"a": 1}, [])
+    _, errors = validator.validate({"a": 1, "b": 2})
+    assert errors == [(("b",), "is not an allowed property")]
+
+
+def test_array_items_and_min_items():
+    validator = SchemaValidator({"type": "array", "items": {"type": "integer"}, "minItems": 2})
+    assert validator.validate(["1", 2]) == ([1, 2], [])
+    _, errors = validator.validate(["x"])
+    assert errors == [((), "must have at least 2 item(s)"), ((0,), "must be of type integer")]
+
+
+def test_const_enum_and_min_length():
+    assert SchemaValidator({"const": "a"}).validate("b")[1] == [((), 'must be "a"')]
+    assert SchemaValidator({"enum": [1, 2]}).validate(3)[1] == [((), "must be one of [1, 2]")]
+    assert SchemaValidator({"type": "string", "minLength": 1}).validate("")[1] == [((), "must not be empty")]
+
+
+def test_every_error_is_reported(plan_validator):
+    plan = _plan({"step_number": "one", "tool": "github_search", "parameters": {"per_page": "many"}})
+    _, errors = plan_validator.validate(plan)
+    assert sorted(format_path(path) for path, _ in errors) == [
+        "steps[0].parameters.per_page", "steps[0].parameters.query", "steps[0].step_number"
+    ]
+
+
+# -- subschema and helpers --------------------------------------------------
+
+def test_subschema_resolves_any_of_branch(plan_validator):
+    plan = _plan(_github_step(), {"step_number": 2, "tool": "weather", "parameters": {}})
+    assert plan_validator.subschema(("steps", 1, "parameters"), plan)["required"] == ["city"]
+    assert plan_validator.subschema(("steps", 0, "parameters", "per_page"), plan)["type"] == "integer"
+    assert plan_validator.subschema(("steps", 0, "tool"), plan) == {"const": "github_search"}
+
+
+def test_subschema_of_missing_value(plan_validator):
+    # Paths into values the document does not have still resolve through the schema
+    assert plan_validator.subschema(("task",), {}) == {"type": "string"}
+    assert "anyOf" in plan_validator.subschema(("steps", 3), _plan())
+
+
+def test_format_path():
+    assert format_path(()) == "$"
+    assert format_path(("steps", 1, "tool")) == "steps[1].tool"
+    assert format_path((0, "a")) == "[0].a"
+
+
+def test_get_validator_compiles_once():
+    schema = {"type": "object", "required": ["a"]}
+    assert get_validator(schema) is get_validator({"required": ["a"], "type": "object"})
@@ -4,7 +4,21 @@ Contains API integration tools
 """
 
 from .base_tool import BaseTool
-from .github_tool import GitHubTool
-from .weather_tool import WeatherTool
+from .registry import ToolRegistry, ToolSpec, registry
 
-__all__ = ["BaseTool", "GitHubTool", "WeatherTool"]
\ No newline at end of file
+__all__ = ["BaseTool", "ToolRegistry", "ToolSpec", "registry"]
+
+# Tool classes are imported on first access, so importing the registry stays cheap
+_LAZY_TOOLS = {
+    "GitHubTool": "tools.github_tool",
+    "WeatherTool": "tools.weather_tool"
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_TOOLS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(module_name), name)
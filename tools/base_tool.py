@@ -1,10 +1,22 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
-import requests
+import hashlib
+import json
+import time
 from config import Config
+from observability.metrics import TOOL_REQUEST_LATENCY, TOOL_RETRIES, CACHE_HITS
+from observability import events
+from observability.tracing import tracer
+from storage.cache import create_cache
+from storage.cassette import get_cassette
 
 
 class BaseTool(ABC):
+    # Response cache shared by all tools (per process, or per host with CACHE_BACKEND=sqlite)
+    _response_cache = None
+    # HTTP session shared by all tools so connections are pooled and kept alive
+    _session = None
+
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
@@ -22,23 +34,82 @@ class BaseTool(ABC):
                      data: Dict = None,
                      max_retries: int = None) -> Dict[str, Any]:
         """Make HTTP request with retry logic"""
+        # Imported on first use to keep module import cheap
+        import requests
+
         max_retries = max_retries or Config.MAX_RETRIES
 
+        # Only idempotent GET responses are cached
+        cache_key = None
+        if method.upper() == "GET" and Config.TOOL_CACHE_TTL > 0:
+            cache_key = self._cache_key(method, url, params)
+            cached = self._get_response_cache().get(cache_key)
+            if cached is not None:
+                CACHE_HITS.inc(cache="tool")
+                events.emit(events.CACHE_HIT, self.name, cache="tool", tool=self.name)
+                tracer.current_span().set_attribute("cache.hit", True)
+                return cached
+
+        cassette = get_cassette()
+        cassette_request = {"method": method.upper(), "url": url, "params": params, "data": data}
+        if cassette is not None and cassette.mode == "replay":
+            with tracer.start_span("tool.make_request", tool=self.name, http_method=method, replayed=True):
+                return cassette.replay("tool", cassette_request)
+
         for attempt in range(max_retries):
-            try:
-                response = requests.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=data,
-                    timeout=Config.REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
-                    raise Exception(f"Request failed after {max_retries} attempts: {str(e)}")
-                continue
-
-        raise Exception("Request failed")
\ No newline at end of file
+            if attempt > 0:
+                TOOL_RETRIES.inc(tool=self.name)
+                tracer.current_span().set_attribute("tool.retries", attempt)
+            start = time.perf_counter()
+            with tracer.start_span("tool.make_request", tool=self.name, http_method=method, attempt=attempt + 1) as span:
+                try:
+                    response = self._get_session().request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        json=data,
+                        timeout=Config.REQUEST_TIMEOUT
+                    )
+                    span.set_attribute("http.status_code", response.status_code)
+                    response.raise_for_status()
+                    result = response.json()
+                    if cassette is not None:
+                        cassette.record("tool", cassette_request, result, time.perf_counter() - start)
+                    if cache_key:
+                        self._get_response_cache().set(cache_key, result, ttl=Config.TOOL_CACHE_TTL)
+                    return result
+                except requests.exceptions.RequestException as e:
+                    span.record_error(e)
+                    if attempt == max_retries - 1:
+                        raise Exception(f"Request failed after {max_retries} attempts: {str(e)}")
+                    events.emit(events.RETRY, self.name, tool=self.name, attempt=attempt + 2,
+                                max_attempts=max_retries, error=str(e))
+                    continue
+                finally:
+                    TOOL_REQUEST_LATENCY.observe(time.perf_counter() - start, tool=self.name)
+
+        raise Exception("Request failed")
+
+    @classmethod
+    def _get_session(cls):
+        if BaseTool._session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=Config.HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            BaseTool._session = session
+        return BaseTool._session
+
+    @classmethod
+    def _get_response_cache(cls):
+        if BaseTool._response_cache is None:
+            BaseTool._response_cache = create_cache("tool_responses")
+        return BaseTool._response_cache
+
+    @staticmethod
+    def _cache_key(method: str, url: str, params: Dict = None) -> str:
+        raw = json.dumps([method.upper(), url, params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Tool registry
+
+Every tool is described by a ToolSpec: its name, a JSON-schema for its
+parameters, cost/latency hints, how long its results stay fresh and a
+"module:Class" loader string. Specs are
+cheap to import; the tool class itself is imported and constructed only when
+a plan first uses it.
+
+Third-party tools register through the "ai_ops_assistant.tools" entry point
+group, each entry point pointing at a ToolSpec:
+
+    [project.entry-points."ai_ops_assistant.tools"]
+    jira = "my_package.tools:JIRA_SPEC"
+
+The planner's tool catalog and the JSON schema its plans must match are
+generated from the registry once and cached until the set of tools changes.
+"""
+import importlib
+import textwrap
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+ENTRY_POINT_GROUP = "ai_ops_assistant.tools"
+
+
+class ToolSpec:
+    def __init__(self,
+                 name: str,
+                 description: str,
+                 parameters: Dict[str, Any],
+                 loader: str,
+                 latency_hint_ms: int = None,
+                 cost_hint: float = 0.0,
+                 freshness_s: float = None,
+                 volatile_fields: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+        self.loader = loader
+        self.latency_hint_ms = latency_hint_ms
+        self.cost_hint = cost_hint
+        # Seconds a result stays fresh when a stored task is refreshed (None: REFRESH_MAX_AGE)
+        self.freshness_s = freshness_s
+        # Result keys that change on every call (e.g. a timestamp); ignored when diffing results
+        self.volatile_fields = tuple(volatile_fields)
+
+    @property
+    def required_parameters(self) -> List[str]:
+        return list(self.parameters.get("required", []))
+
+    def load_class(self):
+        """Import and return the tool class"""
+        module_name, _, class_name = self.loader.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+    def catalog_entry(self, index: int) -> str:
+        """Describe the tool for the planner prompt"""
+        required = set(self.required_parameters)
+        params = []
+        for param, schema in self.parameters.get("properties", {}).items():
+            if param in required:
+                params.append(f"{param} (required)")
+            elif "default" in schema:
+                params.append(f"{param} (optional, default: {schema['default']})")
+            else:
+                params.append(f"{param} (optional)")
+        return f"{index}. {self.name} - {self.description}\n   Parameters: {', '.join(params) or 'none'}"
+
+
+BUILTIN_TOOLS = [
+    ToolSpec(
+        name="github_search",
+        description="Search GitHub repositories",
+        parameters={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search query for repositories (e.g., 'python', 'machine learning')"
+                },
+                "per_page": {
+                    "type": "integer",
+                    "description": "Number of results to return",
+                    "default": 5
+                }
+            },
+            "required": ["query"]
+        },
+        loader="tools.github_tool:GitHubTool",
+        latency_hint_ms=500,
+        freshness_s=3600
+    ),
+    ToolSpec(
+        name="weather",
+        description="Get current weather by city",
+        parameters={
+            "type": "object",
+            "properties": {
+                "city": {
+                    "type": "string",
+                    "description": "City name for weather information (e.g., 'London', 'Tokyo')"
+                }
+            },
+            "required": ["city"]
+        },
+        loader="tools.weather_tool:WeatherTool",
+        latency_hint_ms=300,
+        # The weather API updates its readings about every 15 minutes
+        freshness_s=600,
+        volatile_fields=("last_updated",)
+    )
+]
+
+
+class ToolRegistry:
+    def __init__(self, specs: List[ToolSpec] = None, load_plugins: bool = True):
+        self._specs: Dict[str, ToolSpec] = {}
+        self._lock = threading.Lock()
+        self._plugins_loaded = not load_plugins
+        # Re-entrant, so a plugin module that queries the registry while loading does not deadlock
+        self._plugins_lock = threading.RLock()
+        self._plugins_loading = False
+        self._catalogs: Dict[str, str] = {}
+        self._plan_schema: Optional[Dict[str, Any]] = None
+        for spec in specs or []:
+            self.register(spec)
+
+    def register(self, spec: ToolSpec):
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._catalogs = {}
+            self._plan_schema = None
+
+    def _ensure_plugins(self):
+        """Discover entry point plugins the first time the registry is queried
+
+        Other threads querying meanwhile wait until every plugin is registered.
+        """
+        if self._plugins_loaded:
+            return
+        with self._plugins_lock:
+            # A plugin module querying the registry while it is loaded sees the tools registered so far
+            if self._plugins_loaded or self._plugins_loading:
+                return
+            self._plugins_loading = True
+            try:
+                from importlib.metadata import entry_points
+
+                for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                    try:
+                        spec = entry_point.load()
+                        self.register(spec() if callable(spec) else spec)
+                    except Exception as e:
+                        print(f"⚠️  Failed to load tool plugin {entry_point.name}: {e}")
+                self._plugins_loaded = True
+            finally:
+                self._plugins_loading = False
+
+    def names(self) -> List[str]:
+        self._ensure_plugins()
+        return list(self._specs)
+
+    def specs(self) -> List[ToolSpec]:
+        self._ensure_plugins()
+        return list(self._specs.values())
+
+    def get_spec(self, name: str) -> Optional[ToolSpec]:
+        self._ensure_plugins()
+        return self._specs.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get_spec(name) is not None
+
+    def create(self, name: str):
+        """Import and construct the tool named `name`"""
+        spec = self.get_spec(name)
+        if spec is None:
+            raise ValueError(f"Unknown tool: {name}")
+        return spec.load_class()()
+
+    def planner_catalog(self, indent: str = "") -> str:
+        """Tool catalog text for the planner prompt, generated once and cached"""
+        catalog = self._catalogs.get(indent)
+        if catalog is None:
+            entries = "\n".join(spec.catalog_entry(i) for i, spec in enumerate(self.specs(), start=1))
+            catalog = textwrap.indent(entries, indent)
+            self._catalogs[indent] = catalog
+        return catalog
+
+    def plan_schema(self) -> Dict[str, Any]:
+        """JSON schema of a planner plan: each step must name a registered tool and match its parameters"""
+        schema = self._plan_schema
+        if schema is None:
+            steps = [
+                {
+                    "type": "object",
+                    "properties": {
+                        "step_number": {"type": "integer"},
+                        "description": {"type": "string"},
+                        "tool": {"const": spec.name},
+                        "parameters": spec.parameters
+                    },
+                    "required": ["step_number", "tool", "parameters"]
+                }
+                for spec in self.specs()
+            ]
+            schema = {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string"},
+                    "steps": {"type": "array", "items": {"anyOf": steps}}
+                },
+                "required": ["task", "steps"]
+            }
+            self._plan_schema = schema
+        return schema
+
+
+registry = ToolRegistry(BUILTIN_TOOLS)